@@ -3,13 +3,19 @@ from __future__ import annotations
 import json
 import asyncio
 import logging
+import os
+from collections import Counter
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, List, Optional, Set
 
+from .cache import SchemaCache
 from .config import AppConfig
-from .history import HistoryStore
+from .dispatcher import Dispatcher
+from .history import HistoryStore, TokenEstimator, trim_messages
 from .matrix_client import MatrixClientWrapper
 from .llm_client import LLMClient
+from .models import ModelRegistry, registry_for
+from .render import MarkdownRenderer
 from .handlers.router import Router
 from .handlers.cmd_ai import handle_ai
 from .handlers.cmd_model import handle_model
@@ -19,9 +25,26 @@ from .handlers.cmd_prompt import handle_persona, handle_custom
 from .handlers.cmd_x import handle_x
 from .handlers.cmd_tools import handle_tools
 from .handlers.cmd_mymodel import handle_mymodel
+from .handlers.cmd_usage import handle_usage
+from .request_context import request_scope
 from .security import Security
 from .fastmcp_client import FastMCPClient
-from .tools import execute_tool, load_schema
+from .tools import _http as tools_http
+from .tool_cache import ToolResultCache
+from .toolset import ToolSet
+from .tools import execute_tool_async, load_cache_policies, load_schema
+
+# Recent user/assistant turns ranked when the latest message matches no tool
+_TOOL_QUERY_TURNS = 6
+
+
+def _preview_args(arguments: Optional[Dict[str, Any]]) -> str:
+    """Return tool arguments as JSON for logging, truncated to 800 chars."""
+    try:
+        text = json.dumps(arguments or {}, ensure_ascii=False, default=str)
+    except Exception:
+        text = str(arguments)
+    return text[:800] + "…" if len(text) > 800 else text
 
 
 class AppContext:
@@ -43,6 +66,7 @@ class AppContext:
         self.executor = executor or ThreadPoolExecutor(max_workers=4, thread_name_prefix="infinigpt")
         self.logger = logging.getLogger(__name__)
         self.log = self.logger.info
+        self.renderer = MarkdownRenderer()
 
         self.matrix = MatrixClientWrapper(
             server=cfg.matrix.server,
@@ -51,6 +75,8 @@ class AppContext:
             device_id=cfg.matrix.device_id,
             store_path=cfg.matrix.store_path,
             encryption_enabled=bool(getattr(cfg.matrix, "e2e", True)),
+            display_name_ttl=float(getattr(cfg.matrix, "display_name_ttl", 3600)),
+            renderer=self.renderer,
         )
         # History: match reference behavior using prefix/suffix/personality
         prompt = list(cfg.llm.prompt or ["you are ", "."])
@@ -63,6 +89,9 @@ class AppContext:
             personality=cfg.llm.personality,
             prompt_suffix_extra=extra,
             max_items=cfg.llm.history_size,
+            token_budgets=cfg.llm.context_budgets,
+            default_token_budget=cfg.llm.context_budget,
+            estimator=TokenEstimator(),
         )
         # Model and options
         self.models = cfg.llm.models
@@ -80,61 +109,189 @@ class AppContext:
         self.user_models: Dict[str, Dict[str, str]] = {}
 
         # LLM client
-        self.llm = LLMClient(cfg)
+        self.llm = LLMClient(cfg, estimator=self.history.estimator)
 
-        # Tools
+        # Tools: builtins are available immediately; MCP servers are
+        # discovered on the application loop by start_tools(). The offered
+        # tools live in one immutable ToolSet that refreshes swap wholesale.
         self.tools_enabled: bool = True
         self.mcp_client: FastMCPClient | None = None
-        self._mcp_tool_names: set[str] = set()
         try:
-            builtin_schema = load_schema()
+            self._builtin_schema: List[Dict[str, Any]] = load_schema()
         except Exception:
             self.logger.exception("Failed to load builtin tools schema")
-            builtin_schema = []
-        mcp_schema: List[Dict[str, Any]] = []
-        if cfg.llm.mcp_servers:
-            self.logger.info("MCP servers configured: %s", list(cfg.llm.mcp_servers.keys()))
-            successful: Dict[str, Any] = {}
-            for name, spec in cfg.llm.mcp_servers.items():
-                if not spec:
-                    continue
-                try:
-                    client = FastMCPClient({name: spec})
-                    tools = client.list_tools()
-                    self.logger.info("MCP server '%s' returned %d tool(s)", name, len(tools))
-                    successful[name] = spec
-                    mcp_schema.extend(tools)
-                    for tool in tools:
-                        name_str = f"{(tool.get('function') or {}).get('name') or ''}".strip()
-                        if name_str:
-                            self._mcp_tool_names.add(name_str)
-                except Exception:
-                    self.logger.exception("Failed to list tools from MCP server '%s'", name)
-                    continue
-            if successful:
-                try:
-                    self.mcp_client = FastMCPClient(successful)
-                    _ = self.mcp_client.list_tools()
-                except Exception:
-                    self.logger.exception("Failed to initialize consolidated MCP client")
-                    self.mcp_client = None
-        combined: List[Dict[str, Any]] = list(mcp_schema)
-        for tool in builtin_schema:
-            name_str = f"{(tool.get('function') or {}).get('name') or ''}".strip()
-            if name_str and name_str not in self._mcp_tool_names:
-                combined.append(tool)
-        self.tools_schema = combined
-        if not self.tools_schema:
+            self._builtin_schema = []
+        self._tool_tasks: Set[asyncio.Task] = set()
+        self._refreshing: Set[str] = set()
+        self.schema_cache: Optional[SchemaCache] = None
+        servers = {name: spec for name, spec in (cfg.llm.mcp_servers or {}).items() if spec}
+        if servers:
+            self.logger.info("MCP servers configured: %s", list(servers.keys()))
+            try:
+                self.mcp_client = FastMCPClient(
+                    servers,
+                    ping_interval=getattr(cfg.llm, "mcp_ping_interval", 60.0),
+                    on_tools_changed=self._on_tools_changed,
+                )
+            except Exception:
+                self.logger.exception("Failed to initialize MCP client")
+            cache_dir = getattr(cfg.llm, "mcp_schema_cache", "") or os.path.join(cfg.matrix.store_path or ".", "mcp_tools")
+            self.schema_cache = SchemaCache(cache_dir)
+        self.toolset: Optional[ToolSet] = None
+        # Calls per tool name; ranks tools when a request matches none
+        self._tool_uses: Counter = Counter()
+        self._set_tools([])
+
+    @property
+    def tools_schema(self) -> List[Dict[str, Any]]:
+        """Tool definitions currently offered to the model."""
+        return self.toolset.schema if self.toolset is not None else []
+
+    @property
+    def _mcp_tool_names(self) -> FrozenSet[str]:
+        """Names of the current tools that are routed to MCP servers."""
+        return self.toolset.mcp_names if self.toolset is not None else frozenset()
+
+    def _set_tools(self, mcp_schema: List[Dict[str, Any]]) -> None:
+        """Build a new tool set from MCP and builtin schemas and swap it in.
+
+        The tool result cache is rebuilt only when the set of MCP tool names
+        changes, since builtin cache policies do not apply to MCP tools.
+
+        Args:
+            mcp_schema: Tool definitions discovered from MCP servers; they
+                override builtins with the same name.
+        """
+        previous = self.toolset
+        toolset = ToolSet.build(mcp_schema, self._builtin_schema)
+        if previous is not None and toolset.etag == previous.etag and toolset.mcp_names == previous.mcp_names:
+            return
+        if previous is None or toolset.mcp_names != previous.mcp_names:
+            # Packaged policies describe builtins only; MCP tools opt in via config
+            policies = {k: v for k, v in load_cache_policies().items() if k not in toolset.mcp_names}
+            policies.update(getattr(self.cfg.llm, "tool_cache", {}) or {})
+            self.tool_cache = ToolResultCache(policies)
+        self.toolset = toolset
+        if not toolset.schema:
             self.tools_enabled = False
             self.logger.info("Tool calling disabled: no tools available")
         else:
+            # Keep an admin's .tools off across later schema updates
+            if previous is None or not previous.schema:
+                self.tools_enabled = True
             self.logger.info(
-                "Tool calling enabled with %d tools (%d MCP, %d builtin)",
-                len(self.tools_schema),
-                len(mcp_schema),
-                len(self.tools_schema) - len(mcp_schema),
+                "Tool calling has %d tools (%d MCP, %d builtin)",
+                len(toolset.schema),
+                toolset.mcp_count,
+                len(toolset.schema) - toolset.mcp_count,
             )
 
+    def _spawn(self, coro: Awaitable[Any]) -> None:
+        """Run a background tool task that :meth:`stop_tools` cancels."""
+        task = asyncio.ensure_future(coro)
+        self._tool_tasks.add(task)
+        task.add_done_callback(self._tool_tasks.discard)
+
+    async def start_tools(self) -> None:
+        """Load MCP tools on the running loop.
+
+        Schemas cached on disk for each server (keyed by a fingerprint of its
+        spec) are served immediately while discovery refreshes them in the
+        background; without any cached schema, startup waits for discovery.
+        Sessions opened here stay on this loop and are reused by tool calls.
+        Afterwards servers are re-listed every ``llm.mcp_refresh_interval``
+        seconds, in addition to refreshes triggered by list-changed
+        notifications.
+        """
+        client = self.mcp_client
+        if client is None:
+            return
+        if self.schema_cache is not None:
+            for server in client.servers:
+                cached = await self.schema_cache.load(client.fingerprint(server))
+                if cached is not None:
+                    client.register(server, cached)
+        if client.schema():
+            self.logger.info("Serving %d cached MCP tool(s) while discovery runs", len(client.schema()))
+            self._apply_mcp_tools()
+            self._spawn(self.refresh_tools())
+        else:
+            await self.refresh_tools()
+            if not client.schema():
+                await client.aclose()
+                self.mcp_client = None
+                return
+        interval = float(getattr(self.cfg.llm, "mcp_refresh_interval", 0) or 0)
+        if interval > 0:
+            self._spawn(self._poll_tools(interval))
+
+    async def refresh_tools(self, servers: Optional[Iterable[str]] = None) -> bool:
+        """Re-list MCP tools and swap in a new tool set if any changed.
+
+        Changed server schemas are also written to the on-disk cache.
+
+        Args:
+            servers: Optional subset of server names; defaults to all.
+
+        Returns:
+            True when at least one server's tools changed.
+        """
+        client = self.mcp_client
+        if client is None:
+            return False
+        timeout = float(getattr(self.cfg.llm, "mcp_discovery_timeout", 0) or 0) or None
+        try:
+            changed = await client.arefresh(servers, timeout)
+        except Exception:
+            self.logger.exception("Failed to list MCP tools")
+            return False
+        if not changed:
+            return False
+        if self.schema_cache is not None:
+            for server in changed:
+                await self.schema_cache.save(client.fingerprint(server), client.server_schema(server))
+        self.logger.info("MCP tools changed on: %s", ", ".join(changed))
+        self._apply_mcp_tools()
+        return True
+
+    def _on_tools_changed(self, server: str) -> None:
+        """Refresh one server after a list-changed notification, once at a time."""
+        if server in self._refreshing:
+            return
+        self._refreshing.add(server)
+
+        async def _refresh() -> None:
+            try:
+                await self.refresh_tools([server])
+            finally:
+                self._refreshing.discard(server)
+
+        self._spawn(_refresh())
+
+    async def _poll_tools(self, interval: float) -> None:
+        """Periodically refresh MCP tools for servers without notifications."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh_tools()
+            except Exception:
+                self.logger.debug("MCP tool refresh failed", exc_info=True)
+
+    def _apply_mcp_tools(self) -> None:
+        """Merge the MCP client's registered tools into the tool set."""
+        if self.mcp_client is None:
+            return
+        self._set_tools(self.mcp_client.schema())
+
+    async def stop_tools(self) -> None:
+        """Cancel background discovery/refresh tasks and close MCP sessions."""
+        tasks = list(self._tool_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.mcp_client is not None:
+            await self.mcp_client.aclose()
+
     def _should_apply_options(self, model: str) -> bool:
         """Decide whether to apply generic LLM options to a model.
 
@@ -147,8 +304,12 @@ class AppContext:
         Returns:
             True if generic options should be applied, False otherwise.
         """
-        google_models = self.cfg.llm.models.get("google", [])
-        return model not in google_models and model != "grok-4" and not model.startswith("gpt-5-")
+        return self.registry.resolve(model).apply_options
+
+    @property
+    def registry(self) -> ModelRegistry:
+        """Return the current model registry for the configured providers."""
+        return registry_for(self.cfg.llm)
 
     async def to_thread(self, fn, *args, **kwargs) -> Any:
         """Run a callable on the thread pool executor.
@@ -176,14 +337,42 @@ class AppContext:
         """
         if not self.cfg.markdown:
             return None
-        try:
-            import markdown as _md
-            return _md.markdown(body, extensions=["extra", "fenced_code", "nl2br", "sane_lists", "tables", "codehilite"])
-        except Exception:
+        return self.renderer.render(body)
+
+    async def render_async(self, body: str) -> Optional[str]:
+        """Render text to HTML like :meth:`render`, off the loop for large bodies.
+
+        Args:
+            body: The input text to render.
+
+        Returns:
+            The rendered HTML string, or None when markdown is disabled or
+            rendering fails.
+        """
+        if not self.cfg.markdown:
             return None
+        return await self.renderer.render_async(body, self.executor)
+
+    async def _chat(self, data: Dict[str, Any], on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Send a chat request, streaming when a delta callback is given.
+
+        Args:
+            data: OpenAI-compatible request payload.
+            on_delta: Optional async callback for streamed content.
+
+        Returns:
+            The chat.completions-shaped response.
+        """
+        if on_delta is not None and hasattr(self.llm, "chat_stream"):
+            return await self.llm.chat_stream(data, on_delta=on_delta)
+        return await self.llm.chat(data)
+
+    async def _execute_tool_async(self, name: str, arguments: Dict[str, Any]) -> str:
+        """Execute a tool without blocking the event loop.
 
-    def _execute_tool(self, name: str, arguments: Dict[str, Any]) -> str:
-        """Execute a tool by name using either MCP or builtin registry.
+        MCP calls and builtin async tools are awaited on the loop (over
+        persistent MCP sessions and the shared tool HTTP client); sync
+        builtin tools run on the executor.
 
         Args:
             name: Tool function name.
@@ -192,24 +381,123 @@ class AppContext:
         Returns:
             The tool's stringified result payload.
         """
+        if self.mcp_client is not None and name in self._mcp_tool_names:
+            self.logger.info("Tool (MCP): %s args=%s", name, _preview_args(arguments))
+            return await self.mcp_client.acall_tool(name, arguments)
+        return await execute_tool_async(name, arguments, self.executor)
+
+    async def _run_tool_call(
+        self,
+        call: Dict[str, Any],
+        slots: asyncio.Semaphore,
+        memo: Optional[Dict[Any, Any]] = None,
+    ) -> str:
+        """Parse and execute one tool call under a concurrency slot and timeout.
+
+        Results go through the tool result cache, so cacheable calls may be
+        answered without executing the tool.
+
+        Args:
+            call: A ``tool_calls`` entry from the model response.
+            slots: Semaphore bounding concurrent calls in the turn.
+            memo: Per-tool-loop memo shared by identical calls.
+
+        Returns:
+            The tool's stringified result payload, or a JSON error.
+        """
+        func = (call.get("function") or {})
+        name = func.get("name") or ""
+        raw_args = func.get("arguments")
         try:
-            _args_str = json.dumps(arguments or {}, ensure_ascii=False, default=str)
+            args = json.loads(raw_args) if isinstance(raw_args, str) and raw_args.strip() else (raw_args or {})
         except Exception:
-            _args_str = str(arguments)
-        if len(_args_str) > 800:
-            _args_str = _args_str[:800] + "…"
-        if self.mcp_client is not None and name in self._mcp_tool_names:
-            self.logger.info("Tool (MCP): %s args=%s", name, _args_str)
-            return self.mcp_client.call_tool(name, arguments)
-        self.logger.info("Tool (builtin): %s args=%s", name, _args_str)
-        return execute_tool(name, arguments)
+            self.logger.exception("Failed to parse tool arguments for '%s'", name)
+            args = {}
+        timeout = float(getattr(self.cfg.llm, "tool_timeout", 0) or 0) or None
+        self._tool_uses[name] += 1
+        async with slots:
+            try:
+                run = self.tool_cache.run(name, args, lambda: self._execute_tool_async(name, args), memo)
+                return await asyncio.wait_for(run, timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning("Tool '%s' timed out after %.0fs", name, timeout)
+                return json.dumps({"error": f"Tool {name} timed out after {timeout:.0f}s"}, ensure_ascii=False)
+            except Exception as e:
+                self.logger.exception("Tool execution error for '%s'", name)
+                return json.dumps({"error": f"Tool execution error for {name}: {e}"}, ensure_ascii=False)
+
+    async def _run_tool_calls(self, tool_calls: List[Dict[str, Any]], memo: Optional[Dict[Any, Any]] = None) -> List[str]:
+        """Execute one turn's tool calls concurrently, returning results in call order.
+
+        At most ``llm.tool_concurrency`` calls run at once and each is
+        bounded by ``llm.tool_timeout``.
+
+        Args:
+            tool_calls: ``tool_calls`` entries from one model response.
+            memo: Per-tool-loop memo shared by identical calls.
+
+        Returns:
+            Tool results aligned with ``tool_calls``.
+        """
+        slots = asyncio.Semaphore(max(1, int(getattr(self.cfg.llm, "tool_concurrency", 4) or 1)))
+        return list(await asyncio.gather(*(self._run_tool_call(call, slots, memo) for call in tool_calls)))
+
+    def _select_tools(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Return the tool definitions to offer for a conversation.
+
+        With ``llm.tool_top_k`` set, tools are ranked against the latest user
+        message and only the top matches plus ``llm.tool_always`` are sent;
+        otherwise the whole schema is. A message matching no tool (e.g. a
+        follow-up like "and tomorrow?") is ranked together with the recent
+        turns instead; if those match nothing either, the most frequently
+        called tools fill the top-k.
+
+        Args:
+            messages: Chat history ending with the current request.
 
-    async def respond_with_tools(self, messages: List[Dict[str, Any]], *, model: Optional[str] = None, room_id: Optional[str] = None, tool_choice: str = "auto") -> str:
+        Returns:
+            Tool definitions, possibly empty.
+        """
+        toolset = self.toolset
+        if toolset is None:
+            return []
+        top_k = int(getattr(self.cfg.llm, "tool_top_k", 0) or 0)
+        if top_k <= 0:
+            return toolset.schema
+        selector = toolset.selector
+        query = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+        if not selector.matches(query):
+            recent = [m for m in messages if m.get("role") in ("user", "assistant") and isinstance(m.get("content"), str)]
+            query = " ".join(m["content"] for m in recent[-_TOOL_QUERY_TURNS:])
+        tools = selector.select(query, top_k, getattr(self.cfg.llm, "tool_always", None) or (), self._tool_uses)
+        self.logger.debug("Offering %d of %d tools", len(tools), len(toolset.schema))
+        return tools
+
+    def _tools_payload(self, model: str, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], tool_choice: str) -> Dict[str, Any]:
+        """Build a chat payload offering ``tools``; tool fields are omitted when empty."""
+        data: Dict[str, Any] = {"model": model, "messages": messages}
+        if tools:
+            data["tools"] = tools
+            data["tool_choice"] = tool_choice
+        if self._should_apply_options(model):
+            data.update(self.options)
+        return data
+
+    async def respond_with_tools(
+        self,
+        messages: List[Dict[str, Any]],
+        *,
+        model: Optional[str] = None,
+        room_id: Optional[str] = None,
+        tool_choice: str = "auto",
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> str:
         """Run a tool-enabled chat loop and return the assistant reply.
 
         Iteratively allows the model to request tool calls, executes them, and
         feeds results back until the model responds without tool calls or a
-        maximum iteration count is reached.
+        maximum iteration count is reached. The offered tools are chosen once
+        per call (see :meth:`_select_tools`).
 
         Side effects: may upload images to Matrix if a tool returns a PNG path
         and a `room_id` is provided.
@@ -219,26 +507,23 @@ class AppContext:
             model: Optional override for the model to use.
             room_id: Matrix room ID for optional image uploads.
             tool_choice: Tool selection policy (e.g., "auto").
+            on_delta: Optional async callback; when set, each model turn is
+                streamed and the callback receives the text so far.
 
         Returns:
             The assistant's final message content (empty string on error).
         """
         use_model = model or self.model
-        data: Dict[str, Any] = {
-            "model": use_model,
-            "messages": messages,
-            "tools": self.tools_schema,
-            "tool_choice": tool_choice,
-        }
-        if self._should_apply_options(use_model):
-            data.update(self.options)
+        tools = self._select_tools(messages)
+        data = self._tools_payload(use_model, messages, tools, tool_choice)
         try:
-            result = await self.llm.chat(data)
+            result = await self._chat(data, on_delta)
         except Exception:
             self.logger.exception("Initial chat with tools failed")
             return ""
         max_iterations = 8
         iterations = 0
+        memo: Dict[Any, Any] = {}
         while iterations < max_iterations:
             msg = (result.get("choices", [{}])[0].get("message") or {})
             tool_calls = msg.get("tool_calls") or []
@@ -249,16 +534,8 @@ class AppContext:
             except Exception:
                 pass
             messages.append(msg)
-            for call in tool_calls:
-                func = (call.get("function") or {})
-                name = func.get("name") or ""
-                raw_args = func.get("arguments")
-                try:
-                    args = json.loads(raw_args) if isinstance(raw_args, str) and raw_args.strip() else (raw_args or {})
-                except Exception:
-                    self.logger.exception("Failed to parse tool arguments for '%s'", name)
-                    args = {}
-                tool_result = self._execute_tool(name, args)
+            results = await self._run_tool_calls(tool_calls, memo)
+            for call, tool_result in zip(tool_calls, results):
                 # Attempt to detect file-returning tools (.png) and upload
                 try:
                     parsed = json.loads(tool_result)
@@ -281,11 +558,8 @@ class AppContext:
                 tool_msg: Dict[str, Any] = {"role": "tool", "content": str(tool_result), "tool_call_id": call["id"]}
                 messages.append(tool_msg)
             try:
-                data = {"model": use_model, "messages": messages, "tools": self.tools_schema, "tool_choice": tool_choice}
-                if self._should_apply_options(use_model):
-                    data.update(self.options)
-                
-                result = await self.llm.chat(data)
+                data = self._tools_payload(use_model, messages, tools, tool_choice)
+                result = await self._chat(data, on_delta)
             except Exception:
                 self.logger.exception("Follow-up chat with tools failed")
                 return ""
@@ -294,11 +568,7 @@ class AppContext:
         content = (final_msg.get("content") or "").strip()
         messages.append({"role": "assistant", "content": content})
         messages[:] = [m for m in messages if m.get("role") != "tool" and not m.get("tool_calls")]
-        if len(messages) > self.cfg.llm.history_size:
-            if messages and messages[0].get("role") == "system":
-                messages.pop(1)
-            else:
-                messages.pop(0)
+        trim_messages(messages, self.cfg.llm.history_size, self.history.budget_for(use_model), self.history.estimator)
         return content
 
 
@@ -317,6 +587,7 @@ async def run(cfg: AppConfig, config_path: Optional[str] = None) -> None:
         None. Completes when the sync loop ends or the process is stopped.
     """
     ctx = AppContext(cfg)
+    await ctx.start_tools()
 
     router = Router()
     router.register(".ai", handle_ai)
@@ -335,6 +606,7 @@ async def run(cfg: AppConfig, config_path: Optional[str] = None) -> None:
         pass
     router.register(".model", handle_model, admin=True)
     router.register(".clear", handle_clear, admin=True)
+    router.register(".usage", handle_usage, admin=True)
 
     ctx.log(f"Model set to {ctx.model}")
 
@@ -382,16 +654,25 @@ async def run(cfg: AppConfig, config_path: Optional[str] = None) -> None:
         if KeyVerificationEvent:
             ctx.matrix.add_to_device_callback(security.emoji_verification_callback, (KeyVerificationEvent,))
         ctx.matrix.add_to_device_callback(security.log_to_device_event, None)
+        ctx.matrix.add_sync_callback(security.on_sync)
     except Exception:
         pass
 
     join_time = _dt.datetime.now()
+    join_ms = join_time.timestamp() * 1000.0
+    dispatcher = Dispatcher(
+        max_workers=getattr(cfg.matrix, "max_workers", 8),
+        max_pending=getattr(cfg.matrix, "max_pending", 256),
+    )
 
     async def on_text(room, event) -> None:
         """Handle text messages arriving from Matrix rooms.
 
-        Ignores messages sent before the bot joined, messages from the bot
-        itself, and dispatches commands based on the registered router.
+        Drops anything that is not a registered command or bot mention,
+        messages sent before the bot joined and messages from the bot
+        itself using string and number checks only, then queues the message
+        on the dispatcher so the sync loop is never blocked by a handler.
+        Messages from one user in one room are handled in order.
 
         Args:
             room: The Matrix room object.
@@ -401,16 +682,35 @@ async def run(cfg: AppConfig, config_path: Optional[str] = None) -> None:
             None.
         """
         try:
-            message_time = getattr(event, "server_timestamp", 0) / 1000.0
-            message_time = _dt.datetime.fromtimestamp(message_time)
-            if message_time <= join_time:
+            text = getattr(event, "body", "") or ""
+            cmd = router.match(text, ctx.bot_id)
+            if cmd is None:
+                return
+            timestamp = getattr(event, "server_timestamp", 0)
+            if timestamp <= join_ms:
                 return
-            text = getattr(event, "body", "")
             sender = getattr(event, "sender", "")
             if sender == cfg.matrix.username:
                 return
-            sender_display = await ctx.matrix.display_name(sender)
-            is_admin = sender_display in ctx.admins or sender in ctx.admins
+            message_time = _dt.datetime.fromtimestamp(timestamp / 1000.0)
+            dispatcher.submit((room.room_id, sender), lambda: handle_text(room, sender, text, cmd, message_time))
+        except Exception as e:
+            ctx.log(e)
+
+    async def handle_text(room, sender: str, text: str, cmd: str, message_time) -> None:
+        """Route one queued message and run its handler.
+
+        Args:
+            room: The Matrix room object.
+            sender: Matrix user ID of the sender.
+            text: Message body.
+            cmd: Command token matched by the pre-filter.
+            message_time: Server timestamp of the message.
+        """
+        try:
+            sender_display = await ctx.matrix.display_name(sender, room.room_id)
+            # Admin status only matters for admin-only commands
+            is_admin = router.requires_admin(cmd) and (sender_display in ctx.admins or sender in ctx.admins)
             handler, args = router.dispatch(ctx, room.room_id, sender, sender_display, text, is_admin, bot_name=ctx.bot_id, timestamp=message_time)  # type: ignore
             if handler is None:
                 return
@@ -422,9 +722,10 @@ async def run(cfg: AppConfig, config_path: Optional[str] = None) -> None:
                 await security.allow_devices(sender)
             except Exception:
                 pass
-            res = handler(*args)
-            if asyncio.iscoroutine(res):
-                await res
+            with request_scope(room.room_id, sender):
+                res = handler(*args)
+                if asyncio.iscoroutine(res):
+                    await res
         except Exception as e:
             ctx.log(e)
 
@@ -451,14 +752,26 @@ async def run(cfg: AppConfig, config_path: Optional[str] = None) -> None:
         for t in (sync_task, stop_task):
             if not t.done():
                 t.cancel()
+        try:
+            await dispatcher.aclose()
+        except Exception:
+            pass
         try:
             if hasattr(ctx.matrix, "shutdown"):
                 await ctx.matrix.shutdown()
         except Exception:
             pass
         try:
-            if getattr(ctx, "mcp_client", None) and hasattr(ctx.mcp_client, "close"):
-                ctx.mcp_client.close()
+            if hasattr(ctx.llm, "aclose"):
+                await ctx.llm.aclose()
+        except Exception:
+            pass
+        try:
+            await tools_http.aclose()
+        except Exception:
+            ctx.logger.debug("Failed to close tool HTTP client", exc_info=True)
+        try:
+            await ctx.stop_tools()
         except Exception:
             pass
         try:
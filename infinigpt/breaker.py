@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_BREAKER: Dict[str, Any] = {
+    # Rolling window of recent outcomes used for the error rate
+    "window": 20,
+    "min_requests": 5,
+    "failure_rate": 0.5,
+    # Consecutive failures open the circuit without waiting for the window
+    "consecutive_failures": 3,
+    # Calls waiting longer than this many seconds for response headers count
+    # as failures (0 disables)
+    "slow_call_seconds": 60,
+    "open_seconds": 30,
+}
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Return True when an error reflects provider health.
+
+    Transport errors, timeouts, HTTP 5xx and exhausted 429s count; client
+    errors such as 400/401 do not.
+    """
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status >= 500 or status == 429
+    return False
+
+
+class CircuitBreaker:
+    """Error-rate and latency circuit breaker for one provider.
+
+    Closed: requests flow and outcomes are recorded. Open: requests are
+    rejected immediately for ``open_seconds``. Half-open: one probe request
+    is let through; success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name: str, settings: Optional[Mapping[str, Any]] = None) -> None:
+        """Create a closed breaker.
+
+        Args:
+            name: Provider name, used in logs.
+            settings: Overrides for :data:`DEFAULT_BREAKER`.
+        """
+        opts = dict(DEFAULT_BREAKER)
+        opts.update(settings or {})
+        self.name = name
+        self.min_requests = int(opts["min_requests"])
+        self.failure_rate = float(opts["failure_rate"])
+        self.consecutive_limit = int(opts["consecutive_failures"])
+        self.slow_call_seconds = float(opts["slow_call_seconds"] or 0)
+        self.open_seconds = float(opts["open_seconds"])
+        self._outcomes: Deque[bool] = deque(maxlen=max(1, int(opts["window"])))
+        self._consecutive = 0
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("Circuit for %s half-open; probing", self.name)
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: float) -> None:
+        """Record a completed request and its time to response headers in seconds."""
+        if self.slow_call_seconds and latency > self.slow_call_seconds:
+            self.record_failure()
+            return
+        if self.state == HALF_OPEN:
+            logger.info("Circuit for %s closed", self.name)
+            self.state = CLOSED
+            self._outcomes.clear()
+        self._probe_in_flight = False
+        self._consecutive = 0
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit when thresholds trip."""
+        self._probe_in_flight = False
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self._consecutive += 1
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if self._consecutive >= self.consecutive_limit or (
+            len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.failure_rate
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """Release a half-open probe slot without recording an outcome."""
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        """Transition to open and start the cool-down timer."""
+        if self.state != OPEN:
+            logger.warning("Circuit for %s opened for %.0fs", self.name, self.open_seconds)
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._consecutive = 0
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU mapping with optional per-entry time-to-live.
+
+    Not thread-safe; intended for use from the event loop thread.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None) -> None:
+        """Create an empty cache.
+
+        Args:
+            max_entries: Maximum number of entries before LRU eviction.
+            ttl: Default time-to-live in seconds; None means no expiry.
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a live value and mark it most recently used.
+
+        Args:
+            key: Cache key.
+            default: Value returned on a miss or expired entry.
+
+        Returns:
+            The cached value or ``default``.
+        """
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries when full.
+
+        Args:
+            key: Cache key.
+            value: Value to store.
+            ttl: Optional TTL override in seconds for this entry.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return an entry regardless of expiry."""
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._data.clear()
+
+    def keys(self) -> Iterable[Hashable]:
+        """Return a snapshot of the stored keys (live or expired)."""
+        return list(self._data.keys())
+
+
+def stable_hash(value: Any) -> str:
+    """Return a SHA-256 hex digest of a JSON-serializable value.
+
+    Dict keys are sorted so logically equal payloads hash identically.
+    """
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def request_key(payload: Dict[str, Any]) -> str:
+    """Return the cache key for a chat request payload.
+
+    Covers model, messages, tools and options; transport-only fields such as
+    ``stream`` are ignored. A tool list carrying an ``etag`` (see
+    :class:`infinigpt.tool_select.ToolSchema`) contributes that hash instead of
+    being re-serialized.
+    """
+    data = {k: v for k, v in payload.items() if k not in ("stream", "stream_options")}
+    etag = getattr(data.get("tools"), "etag", None)
+    if etag is not None:
+        data["tools"] = {"etag": etag}
+    return stable_hash(data)
+
+
+class ResponseCache:
+    """Exact-match cache for chat completions with memory and disk tiers.
+
+    The memory tier is an LRU with TTL; the optional disk tier stores one JSON
+    file per key under ``path`` so entries survive restarts. The disk tier
+    is pruned on the first write and periodically after: expired files are
+    removed and the oldest are dropped beyond ``max_entries``. Disk I/O runs
+    in a worker thread.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, path: str = "") -> None:
+        """Create the cache.
+
+        Args:
+            max_entries: Maximum entries in each tier.
+            ttl: Entry lifetime in seconds for both tiers.
+            path: Optional directory for the on-disk tier; empty disables it.
+        """
+        self.ttl = float(ttl)
+        self.memory = TTLCache(max_entries, ttl=self.ttl)
+        self.max_entries = max(1, int(max_entries))
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        # Writes left before the disk tier is pruned again; 0 prunes on the first
+        self._prune_in = 0
+
+    def _file(self, key: str) -> Path:
+        """Return the disk-tier file path for a key."""
+        assert self.path is not None
+        return self.path / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        """Load a non-expired entry from disk, deleting stale files."""
+        p = self._file(key)
+        try:
+            entry = json.loads(p.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.debug("Unreadable response cache file %s", p, exc_info=True)
+            return None
+        if float(entry.get("expires", 0)) <= time.time():
+            try:
+                p.unlink()
+            except OSError:
+                pass
+            return None
+        return entry.get("response")
+
+    def _write_disk(self, key: str, response: Dict[str, Any]) -> None:
+        """Atomically write an entry to disk."""
+        assert self.path is not None
+        self.path.mkdir(parents=True, exist_ok=True)
+        p = self._file(key)
+        _atomic_write(p, json.dumps({"expires": time.time() + self.ttl, "response": response}, ensure_ascii=False))
+        if self._prune_in <= 0:
+            self._prune_disk()
+            self._prune_in = max(1, self.max_entries // 8)
+        self._prune_in -= 1
+
+    def _prune_disk(self) -> None:
+        """Delete expired disk entries, then the oldest beyond ``max_entries``.
+
+        Age is taken from file modification times, which are set when an
+        entry is written, so no file needs to be parsed. Files may be
+        replaced or removed by concurrent writers meanwhile: a file is only
+        deleted if it still has the modification time that was judged.
+        """
+        assert self.path is not None
+        now = time.time()
+        live: List[Tuple[float, str]] = []
+        stale: List[Tuple[float, str]] = []
+        try:
+            with os.scandir(self.path) as it:
+                for e in it:
+                    try:
+                        mtime = e.stat().st_mtime
+                    except FileNotFoundError:
+                        continue
+                    if e.name.endswith(".json") and mtime + self.ttl > now:
+                        live.append((mtime, e.path))
+                    elif e.name.endswith(".json") or (e.name.endswith(".tmp") and mtime + 60 <= now):
+                        stale.append((mtime, e.path))
+        except FileNotFoundError:
+            return
+        live.sort()
+        for mtime, p in stale + live[: max(0, len(live) - self.max_entries)]:
+            try:
+                if os.stat(p).st_mtime == mtime:
+                    _unlink(p)
+            except FileNotFoundError:
+                pass
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a cached response, or None on a miss."""
+        value = self.memory.get(key)
+        if value is None and self.path is not None:
+            try:
+                value = await asyncio.to_thread(self._read_disk, key)
+            except Exception:
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response in both tiers."""
+        value = copy.deepcopy(response)
+        self.memory.set(key, value)
+        if self.path is not None:
+            try:
+                await asyncio.to_thread(self._write_disk, key, value)
+            except Exception:
+                logger.debug("Failed to write response cache entry", exc_info=True)
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Write a file via a writer-unique temp file and an atomic rename.
+
+    Readers see either the old or the new content, never a partial file,
+    and concurrent writers of the same path do not share a temp file.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink(str(tmp))
+        raise
+
+
+def _unlink(path: str) -> None:
+    """Delete a file, ignoring errors (it may already be gone)."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class SchemaCache:
+    """On-disk cache of MCP tool schemas, one JSON file per server fingerprint.
+
+    Lets a restart serve the last known tool list while discovery refreshes
+    in the background. Entries never expire; a changed server spec yields a
+    new fingerprint and therefore a miss.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Create the cache.
+
+        Args:
+            path: Directory holding the cached schema files.
+        """
+        self.path = Path(path)
+
+    def _file(self, fingerprint: str) -> Path:
+        """Return the file path for a fingerprint."""
+        return self.path / f"{fingerprint}.json"
+
+    def _read(self, fingerprint: str) -> Optional[List[Dict[str, Any]]]:
+        """Load a cached schema list, or None when missing or unreadable."""
+        p = self._file(fingerprint)
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.debug("Unreadable MCP schema cache file %s", p, exc_info=True)
+            return None
+        return data if isinstance(data, list) else None
+
+    def _write(self, fingerprint: str, schema: List[Dict[str, Any]]) -> None:
+        """Atomically write a schema list."""
+        self.path.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self._file(fingerprint), json.dumps(schema, ensure_ascii=False))
+
+    async def load(self, fingerprint: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached schema for a fingerprint, or None."""
+        try:
+            return await asyncio.to_thread(self._read, fingerprint)
+        except Exception:
+            return None
+
+    async def save(self, fingerprint: str, schema: List[Dict[str, Any]]) -> None:
+        """Store the schema for a fingerprint, logging failures."""
+        try:
+            await asyncio.to_thread(self._write, fingerprint, schema)
+        except Exception:
+            logger.debug("Failed to write MCP schema cache entry", exc_info=True)
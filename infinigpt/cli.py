@@ -10,6 +10,7 @@ from typing import List, Optional
 
 from .logging_conf import setup_logging
 from .config import load_config
+from .models import invalidate_registry
 from .app import run as run_app
 
 
@@ -81,6 +82,8 @@ def main(argv: Optional[List[str]] = None) -> int:
             cfg.matrix.e2e = False
         except Exception:
             pass
+    # Overrides edit routing fields in place
+    invalidate_registry(cfg.llm)
     logging.getLogger(__name__).info(
         "Loaded config. Providers: %s; Default model: %s",
         ", ".join([k for k, v in cfg.llm.models.items() if v]),
@@ -22,6 +22,11 @@ class MatrixConfig:
         device_id: Persisted device ID for E2EE.
         store_path: Path for nio store files.
         e2e: Whether to enable end-to-end encryption.
+        max_workers: Maximum command handlers running concurrently.
+        max_pending: Maximum queued plus running commands before new ones
+            are dropped.
+        display_name_ttl: Seconds a display name fetched from the profile
+            API is cached (room member state is used first).
     """
     server: str
     username: str
@@ -33,6 +38,9 @@ class MatrixConfig:
     device_id: str = ""
     store_path: str = "store"
     e2e: bool = True
+    max_workers: int = 8
+    max_pending: int = 256
+    display_name_ttl: float = 3600.0
 
 
 @dataclass
@@ -51,6 +59,64 @@ class LLMConfig:
         lmstudio_url: Host:port for LM Studio OpenAI-compatible API.
         mcp_servers: Mapping of MCP server names to specs.
         timeout: HTTP client timeout in seconds.
+        http2: Negotiate HTTP/2 with providers when the ``h2`` package is
+            installed.
+        max_connections: Connection pool size per provider base URL.
+        max_keepalive_connections: Idle keep-alive connections retained per
+            provider base URL.
+        keepalive_expiry: Seconds an idle pooled connection is kept open.
+        stream: Stream completions and progressively edit the reply message.
+        stream_interval: Minimum seconds between streamed message edits.
+        cache_enabled: Enable the exact-match response cache for
+            deterministic requests.
+        cache_ttl: Response cache entry lifetime in seconds.
+        cache_max_entries: Maximum response cache entries, in memory and
+            on disk.
+        cache_path: Optional directory for the on-disk response cache tier.
+        cache_rooms: Room IDs whose requests are cached even when not
+            deterministic (temperature other than 0).
+        rate_limits: Mapping of provider name or model ID to limits
+            (``concurrency``, ``rpm``, ``tpm``); local backends default to
+            one concurrent request.
+        rate_limit_retries: Times an HTTP 429 response is retried after
+            the provider's requested backoff.
+        fallbacks: Mapping of model ID to an ordered list of fallback model
+            IDs tried when the primary's provider fails or its circuit is
+            open.
+        failover_timeout: Seconds an attempt may wait for response headers
+            while a fallback remains (0 uses ``timeout``); streaming after
+            the headers is not bounded by it.
+        circuit_breaker: Overrides for per-provider circuit breaker
+            thresholds (``window``, ``min_requests``, ``failure_rate``,
+            ``consecutive_failures``, ``slow_call_seconds``,
+            ``open_seconds``).
+        hedging: Opt-in hedged requests: ``models`` maps a primary model ID
+            to the secondary model raced against it when the primary has
+            not answered within its latency-percentile delay; optional
+            ``percentile``, ``default_delay``, ``min_delay``, ``max_delay``,
+            ``min_samples`` and ``max_ratio``.
+        context_budgets: Mapping of model ID to the estimated prompt token
+            budget; the oldest history is dropped to fit it.
+        context_budget: Token budget for models not in ``context_budgets``
+            (0 disables token-based trimming).
+        tool_concurrency: Maximum tool calls from one model turn run at
+            once.
+        tool_timeout: Per-tool-call timeout in seconds (0 disables).
+        mcp_discovery_timeout: Per-server deadline in seconds for MCP tool
+            discovery (0 waits indefinitely).
+        mcp_schema_cache: Directory for cached MCP tool schemas; empty
+            means ``<matrix.store_path>/mcp_tools``.
+        mcp_refresh_interval: Seconds between re-listing MCP tools to pick
+            up changes from servers that do not send list-changed
+            notifications (0 disables polling).
+        mcp_ping_interval: Seconds between health-check pings of open MCP
+            server sessions (0 disables).
+        tool_top_k: Send only this many tools ranked by relevance to the
+            latest user message, plus ``tool_always`` (0 sends every tool).
+        tool_always: Tool names always sent when ``tool_top_k`` is set.
+        tool_cache: Mapping of tool name (builtin or MCP) to a result cache
+            policy, overriding the packaged builtin policies: seconds,
+            ``"forever"``, ``"http"``, ``"turn"`` or ``"never"``.
     """
     models: Dict[str, List[str]]
     api_keys: Dict[str, str]
@@ -63,6 +129,34 @@ class LLMConfig:
     lmstudio_url: str = "localhost:1234"
     mcp_servers: Dict[str, Any] = field(default_factory=dict)
     timeout: int = 180
+    http2: bool = False
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    stream: bool = False
+    stream_interval: float = 1.0
+    cache_enabled: bool = False
+    cache_ttl: int = 3600
+    cache_max_entries: int = 512
+    cache_path: str = ""
+    cache_rooms: List[str] = field(default_factory=list)
+    rate_limits: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    rate_limit_retries: int = 3
+    fallbacks: Dict[str, List[str]] = field(default_factory=dict)
+    failover_timeout: float = 60.0
+    circuit_breaker: Dict[str, Any] = field(default_factory=dict)
+    hedging: Dict[str, Any] = field(default_factory=dict)
+    context_budgets: Dict[str, int] = field(default_factory=dict)
+    context_budget: int = 0
+    tool_concurrency: int = 4
+    tool_timeout: float = 180.0
+    mcp_discovery_timeout: float = 20.0
+    mcp_schema_cache: str = ""
+    mcp_refresh_interval: float = 300.0
+    mcp_ping_interval: float = 60.0
+    tool_top_k: int = 0
+    tool_always: List[str] = field(default_factory=list)
+    tool_cache: Dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass
@@ -119,6 +213,19 @@ def validate_config(cfg: AppConfig) -> Tuple[bool, List[str]]:
             if provider not in cfg.llm.api_keys:
                 errors.append(f"Missing API key for provider '{provider}'")
 
+    # Validate fallback chains reference configured models
+    for model, chain in (cfg.llm.fallbacks or {}).items():
+        if not isinstance(chain, list):
+            errors.append(f"llm.fallbacks['{model}'] must be a list of model IDs")
+            continue
+        for fallback in chain:
+            if fallback not in all_models:
+                errors.append(f"llm.fallbacks['{model}'] references unknown model '{fallback}'")
+
+    for model, secondary in ((cfg.llm.hedging or {}).get("models") or {}).items():
+        if secondary not in all_models:
+            errors.append(f"llm.hedging.models['{model}'] references unknown model '{secondary}'")
+
     # Validate prompt format of two strings when not custom
     if not (isinstance(cfg.llm.prompt, list) and len(cfg.llm.prompt) >= 1):
         errors.append("llm.prompt must be a list with at least one string")
@@ -158,6 +265,34 @@ def load_config(path: Optional[str] = None) -> AppConfig:
         lmstudio_url=llm_raw.get("lmstudio_url", "localhost:1234"),
         mcp_servers=llm_raw.get("mcp_servers", {}),
         timeout=int(llm_raw.get("timeout", 180)),
+        http2=bool(llm_raw.get("http2", False)),
+        max_connections=int(llm_raw.get("max_connections", 100)),
+        max_keepalive_connections=int(llm_raw.get("max_keepalive_connections", 20)),
+        keepalive_expiry=float(llm_raw.get("keepalive_expiry", 30.0)),
+        stream=bool(llm_raw.get("stream", False)),
+        stream_interval=float(llm_raw.get("stream_interval", 1.0)),
+        cache_enabled=bool(llm_raw.get("cache_enabled", False)),
+        cache_ttl=int(llm_raw.get("cache_ttl", 3600)),
+        cache_max_entries=int(llm_raw.get("cache_max_entries", 512)),
+        cache_path=llm_raw.get("cache_path", ""),
+        cache_rooms=[str(r) for r in llm_raw.get("cache_rooms", [])],
+        rate_limits=llm_raw.get("rate_limits", {}),
+        rate_limit_retries=int(llm_raw.get("rate_limit_retries", 3)),
+        fallbacks=llm_raw.get("fallbacks", {}),
+        failover_timeout=float(llm_raw.get("failover_timeout", 60.0)),
+        circuit_breaker=llm_raw.get("circuit_breaker", {}),
+        hedging=llm_raw.get("hedging", {}),
+        context_budgets={str(k): int(v) for k, v in (llm_raw.get("context_budgets") or {}).items()},
+        context_budget=int(llm_raw.get("context_budget", 0)),
+        tool_concurrency=int(llm_raw.get("tool_concurrency", 4)),
+        tool_timeout=float(llm_raw.get("tool_timeout", 180.0)),
+        mcp_discovery_timeout=float(llm_raw.get("mcp_discovery_timeout", 20.0)),
+        mcp_schema_cache=str(llm_raw.get("mcp_schema_cache", "") or ""),
+        mcp_refresh_interval=float(llm_raw.get("mcp_refresh_interval", 300.0)),
+        mcp_ping_interval=float(llm_raw.get("mcp_ping_interval", 60.0)),
+        tool_top_k=int(llm_raw.get("tool_top_k", 0) or 0),
+        tool_always=[str(x) for x in (llm_raw.get("tool_always") or [])],
+        tool_cache=dict(llm_raw.get("tool_cache") or {}),
     )
 
     # admins: prefer list, fallback to legacy single 'admin' string
@@ -176,6 +311,9 @@ def load_config(path: Optional[str] = None) -> AppConfig:
         device_id=matrix_raw.get("device_id", ""),
         store_path=matrix_raw.get("store_path", "store"),
         e2e=bool(matrix_raw.get("e2e", True)),
+        max_workers=int(matrix_raw.get("max_workers", 8)),
+        max_pending=int(matrix_raw.get("max_pending", 256)),
+        display_name_ttl=float(matrix_raw.get("display_name_ttl", 3600)),
     )
 
     cfg = AppConfig(llm=llm, matrix=matrix, markdown=True)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Set
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+class Dispatcher:
+    """Bounded worker pool that keeps per-key ordering.
+
+    Jobs submitted under the same key (a ``(room_id, user_id)`` history
+    thread) run one after another in submission order; jobs under
+    different keys run concurrently, at most ``max_workers`` at a time.
+    Submitting never blocks, so the Matrix sync callback returns at once.
+    """
+
+    def __init__(self, max_workers: int = 8, max_pending: int = 256) -> None:
+        """Create the dispatcher.
+
+        Args:
+            max_workers: Maximum jobs running concurrently.
+            max_pending: Maximum queued plus running jobs; further
+                submissions are dropped with a warning.
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._lanes: Dict[Hashable, Deque[Job]] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self.pending = 0
+
+    def submit(self, key: Hashable, job: Job) -> bool:
+        """Queue a job behind any earlier jobs with the same key.
+
+        Args:
+            key: Ordering key, e.g. ``(room_id, sender_id)``.
+            job: Zero-argument coroutine function to run.
+
+        Returns:
+            True if queued, False if dropped because the queue is full.
+        """
+        if self.pending >= self.max_pending:
+            logger.warning("Dispatcher queue full (%d); dropping job for %s", self.pending, key)
+            return False
+        self.pending += 1
+        lane = self._lanes.get(key)
+        if lane is not None:
+            lane.append(job)
+            return True
+        lane = self._lanes[key] = deque([job])
+        task = asyncio.create_task(self._drain(key, lane))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _drain(self, key: Hashable, lane: Deque[Job]) -> None:
+        """Run a lane's jobs in order, taking a worker slot for each."""
+        try:
+            while lane:
+                try:
+                    async with self._slots:
+                        await lane[0]()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Dispatched job for %s failed", key)
+                finally:
+                    lane.popleft()
+                    self.pending -= 1
+        finally:
+            if self._lanes.get(key) is lane:
+                del self._lanes[key]
+            # Jobs left behind by cancellation are discarded
+            self.pending -= len(lane)
+            lane.clear()
+
+    async def aclose(self, timeout: float = 5.0) -> None:
+        """Wait up to ``timeout`` seconds for running jobs, then cancel the rest."""
+        tasks = list(self._tasks)
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
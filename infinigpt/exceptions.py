@@ -5,3 +5,7 @@ class ConfigError(Exception):
 class ProviderError(Exception):
     """Raised when an LLM provider configuration is invalid."""
 
+
+
+class CircuitOpenError(ProviderError):
+    """Raised when a provider's circuit breaker is open and no fallback is healthy."""
@@ -5,7 +5,14 @@ import json
 import logging
 import os
 import shlex
-from typing import Any, Dict, List
+import threading
+import weakref
+from collections import deque
+from contextlib import nullcontext
+from dataclasses import dataclass, fields, replace
+from typing import Any, Callable, Deque, Dict, Iterable, List, MutableMapping, Optional, Set
+
+from .cache import stable_hash
 
 logger = logging.getLogger(__name__)
 
@@ -14,15 +21,29 @@ class FastMCPClient:
     """Fast, lightweight client for MCP servers via fastmcp library.
 
     Resolves server specs from strings, dicts, or env indirections, and
-    exposes blocking list/call methods that internally manage event loops.
+    keeps one long-lived session per server (stdio processes stay running,
+    HTTP/SSE connections stay open). The async API (``alist_tools``,
+    ``acall_tool``, ``aclose``) runs on the caller's event loop; blocking
+    ``list_tools``/``call_tool``/``close`` are a thin shim for CLI and
+    test use that drives a private background loop.
     """
 
-    def __init__(self, servers: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        servers: Dict[str, Any],
+        ping_interval: float = 60.0,
+        on_tools_changed: Optional[Callable[[str], None]] = None,
+    ) -> None:
         """Create a client configured with one or more MCP servers.
 
         Args:
             servers: Mapping of server name to spec; values may be a URL,
                 a dict spec, or an env var name containing JSON or URL.
+            ping_interval: Seconds between health-check pings of connected
+                sessions; 0 disables the background check.
+            on_tools_changed: Optional callback invoked on the session's loop
+                with the server name when a server sends
+                ``notifications/tools/list_changed``.
         """
         try:
             from fastmcp import Client  # type: ignore
@@ -32,6 +53,7 @@ class FastMCPClient:
         self._Client = Client
         self._servers = dict(servers or {})
         self._tool_servers: Dict[str, str] = {}
+        self._schemas: Dict[str, List[Dict[str, Any]]] = {}
         for name, cfg in list(self._servers.items()):
             if isinstance(cfg, str):
                 if cfg.lower() in os.environ:
@@ -44,7 +66,14 @@ class FastMCPClient:
                     self._servers[name] = cfg
             elif isinstance(cfg, dict):
                 continue
+        self._policies: Dict[str, ServerPolicy] = {}
         for name, spec in list(self._servers.items()):
+            if isinstance(spec, dict):
+                spec = dict(spec)
+                self._policies[name] = ServerPolicy.pop_from(spec)
+                self._servers[name] = spec
+            else:
+                self._policies[name] = ServerPolicy()
             if isinstance(spec, str) and "://" in spec:
                 continue
             if isinstance(spec, dict):
@@ -53,64 +82,158 @@ class FastMCPClient:
                 if isinstance(cmd, str):
                     argv = [cmd] + ([str(a) for a in args] if isinstance(args, (list, tuple)) else [])
                     cmdline = " ".join(shlex.quote(p) for p in argv)
-                    wrapped = {"command": "bash", "args": ["-lc", f"{cmdline} 2>/dev/null"]}
+                    wrapped = {"command": "bash", "args": ["-lc", cmdline]}
+                    for key in ("env", "cwd"):
+                        if spec.get(key):
+                            wrapped[key] = spec[key]
                     self._servers[name] = wrapped
+        self.ping_interval = float(ping_interval or 0)
+        self.on_tools_changed = on_tools_changed
+        # Sessions belong to the loop that opened them: the application loop
+        # for the async API, a private background loop for the sync shim.
+        self._sessions: "MutableMapping[asyncio.AbstractEventLoop, Dict[str, _Session]]" = weakref.WeakKeyDictionary()
+        self._health_tasks: "MutableMapping[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+        self._shim_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shim_thread: Optional[threading.Thread] = None
+        self._shim_lock = threading.Lock()
+
+    def _loop_sessions(self) -> Dict[str, _Session]:
+        """Return the running loop's sessions, creating them on first use."""
+        loop = asyncio.get_running_loop()
+        sessions = self._sessions.get(loop)
+        if sessions is None:
+            sessions = {
+                name: _Session(self._Client, name, spec, self._policies[name], self._tools_changed)
+                for name, spec in self._servers.items()
+            }
+            self._sessions[loop] = sessions
+            if self.ping_interval > 0:
+                self._health_tasks[loop] = loop.create_task(self._health_loop(sessions))
+        return sessions
 
-    async def _list_tools_async(self) -> List[Dict[str, Any]]:
-        """Asynchronously fetch tool schemas from all configured servers."""
-        schema: List[Dict[str, Any]] = []
-        Client = self._Client
-        for name, cfg in self._servers.items():
-            logger.debug("Listing tools from MCP server '%s'", name)
-            client = Client({name: cfg})
+    def _tools_changed(self, server: str) -> None:
+        """Forward a server's tool-list change notification."""
+        logger.info("MCP server '%s' reported a tool list change", server)
+        if self.on_tools_changed is not None:
             try:
-                async with client:
-                    tools = await client.list_tools()
-            except Exception as e:
-                logger.error("Failed to list tools from MCP server '%s': %s", name, e)
-                continue
-            for tool in tools:
-                self._tool_servers[tool.name] = name
-                schema.append({"type": "function", "function": {"name": tool.name, "description": tool.description or "", "parameters": tool.inputSchema or {"type": "object", "properties": {}, "additionalProperties": False}}})
-        return schema
+                self.on_tools_changed(server)
+            except Exception:
+                logger.exception("Tool list change callback failed for MCP server '%s'", server)
 
-    def _run(self, coro):
-        """Run an async coroutine from sync code, safely handling loops."""
+    def stderr_tail(self, server: str) -> List[str]:
+        """Return the last captured stderr lines of a stdio server on this loop."""
         try:
-            asyncio.get_running_loop()
+            session = self._sessions.get(asyncio.get_running_loop(), {}).get(server)
         except RuntimeError:
-            return asyncio.run(coro)
-        result: Dict[str, Any] = {}
+            session = None
+        return list(session.stderr) if session is not None else []
 
-        def runner() -> None:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result["value"] = loop.run_until_complete(coro)
-            except Exception as e:
-                result["exc"] = e
-            finally:
-                loop.close()
+    @property
+    def servers(self) -> List[str]:
+        """Configured server names in config order."""
+        return list(self._servers)
 
-        import threading
+    @property
+    def tool_names(self) -> Set[str]:
+        """Names of all currently registered tools."""
+        return set(self._tool_servers)
 
-        t = threading.Thread(target=runner)
-        t.start()
-        t.join()
-        if "exc" in result:
-            raise result["exc"]
-        return result.get("value")
+    def fingerprint(self, server: str) -> str:
+        """Return a stable hash of a server's resolved spec.
 
-    def list_tools(self) -> List[Dict[str, Any]]:
-        """List tools from all servers, returning OpenAI-style JSON schema."""
-        return self._run(self._list_tools_async())
-
-    async def _call_tool_async(self, server_name: str, spec: Any, name: str, arguments: Dict[str, Any]) -> Any:
-        """Asynchronously call a tool on a specific server and unwrap data."""
-        Client = self._Client
-        client = Client({server_name: spec})
-        async with client:
-            result = await client.call_tool(name, arguments)
+        Used to key cached tool schemas; any change to the spec changes it.
+        """
+        return stable_hash({"name": server, "spec": self._servers.get(server)})
+
+    def register(self, server: str, schema: List[Dict[str, Any]]) -> None:
+        """Set a server's tool schema and route its tool names to it.
+
+        Used both for fresh discovery results and for schemas loaded from
+        the on-disk cache. Later servers win on duplicate tool names.
+        """
+        self._schemas[server] = list(schema)
+        routes: Dict[str, str] = {}
+        for name in self._servers:
+            for tool in self._schemas.get(name, ()):
+                tool_name = f"{(tool.get('function') or {}).get('name') or ''}".strip()
+                if tool_name:
+                    routes[tool_name] = name
+        self._tool_servers = routes
+
+    def server_schema(self, server: str) -> List[Dict[str, Any]]:
+        """Return one server's registered tool schema."""
+        return list(self._schemas.get(server, ()))
+
+    def schema(self) -> List[Dict[str, Any]]:
+        """Return every registered server's tools in config order."""
+        return [tool for name in self._servers for tool in self._schemas.get(name, ())]
+
+    async def _list_server(self, name: str, session: _Session, timeout: Optional[float]) -> Optional[List[Dict[str, Any]]]:
+        """List one server's tools within ``timeout`` seconds, or None on failure."""
+        logger.debug("Listing tools from MCP server '%s'", name)
+        try:
+            tools = await asyncio.wait_for(session.list_tools(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("MCP server '%s' did not list tools within %.0fs", name, timeout)
+            await session.reset()
+            return None
+        except Exception as e:
+            logger.error("Failed to list tools from MCP server '%s': %s", name, e)
+            return None
+        logger.info("MCP server '%s' returned %d tool(s)", name, len(tools))
+        return [
+            {"type": "function", "function": {"name": tool.name, "description": tool.description or "", "parameters": _input_schema(tool) or {"type": "object", "properties": {}, "additionalProperties": False}}}
+            for tool in tools
+        ]
+
+    async def adiscover(self, timeout: Optional[float] = None, servers: Optional[Iterable[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """List tools from servers concurrently and register the results.
+
+        Args:
+            timeout: Per-server deadline in seconds; None waits indefinitely.
+            servers: Optional subset of server names; defaults to all.
+
+        Returns:
+            Mapping of server name to its tool schema for servers that
+            answered in time. Failed servers keep any schema registered
+            earlier (e.g. from the on-disk cache).
+        """
+        sessions = self._loop_sessions()
+        names = [n for n in sessions if servers is None or n in servers]
+        results = await asyncio.gather(*(self._list_server(n, sessions[n], timeout) for n in names))
+        found = {name: schema for name, schema in zip(names, results) if schema is not None}
+        for name, schema in found.items():
+            self.register(name, schema)
+        return found
+
+    async def arefresh(self, servers: Optional[Iterable[str]] = None, timeout: Optional[float] = None) -> List[str]:
+        """Re-list tools and report which servers' schemas changed.
+
+        Schemas are compared by content hash, so an unchanged server costs a
+        single ``tools/list`` round trip and no downstream rebuild.
+
+        Args:
+            servers: Optional subset of server names; defaults to all.
+            timeout: Per-server deadline in seconds.
+
+        Returns:
+            Names of servers whose tool schema changed.
+        """
+        before = {name: stable_hash(schema) for name, schema in self._schemas.items()}
+        found = await self.adiscover(timeout, servers)
+        return [name for name, schema in found.items() if stable_hash(schema) != before.get(name)]
+
+    async def alist_tools(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """List tools from all servers, returning OpenAI-style JSON schema.
+
+        Servers that fail to list in time are logged and skipped.
+        """
+        found = await self.adiscover(timeout)
+        return [tool for name in self._servers for tool in found.get(name, ())]
+
+    async def _call_tool_data(self, server_name: str, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool on a specific server and unwrap its data."""
+        result = await self._loop_sessions()[server_name].call_tool(name, arguments)
         if result.data is not None:
             return result.data
         if result.structured_content is not None:
@@ -122,7 +245,7 @@ class FastMCPClient:
                 texts.append(block.text)
         return {"result": "\n".join(texts)}
 
-    def call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+    async def acall_tool(self, name: str, arguments: Dict[str, Any]) -> str:
         """Call a tool by name and return a JSON string result.
 
         Args:
@@ -135,9 +258,8 @@ class FastMCPClient:
         server_name = self._tool_servers.get(name)
         if server_name is None:
             return json.dumps({"error": f"Unknown tool: {name}"}, ensure_ascii=False)
-        cfg = self._servers.get(server_name)
         try:
-            data = self._run(self._call_tool_async(server_name, cfg, name, arguments))
+            data = await self._call_tool_data(server_name, name, arguments)
         except Exception as e:
             return json.dumps({"error": f"Tool execution error for {name}: {e}"}, ensure_ascii=False)
         try:
@@ -145,8 +267,503 @@ class FastMCPClient:
         except Exception:
             return json.dumps({"result": str(data)}, ensure_ascii=False)
 
+    async def ahealth_check(self) -> Dict[str, bool]:
+        """Ping every server session of the running loop.
+
+        Returns:
+            Mapping of server name to whether it answered. Servers that were
+            never connected report True.
+        """
+        return await self._check(self._loop_sessions())
+
+    @staticmethod
+    async def _check(sessions: Dict[str, _Session]) -> Dict[str, bool]:
+        """Ping sessions concurrently, dropping dead ones."""
+        names = list(sessions)
+        results = await asyncio.gather(*(sessions[n].ping() for n in names))
+        for name, ok in zip(names, results):
+            if not ok:
+                logger.warning("MCP server '%s' failed its health check; reconnecting on next use", name)
+        return dict(zip(names, results))
+
+    async def _health_loop(self, sessions: Dict[str, _Session]) -> None:
+        """Periodically ping sessions so stale connections are replaced early."""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                await self._check(sessions)
+            except Exception:
+                logger.debug("MCP health check failed", exc_info=True)
+
+    async def aclose(self) -> None:
+        """Close the running loop's sessions (stopping stdio servers)."""
+        loop = asyncio.get_running_loop()
+        task = self._health_tasks.pop(loop, None)
+        if task is not None:
+            task.cancel()
+        sessions = self._sessions.pop(loop, {})
+        await asyncio.gather(*(s.aclose() for s in sessions.values()), return_exceptions=True)
+
+    # Sync shim for CLI and test use; the bot itself uses the async API.
+
+    def _run(self, coro):
+        """Run a coroutine on the private shim loop and wait for its result."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coro.close()
+            raise RuntimeError("FastMCPClient sync methods cannot be used inside an event loop; use the async API")
+        with self._shim_lock:
+            if self._shim_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="infinigpt-mcp", daemon=True)
+                thread.start()
+                self._shim_loop, self._shim_thread = loop, thread
+            loop = self._shim_loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def list_tools(self) -> List[Dict[str, Any]]:
+        """Blocking :meth:`alist_tools`."""
+        return self._run(self.alist_tools())
+
+    def call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        """Blocking :meth:`acall_tool`."""
+        return self._run(self.acall_tool(name, arguments))
+
+    def health_check(self) -> Dict[str, bool]:
+        """Blocking :meth:`ahealth_check`."""
+        return self._run(self.ahealth_check())
+
     def close(self) -> None:
-        """No-op close for symmetry; kept for future compatibility."""
-        return None
+        """Close the sync shim's sessions and stop its loop."""
+        with self._shim_lock:
+            loop, thread = self._shim_loop, self._shim_thread
+            self._shim_loop = self._shim_thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=10)
+        except Exception:
+            logger.debug("Failed to close MCP sessions cleanly", exc_info=True)
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+        loop.close()
+
+
+@dataclass(frozen=True)
+class ServerPolicy:
+    """Per-server limits and supervision settings.
+
+    Read from optional keys of a dict server spec in ``llm.mcp_servers``;
+    the keys are removed before the spec is handed to fastmcp.
+
+    Attributes:
+        max_in_flight: Concurrent calls allowed to the server (0 = no cap).
+        timeout: Seconds a call may take, including waiting for a slot
+            (0 disables).
+        connect_timeout: Seconds allowed for starting/connecting to the
+            server and the MCP handshake (0 disables).
+        restart: ``"always"`` restarts a failed server in the background,
+            ``"lazy"`` reconnects on its next use, ``"never"`` leaves it down.
+        restart_backoff: Initial delay in seconds before a restart; doubles
+            with each consecutive failure.
+        restart_backoff_max: Upper bound for the restart delay.
+        stderr_lines: Stderr lines kept per stdio server for diagnostics.
+    """
+    max_in_flight: int = 8
+    timeout: float = 60.0
+    connect_timeout: float = 30.0
+    restart: str = "always"
+    restart_backoff: float = 1.0
+    restart_backoff_max: float = 60.0
+    stderr_lines: int = 50
+
+    @classmethod
+    def pop_from(cls, spec: Dict[str, Any]) -> "ServerPolicy":
+        """Remove policy keys from a dict spec and build a policy from them."""
+        values: Dict[str, Any] = {}
+        for f in fields(cls):
+            if f.name in spec:
+                raw = spec.pop(f.name)
+                try:
+                    values[f.name] = type(f.default)(raw)
+                except (TypeError, ValueError):
+                    logger.warning("Ignoring invalid MCP server setting %s=%r", f.name, raw)
+        policy = cls(**values)
+        if policy.restart not in ("always", "lazy", "never"):
+            logger.warning("Unknown MCP restart policy %r; using 'always'", policy.restart)
+            policy = replace(policy, restart="always")
+        return policy
+
+
+class _Session:
+    """Supervised long-lived connection to one MCP server.
+
+    Connects lazily, keeps stdio processes and HTTP/SSE connections open
+    across calls, caps in-flight calls and bounds each with a timeout. After
+    a transport failure the session backs off exponentially and, depending
+    on the restart policy, reconnects in the background or on next use.
+    Stdio servers' stderr is kept in a ring buffer. Must be used from a
+    single event loop.
+    """
+
+    def __init__(
+        self,
+        client_factory: Any,
+        name: str,
+        spec: Any,
+        policy: Optional[ServerPolicy] = None,
+        on_tools_changed: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """Create an unconnected session.
+
+        Args:
+            client_factory: ``fastmcp.Client`` (or a compatible factory).
+            name: Server name.
+            spec: Resolved server spec.
+            policy: Limits and restart policy; defaults apply when omitted.
+            on_tools_changed: Called with the server name when the server
+                announces a tool list change.
+        """
+        self._factory = client_factory
+        self.name = name
+        self.spec = spec
+        self.policy = policy or ServerPolicy()
+        self._on_tools_changed = on_tools_changed
+        self._client: Any = None
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.policy.max_in_flight) if self.policy.max_in_flight > 0 else None
+        self.stderr: Deque[str] = deque(maxlen=max(1, self.policy.stderr_lines))
+        self._stderr_r: Optional[int] = None
+        self._stderr_w: Any = None
+        self._stderr_partial = b""
+        self.failures = 0
+        self._retry_at = 0.0
+        self._down = False
+        self._closed = False
+        self._restart_task: Optional[asyncio.Task] = None
+        self._probe: Optional[asyncio.Task] = None
+        self._connecting: Optional[asyncio.Task] = None
+
+    def _alive(self) -> bool:
+        """Return whether the current connection is usable."""
+        client = self._client
+        if client is None:
+            return False
+        is_connected = getattr(client, "is_connected", None)
+        return bool(is_connected()) if callable(is_connected) else True
+
+    def _stderr_sink(self) -> Any:
+        """Return the write end of this session's stderr pipe, creating it once."""
+        if self._stderr_w is None:
+            loop = asyncio.get_running_loop()
+            r, w = os.pipe()
+            try:
+                os.set_blocking(r, False)
+                loop.add_reader(r, self._drain_stderr)
+                self._stderr_r = r
+            except (NotImplementedError, OSError):
+                # No add_reader for pipes (e.g. the Windows Proactor loop):
+                # read on a daemon thread that ends at EOF and closes ``r``
+                os.set_blocking(r, True)
+                threading.Thread(target=self._pump_stderr, args=(r, loop), name=f"mcp-stderr-{self.name}", daemon=True).start()
+            self._stderr_w = os.fdopen(w, "w")
+        return self._stderr_w
+
+    def _pump_stderr(self, fd: int, loop: asyncio.AbstractEventLoop) -> None:
+        """Blocking stderr reader for loops without ``add_reader`` support."""
+        try:
+            while True:
+                data = os.read(fd, 65536)
+                if not data:
+                    return
+                loop.call_soon_threadsafe(self._feed_stderr, data)
+        except (OSError, RuntimeError):
+            # Pipe closed or loop already closed
+            return
+        finally:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _drain_stderr(self) -> None:
+        """Read what is available on the stderr pipe into the ring buffer."""
+        try:
+            data = os.read(self._stderr_r, 65536)  # type: ignore[arg-type]
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            asyncio.get_running_loop().remove_reader(self._stderr_r)  # type: ignore[arg-type]
+            return
+        self._feed_stderr(data)
+
+    def _feed_stderr(self, data: bytes) -> None:
+        """Move complete stderr lines into the ring buffer."""
+        *lines, self._stderr_partial = (self._stderr_partial + data).split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8", errors="replace").rstrip()
+            if text:
+                self.stderr.append(text)
+                logger.debug("[mcp:%s] %s", self.name, text)
+
+    def _close_stderr(self) -> None:
+        """Stop reading stderr and close the pipe ends this session owns."""
+        if self._stderr_w is None:
+            return
+        closers = [self._stderr_w.close]
+        if self._stderr_r is not None:
+            r = self._stderr_r
+            try:
+                asyncio.get_running_loop().remove_reader(r)
+            except Exception:
+                pass
+            closers.append(lambda: os.close(r))
+        for close in closers:
+            try:
+                close()
+            except OSError:
+                pass
+        self._stderr_r = self._stderr_w = None
+
+    def _make_client(self) -> Any:
+        """Build a client; stdio servers get their stderr piped to the ring buffer."""
+        spec = self.spec
+        if isinstance(spec, dict) and isinstance(spec.get("command"), str):
+            from fastmcp.client.transports import StdioTransport  # type: ignore
+
+            transport = StdioTransport(
+                command=spec["command"],
+                args=list(spec.get("args") or []),
+                env=spec.get("env") or None,
+                cwd=spec.get("cwd"),
+                keep_alive=False,
+                log_file=self._stderr_sink(),
+            )
+            return self._factory(transport, message_handler=self._on_message)
+        return self._factory({self.name: spec}, message_handler=self._on_message)
+
+    async def _connect(self) -> Any:
+        """Return a connected client, (re)connecting if allowed by the policy.
+
+        Callers share one connection attempt, which runs as its own task
+        under ``connect_timeout``; a caller giving up (e.g. on its call
+        timeout) does not cancel the attempt, so its outcome is always
+        recorded.
+        """
+        if self._alive():
+            return self._client
+        if self._closed:
+            raise RuntimeError(f"MCP server '{self.name}' is closed")
+        if self._down:
+            raise RuntimeError(f"MCP server '{self.name}' is down (restart policy 'never')")
+        wait = self._retry_at - asyncio.get_running_loop().time()
+        if wait > 0:
+            raise RuntimeError(f"MCP server '{self.name}' is restarting; retry in {wait:.0f}s")
+        if self._connecting is None or self._connecting.done():
+            self._connecting = asyncio.get_running_loop().create_task(self._open())
+            # Retrieve the outcome even when every waiter has given up
+            self._connecting.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(self._connecting)
+
+    async def _open(self) -> Any:
+        """Open a new connection, recording a failure if it does not come up."""
+        async with self._lock:
+            if self._alive():
+                return self._client
+            if self._closed:
+                raise RuntimeError(f"MCP server '{self.name}' is closed")
+            if self._client is not None:
+                await self._disconnect()
+                logger.info("Reconnecting to MCP server '%s'", self.name)
+            client = self._make_client()
+            try:
+                await asyncio.wait_for(client.__aenter__(), self.policy.connect_timeout or None)
+            except BaseException as e:
+                try:
+                    await client.__aexit__(None, None, None)
+                except BaseException:
+                    pass
+                if not isinstance(e, asyncio.CancelledError):
+                    self._failed(f"connect failed: {_reason(e)}")
+                raise
+            self._client = client
+            return client
+
+    async def _disconnect(self) -> None:
+        """Drop the current connection, ignoring shutdown errors."""
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.__aexit__(None, None, None)
+            except Exception:
+                logger.debug("Error closing MCP session '%s'", self.name, exc_info=True)
+
+    def _failed(self, reason: str) -> None:
+        """Record a failure, set the backoff and schedule a restart if enabled."""
+        self.failures += 1
+        delay = min(self.policy.restart_backoff * (2 ** (self.failures - 1)), self.policy.restart_backoff_max)
+        self._retry_at = asyncio.get_running_loop().time() + delay
+        tail = " | ".join(list(self.stderr)[-5:])
+        logger.warning(
+            "MCP server '%s' failed (%s); failure %d, next attempt in %.1fs%s",
+            self.name, reason, self.failures, delay, f"; stderr: {tail}" if tail else "",
+        )
+        if self.policy.restart == "never":
+            self._down = True
+        elif self.policy.restart == "always" and not self._closed:
+            if self._restart_task is None or self._restart_task.done():
+                self._restart_task = asyncio.get_running_loop().create_task(self._supervise())
+
+    async def _supervise(self) -> None:
+        """Reconnect in the background, retrying with backoff until it succeeds.
+
+        Each failed attempt moves ``_retry_at`` forward, so the loop sleeps
+        until then and tries again; it stops once the session is connected
+        (by this loop or by a caller), closed or marked down.
+        """
+        loop = asyncio.get_running_loop()
+        while not (self._closed or self._down):
+            await asyncio.sleep(max(0.0, self._retry_at - loop.time()))
+            if self._closed or self._alive():
+                return
+            if self._retry_at > loop.time():
+                continue
+            try:
+                await self._connect()
+            except Exception:
+                # The attempt recorded its failure and pushed _retry_at out
+                continue
+            logger.info("MCP server '%s' restarted", self.name)
+            return
+
+    async def _crash(self, reason: str) -> None:
+        """Drop a broken connection and hand it to the supervisor."""
+        async with self._lock:
+            await self._disconnect()
+            self._failed(reason)
+
+    async def _on_message(self, message: Any) -> None:
+        """Watch server notifications for ``notifications/tools/list_changed``."""
+        root = getattr(message, "root", message)
+        if getattr(root, "method", None) == "notifications/tools/list_changed" and self._on_tools_changed is not None:
+            self._on_tools_changed(self.name)
+
+    async def reset(self) -> None:
+        """Drop the connection so the next call reconnects."""
+        async with self._lock:
+            await self._disconnect()
+
+    async def list_tools(self) -> Any:
+        """List the server's tools over the shared connection."""
+        client = await self._connect()
+        try:
+            tools = await client.list_tools()
+        except Exception as e:
+            if not _is_protocol_error(e):
+                await self._crash(f"tools/list failed: {_reason(e)}")
+            raise
+        self.failures = 0
+        return tools
+
+    async def _call(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool while holding one of the server's in-flight slots."""
+        async with (self._slots or nullcontext()):
+            client = await self._connect()
+            try:
+                result = await client.call_tool(name, arguments)
+            except Exception as e:
+                if not _is_protocol_error(e):
+                    await self._crash(f"call to {name} failed: {_reason(e)}")
+                raise
+        self.failures = 0
+        return result
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool within the server's concurrency cap and timeout.
+
+        Connecting is bounded by ``connect_timeout`` and happens before the
+        call's own timeout starts. Tool and protocol errors keep the session;
+        transport errors hand it to the supervisor. Calls are not retried
+        because tools may have side effects. A call timing out on a live
+        connection triggers a ping so a hung server is restarted rather than
+        holding slots indefinitely.
+        """
+        await self._connect()
+        timeout = self.policy.timeout or None
+        try:
+            return await asyncio.wait_for(self._call(name, arguments), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("MCP tool '%s' on server '%s' timed out after %.0fs", name, self.name, timeout)
+            if self._alive() and (self._probe is None or self._probe.done()):
+                self._probe = asyncio.get_running_loop().create_task(self.ping())
+            raise TimeoutError(f"MCP server '{self.name}' did not answer within {timeout:.0f}s") from None
+
+    async def ping(self) -> bool:
+        """Ping the server if connected; no answer counts as a crash.
+
+        An error reply (e.g. ``Method not found``) still proves the server
+        is responsive, so only transport errors and timeouts restart it.
+
+        Returns:
+            Whether the server answered. Unconnected sessions report whether
+            they are free of recent failures.
+        """
+        if self._client is None:
+            return self.failures == 0
+        try:
+            client = await self._connect()
+            await asyncio.wait_for(client.ping(), self.policy.timeout or None)
+        except Exception as e:
+            if _is_protocol_error(e):
+                return True
+            if self._client is not None:
+                await self._crash(f"ping failed: {_reason(e)}")
+            return False
+        return True
+
+    async def aclose(self) -> None:
+        """Close the connection (stopping a stdio server process)."""
+        self._closed = True
+        for task in (self._restart_task, self._probe, self._connecting):
+            if task is not None:
+                task.cancel()
+        self._restart_task = self._probe = self._connecting = None
+        await self.reset()
+        self._close_stderr()
+
+
+def _input_schema(tool: Any) -> Any:
+    """Return a tool's input schema under the current or pre-v2 MCP field name."""
+    schema = getattr(tool, "input_schema", None)
+    return schema if schema is not None else getattr(tool, "inputSchema", None)
+
+
+def _reason(exc: BaseException) -> str:
+    """Return a short description of an exception for logs and errors."""
+    return str(exc) or type(exc).__name__
+
+
+def _is_protocol_error(exc: BaseException) -> bool:
+    """Return whether the server answered with an error, as opposed to a transport failure.
+
+    Tool errors and JSON-RPC error replies mean the connection works; the
+    ``Connection closed`` and request-timeout codes the MCP SDK raises
+    locally do not.
+    """
+    try:
+        from fastmcp.exceptions import McpError, ToolError  # type: ignore
+        from mcp.types import CONNECTION_CLOSED, REQUEST_TIMEOUT  # type: ignore
+    except Exception:  # pragma: no cover
+        return False
+    if isinstance(exc, ToolError):
+        return True
+    return isinstance(exc, McpError) and getattr(exc, "code", None) not in (CONNECTION_CLOSED, REQUEST_TIMEOUT)
+
 
 __all__ = ["FastMCPClient"]
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 
+from ..models import registry_for
+from ..render import render_reply
+from ..streaming import start_stream
+
 
 async def handle_ai(ctx: Any, room_id: str, sender_id: str, sender_display: str, args: str) -> None:
     """Primary chat command: add user text and reply with model output.
@@ -17,21 +21,29 @@ async def handle_ai(ctx: Any, room_id: str, sender_id: str, sender_display: str,
     matrix = ctx.matrix
     if args:
         history.add(room_id, sender_id, "user", args)
-    messages = history.get(room_id, sender_id)
     # Per-user model override
     model = ctx.user_models.get(room_id, {}).get(sender_id, ctx.model)
+    messages = history.get(room_id, sender_id, model=model)
+    reply = start_stream(ctx, room_id, f"**{sender_display}**:\n")
     try:
         if getattr(ctx, "tools_enabled", False):
-            response_text = await ctx.respond_with_tools(messages, model=model, room_id=room_id)
+            extra = {"on_delta": reply.update} if reply else {}
+            response_text = await ctx.respond_with_tools(messages, model=model, room_id=room_id, **extra)
         else:
             data = {"model": model, "messages": messages}
-            if model not in ctx.cfg.llm.models.get("google", []):
+            if registry_for(ctx.cfg.llm).resolve(model).provider != "google":
                 data.update(ctx.options)
-            result = await ctx.llm.chat(data)
+            if reply:
+                result = await ctx.llm.chat_stream(data, on_delta=reply.update)
+            else:
+                result = await ctx.llm.chat(data)
             response_text = (result.get("choices", [{}])[0].get("message") or {}).get("content", "")
     except Exception as e:
         try:
-            await matrix.send_text(room_id, "Something went wrong", html=ctx.render("Something went wrong"))
+            if reply:
+                await reply.finish("Something went wrong", html=ctx.render("Something went wrong"))
+            else:
+                await matrix.send_text(room_id, "Something went wrong", html=ctx.render("Something went wrong"))
             ctx.log(e)
         except Exception:
             pass
@@ -63,9 +75,12 @@ async def handle_ai(ctx: Any, room_id: str, sender_id: str, sender_display: str,
     text = text.strip()
     history.add(room_id, sender_id, "assistant", text)
     body = f"**{sender_display}**:\n{text}"
-    html = ctx.render(body)
+    html = await render_reply(ctx, body)
     try:
         ctx.log(f"Sending response to {sender_display} in {room_id}: {body}")
     except Exception:
         pass
-    await matrix.send_text(room_id, body, html=html)
+    if reply:
+        await reply.finish(body, html=html)
+    else:
+        await matrix.send_text(room_id, body, html=html)
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 
+from ..models import registry_for
+from ..render import render_reply
+from ..streaming import start_stream
+
 
 async def handle_persona(ctx: Any, room_id: str, sender_id: str, sender_display: str, args: str) -> None:
     """Set a persona and seed a response for the user.
@@ -51,15 +55,22 @@ async def handle_custom(ctx: Any, room_id: str, sender_id: str, sender_display:
 
 async def _respond(ctx: Any, room_id: str, user_id: str, header_display: str) -> None:
     """Helper to request a reply for the current user and send it."""
-    messages = ctx.history.get(room_id, user_id)
+    messages = ctx.history.get(room_id, user_id, model=ctx.model)
+    reply = start_stream(ctx, room_id, f"**{header_display}**:\n")
     try:
         data = {"model": ctx.model, "messages": messages}
-        if ctx.model not in ctx.cfg.llm.models.get("google", []):
+        if registry_for(ctx.cfg.llm).resolve(ctx.model).provider != "google":
             data.update(ctx.options)
-        result = await ctx.llm.chat(data)
+        if reply:
+            result = await ctx.llm.chat_stream(data, on_delta=reply.update)
+        else:
+            result = await ctx.llm.chat(data)
     except Exception as e:
         try:
-            await ctx.matrix.send_text(room_id, "Something went wrong", html=ctx.render("Something went wrong"))
+            if reply:
+                await reply.finish("Something went wrong", html=ctx.render("Something went wrong"))
+            else:
+                await ctx.matrix.send_text(room_id, "Something went wrong", html=ctx.render("Something went wrong"))
             ctx.log(e)
         except Exception:
             pass
@@ -97,9 +108,12 @@ async def _respond(ctx: Any, room_id: str, user_id: str, header_display: str) ->
     response_text = (response_text or "").strip()
     ctx.history.add(room_id, user_id, "assistant", response_text)
     body = f"**{header_display}**:\n{response_text}"
-    html = ctx.render(body)
+    html = await render_reply(ctx, body)
     try:
         ctx.log(f"Sending response to {header_display} in {room_id}: {body}")
     except Exception:
         pass
-    await ctx.matrix.send_text(room_id, body, html=html)
+    if reply:
+        await reply.finish(body, html=html)
+    else:
+        await ctx.matrix.send_text(room_id, body, html=html)
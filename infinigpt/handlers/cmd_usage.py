@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+
+async def handle_usage(ctx: Any, room_id: str, sender_id: str, sender_display: str, args: str) -> None:
+    """Admin: report token usage by provider, model, room and user.
+
+    Args:
+        ctx: App context.
+        room_id: Matrix room ID.
+        sender_id: Matrix user ID.
+        sender_display: Sender display name.
+        args: Empty for a summary, ``json`` for a machine-readable export,
+            or ``reset`` to clear the counters.
+    """
+    tracker = getattr(ctx.llm, "usage", None)
+    if tracker is None:
+        body = "Usage tracking is unavailable"
+        await ctx.matrix.send_text(room_id, body, html=ctx.render(body))
+        return
+    arg = (args or "").strip().lower()
+    if arg == "reset":
+        tracker.reset()
+        body = "Usage counters reset"
+    elif arg == "json":
+        data = tracker.snapshot()
+        data["client"] = dict(getattr(ctx.llm, "metrics", {}) or {})
+        body = "```json\n" + json.dumps(data, indent=2, sort_keys=True) + "\n```"
+    else:
+        body = tracker.summary()
+    await ctx.matrix.send_text(room_id, body, html=ctx.render(body))
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 
+from ..models import registry_for
+from ..render import render_reply
+from ..streaming import start_stream
+
 
 async def handle_x(ctx: Any, room_id: str, sender_id: str, sender_display: str, args: str) -> None:
     """Speak as the target user by addressing them explicitly.
@@ -31,9 +35,20 @@ async def handle_x(ctx: Any, room_id: str, sender_id: str, sender_display: str,
             message = rest
 
     # Display-name target (supports spaces): choose the longest matching name
+    if not target_user:
+        threads = ctx.history.messages.get(room_id, {})  # type: ignore[attr-defined]
+        index_for = getattr(ctx.matrix, "name_index", None)
+        index = index_for(room_id) if index_for is not None else None
+        if index is not None:
+            match = index.longest_prefix(raw, accept=lambda u: u in threads)
+            if match is not None:
+                target_user, _, message = match
+                if not message:
+                    return
     if not target_user:
         candidates = []
-        for user in list(ctx.history.messages.get(room_id, {}).keys()):  # type: ignore[attr-defined]
+        # Without an index, or for users no longer in the room, ask per user
+        for user in [u for u in list(threads.keys()) if index is None or u not in index]:
             name = await ctx.matrix.display_name(user)
             if not name:
                 continue
@@ -49,21 +64,29 @@ async def handle_x(ctx: Any, room_id: str, sender_id: str, sender_display: str,
             return
 
     ctx.history.add(room_id, target_user, "user", message)
-    messages = ctx.history.get(room_id, target_user)
     # Per-target model override
     model = ctx.user_models.get(room_id, {}).get(target_user, ctx.model)
+    messages = ctx.history.get(room_id, target_user, model=model)
+    reply = start_stream(ctx, room_id, f"**{sender_display}**:\n")
     try:
         if getattr(ctx, "tools_enabled", False):
-            response_text = await ctx.respond_with_tools(messages, model=model, room_id=room_id)
+            extra = {"on_delta": reply.update} if reply else {}
+            response_text = await ctx.respond_with_tools(messages, model=model, room_id=room_id, **extra)
         else:
             data = {"model": model, "messages": messages}
-            if model not in ctx.cfg.llm.models.get("google", []):
+            if registry_for(ctx.cfg.llm).resolve(model).provider != "google":
                 data.update(ctx.options)
-            result = await ctx.llm.chat(data)
+            if reply:
+                result = await ctx.llm.chat_stream(data, on_delta=reply.update)
+            else:
+                result = await ctx.llm.chat(data)
             response_text = (result.get("choices", [{}])[0].get("message") or {}).get("content", "")
     except Exception as e:
         try:
-            await ctx.matrix.send_text(room_id, "Something went wrong", html=ctx.render("Something went wrong"))
+            if reply:
+                await reply.finish("Something went wrong", html=ctx.render("Something went wrong"))
+            else:
+                await ctx.matrix.send_text(room_id, "Something went wrong", html=ctx.render("Something went wrong"))
             ctx.log(e)
         except Exception:
             pass
@@ -71,5 +94,8 @@ async def handle_x(ctx: Any, room_id: str, sender_id: str, sender_display: str,
     text = (response_text or "").strip()
     ctx.history.add(room_id, target_user, "assistant", text)
     body = f"**{sender_display}**:\n{text}"
-    html = ctx.render(body)
-    await ctx.matrix.send_text(room_id, body, html=html)
+    html = await render_reply(ctx, body)
+    if reply:
+        await reply.finish(body, html=html)
+    else:
+        await ctx.matrix.send_text(room_id, body, html=html)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import datetime as _dt
-from typing import Callable, Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, Set, Tuple
 
 
 class Router:
@@ -18,6 +18,8 @@ class Router:
         """Create a new, empty command router."""
         self._handlers: Dict[str, Callable] = {}
         self._admin_handlers: Dict[str, Callable] = {}
+        # First characters of registered commands, for O(1) rejection
+        self._leads: Set[str] = set()
 
     def register(self, cmd: str, fn: Callable, admin: bool = False) -> None:
         """Register a handler for a command prefix.
@@ -31,6 +33,38 @@ class Router:
             self._admin_handlers[cmd] = fn
         else:
             self._handlers[cmd] = fn
+        if cmd:
+            self._leads.add(cmd[0])
+
+    def match(self, text: str, bot_name: Optional[str] = None) -> Optional[str]:
+        """Cheaply check whether a message is addressed to the bot.
+
+        Uses only string checks so ordinary chatter can be dropped before
+        any network I/O. Admin permissions are not checked here.
+
+        Args:
+            text: Raw message text.
+            bot_name: Optional bot name prefix to address without a dot command.
+
+        Returns:
+            The command token if the text starts with a registered command
+            or the ``BotName:`` mention, otherwise None.
+        """
+        text = text.lstrip()
+        if not text:
+            return None
+        if text[0] not in self._leads and not (bot_name and text.startswith(bot_name)):
+            return None
+        cmd = text.split(None, 1)[0]
+        if cmd in self._handlers or cmd in self._admin_handlers:
+            return cmd
+        if bot_name and cmd == f"{bot_name}:" and ".ai" in self._handlers:
+            return cmd
+        return None
+
+    def requires_admin(self, cmd: str) -> bool:
+        """Return True if ``cmd`` is only registered as an admin command."""
+        return cmd not in self._handlers and cmd in self._admin_handlers
 
     def dispatch(
         self,
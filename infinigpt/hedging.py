@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Mapping, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_HEDGING: Dict[str, Any] = {
+    # Mapping of primary model ID -> secondary model ID (may be the same model)
+    "models": {},
+    "percentile": 0.95,
+    # Delay used until enough latency samples exist
+    "default_delay": 4.0,
+    "min_delay": 0.5,
+    "max_delay": 30.0,
+    "min_samples": 20,
+    # Upper bound on hedged requests as a fraction of hedge-eligible requests
+    "max_ratio": 0.1,
+}
+
+
+class LatencyTracker:
+    """Rolling per-model samples of time-to-response-headers."""
+
+    def __init__(self, window: int = 200) -> None:
+        """Create an empty tracker.
+
+        Args:
+            window: Samples kept per model.
+        """
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def observe(self, model: str, seconds: float) -> None:
+        """Record one latency sample for a model."""
+        samples = self._samples.get(model)
+        if samples is None:
+            samples = self._samples[model] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def count(self, model: str) -> int:
+        """Return the number of samples recorded for a model."""
+        return len(self._samples.get(model) or ())
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        """Return the ``q`` quantile (0-1) for a model, or None without samples."""
+        samples = self._samples.get(model)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+
+class HedgePolicy:
+    """Decides whether and when to hedge a request to a secondary model.
+
+    Configured from ``llm.hedging``; only models listed under ``models`` are
+    hedged. The hedge delay is the model's observed latency percentile
+    clamped to ``[min_delay, max_delay]``, and the fraction of hedged
+    requests is capped by ``max_ratio`` to bound the extra cost.
+    """
+
+    def __init__(self, settings: Optional[Mapping[str, Any]] = None, latency: Optional[LatencyTracker] = None) -> None:
+        """Create a policy.
+
+        Args:
+            settings: Overrides for :data:`DEFAULT_HEDGING`.
+            latency: Shared latency tracker; a new one is created if omitted.
+        """
+        opts = dict(DEFAULT_HEDGING)
+        opts.update(settings or {})
+        self.models: Dict[str, str] = dict(opts.get("models") or {})
+        self.percentile = float(opts["percentile"])
+        self.default_delay = float(opts["default_delay"])
+        self.min_delay = float(opts["min_delay"])
+        self.max_delay = float(opts["max_delay"])
+        self.min_samples = int(opts["min_samples"])
+        self.max_ratio = float(opts["max_ratio"])
+        self.latency = latency or LatencyTracker()
+        self.eligible = 0
+        self.hedged = 0
+
+    def secondary_for(self, model: str) -> Optional[str]:
+        """Return the hedge target for a model, or None if not hedged."""
+        return self.models.get(model)
+
+    def delay_for(self, model: str) -> float:
+        """Return seconds to wait on the primary before hedging."""
+        if self.latency.count(model) < self.min_samples:
+            return self.default_delay
+        value = self.latency.percentile(model, self.percentile) or self.default_delay
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def admit(self) -> bool:
+        """Return True if the hedge budget allows another hedge."""
+        return self.hedged < self.max_ratio * self.eligible + 1
+
+
+async def race(
+    primary: Callable[[asyncio.Event, Optional[Callable[[str], Awaitable[None]]]], Awaitable[T]],
+    secondary: Callable[[asyncio.Event, Optional[Callable[[str], Awaitable[None]]]], Awaitable[T]],
+    delay: float,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+    on_hedge: Optional[Callable[[], bool]] = None,
+    started: Optional[asyncio.Event] = None,
+) -> T:
+    """Run ``primary``, hedging with ``secondary`` if it stalls.
+
+    Each attempt factory receives an ``asyncio.Event`` it must set once
+    response headers arrive, and a delta callback. If the primary has not
+    set its event within ``delay`` seconds, the secondary is started. The
+    first attempt to succeed wins and the other is cancelled; when
+    streaming, the first attempt to emit a token owns the callback.
+
+    Args:
+        primary: Factory for the primary attempt.
+        secondary: Factory for the hedge attempt.
+        delay: Seconds to wait for primary headers before hedging.
+        on_delta: Optional streaming callback shared by both attempts.
+        on_hedge: Optional callable asked just before hedging; returning
+            False skips the hedge.
+        started: Optional event passed to both attempts, so it is set once
+            either one's headers arrive.
+
+    Returns:
+        The winning attempt's result. Cancelling the race cancels both
+        attempts.
+    """
+    owner: Dict[str, str] = {}
+    tasks: Dict[asyncio.Task, str] = {}
+
+    def _gate(name: str) -> Optional[Callable[[str], Awaitable[None]]]:
+        if on_delta is None:
+            return None
+
+        async def _forward(text: str) -> None:
+            if owner.setdefault("name", name) != name:
+                return
+            for task, label in tasks.items():
+                if label != name and not task.done():
+                    task.cancel()
+            await on_delta(text)  # type: ignore[misc]
+
+        return _forward
+
+    started = started or asyncio.Event()
+    first = asyncio.create_task(primary(started, _gate("primary")))
+    tasks[first] = "primary"
+    waiter = asyncio.create_task(started.wait())
+    try:
+        await asyncio.wait({first, waiter}, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+    except BaseException:
+        first.cancel()
+        raise
+    finally:
+        waiter.cancel()
+    if first.done() or started.is_set() or (on_hedge is not None and not on_hedge()):
+        return await first
+
+    logger.info("Primary request stalled for %.2fs; sending hedge", delay)
+    second = asyncio.create_task(secondary(started, _gate("secondary")))
+    tasks[second] = "secondary"
+    pending: Set[asyncio.Task] = {first, second}
+    errors: List[BaseException] = []
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                exc = task.exception()
+                if exc is None:
+                    logger.info("Hedged request won by %s", tasks[task])
+                    return task.result()
+                errors.append(exc)
+        if errors:
+            raise errors[0]
+        raise asyncio.CancelledError()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
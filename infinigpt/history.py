@@ -1,6 +1,109 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+import math
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+
+class TokenEstimator:
+    """Cheap character-based token estimator that self-calibrates.
+
+    Starts from a chars-per-token ratio and nudges it toward the ratio
+    implied by ``usage.prompt_tokens`` reported by providers.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0, per_message: int = 4, alpha: float = 0.2) -> None:
+        """Create an estimator.
+
+        Args:
+            chars_per_token: Initial characters-per-token ratio.
+            per_message: Fixed token overhead counted for each message.
+            alpha: Smoothing factor for calibration updates (0-1).
+        """
+        self.chars_per_token = float(chars_per_token)
+        self.per_message = int(per_message)
+        self.alpha = float(alpha)
+
+    def estimate(self, text: str) -> int:
+        """Estimate the tokens one message with ``text`` content costs."""
+        return self.estimate_chars(len(text or ""))
+
+    def estimate_chars(self, chars: int) -> int:
+        """Estimate the tokens one message with ``chars`` characters costs."""
+        return math.ceil(chars / self.chars_per_token) + self.per_message
+
+    def observe(self, chars: int, messages: int, prompt_tokens: int) -> None:
+        """Calibrate from a provider-reported prompt token count.
+
+        Args:
+            chars: Total characters sent in the prompt.
+            messages: Number of messages in the prompt.
+            prompt_tokens: ``usage.prompt_tokens`` from the response.
+        """
+        content_tokens = prompt_tokens - self.per_message * messages
+        if chars <= 0 or content_tokens <= 0:
+            return
+        ratio = min(8.0, max(1.0, chars / content_tokens))
+        self.chars_per_token += self.alpha * (ratio - self.chars_per_token)
+
+
+class _Message(dict):
+    """Stored chat message carrying its cached content length.
+
+    Behaves exactly like the plain dict sent to providers; the length lives
+    in an attribute so it is never serialized. Tokens are estimated from it
+    on demand, so estimates follow the estimator's latest calibration.
+    """
+
+    __slots__ = ("chars",)
+
+
+def _chars(msg: Mapping[str, Any]) -> int:
+    """Return a message's content length, caching it when possible."""
+    chars = getattr(msg, "chars", None)
+    if chars is None:
+        content = msg.get("content")
+        chars = len(content if isinstance(content, str) else str(content or ""))
+        if isinstance(msg, _Message):
+            msg.chars = chars
+    return chars
+
+
+def message_chars(messages: Iterable[Mapping[str, Any]]) -> int:
+    """Return the total content length of chat messages."""
+    return sum(_chars(m) for m in messages)
+
+
+def _tokens(msg: Dict[str, Any], estimator: TokenEstimator) -> int:
+    """Return a message's token estimate."""
+    return estimator.estimate_chars(_chars(msg))
+
+
+def trim_messages(
+    messages: List[Dict[str, Any]],
+    max_items: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    estimator: Optional[TokenEstimator] = None,
+) -> None:
+    """Trim a message list in place by count and estimated token budget.
+
+    The leading system message is always kept, as is the newest message,
+    so a single oversized message is sent rather than an empty prompt.
+
+    Args:
+        messages: Message list to trim (mutated).
+        max_items: Maximum number of messages, or None for no count limit.
+        max_tokens: Estimated token budget, or None/0 for no token limit.
+        estimator: Estimator used for token counts.
+    """
+    start = 1 if messages and messages[0].get("role") == "system" else 0
+    if max_items is not None:
+        while len(messages) > max_items and len(messages) > start + 1:
+            messages.pop(start)
+    if max_tokens:
+        estimator = estimator or TokenEstimator()
+        total = sum(_tokens(m, estimator) for m in messages)
+        while total > max_tokens and len(messages) > start + 1:
+            total -= _tokens(messages.pop(start), estimator)
 
 
 class HistoryStore:
@@ -16,6 +119,9 @@ class HistoryStore:
         max_items: int = 24,
         history_size: Optional[int] = None,
         system_prompt: Optional[str] = None,
+        token_budgets: Optional[Mapping[str, int]] = None,
+        default_token_budget: int = 0,
+        estimator: Optional[TokenEstimator] = None,
     ) -> None:
         # Back-compat: allow alternate constructor via system_prompt/history_size
         if system_prompt is not None:
@@ -31,6 +137,10 @@ class HistoryStore:
             self.personality = personality
             self._fixed_system_prompt = None
         self.max_items = history_size or max_items
+        # Per-model prompt token budgets; 0 disables token-based trimming
+        self.token_budgets: Dict[str, int] = dict(token_budgets or {})
+        self.default_token_budget = int(default_token_budget or 0)
+        self.estimator = estimator or TokenEstimator()
         self._include_extra = True
         self._messages: Dict[str, Dict[str, List[Dict[str, str]]]] = {}
         # For per-user model override parity with app
@@ -66,7 +176,7 @@ class HistoryStore:
         if room not in self._messages:
             self._messages[room] = {}
         if user not in self._messages[room]:
-            self._messages[room][user] = [{"role": "system", "content": self._system_for(room, user)}]
+            self._messages[room][user] = [self._message("system", self._system_for(room, user))]
 
     def init_prompt(self, room: str, user: str, persona: Optional[str] = None, custom: Optional[str] = None) -> None:
         """Initialize or replace the system prompt for a thread.
@@ -79,12 +189,10 @@ class HistoryStore:
         """
         self._ensure(room, user)
         if custom:
-            self._messages[room][user] = [{"role": "system", "content": custom}]
+            self._messages[room][user] = [self._message("system", custom)]
         else:
             p = persona if (persona is not None and persona != "") else self.personality
-            self._messages[room][user] = [
-                {"role": "system", "content": f"{self.prompt_prefix}{p}{self._full_suffix()}"}
-            ]
+            self._messages[room][user] = [self._message("system", f"{self.prompt_prefix}{p}{self._full_suffix()}")]
 
     def add(self, room: str, user: str, role: str, content: str) -> None:
         """Append a message and trim to max history length.
@@ -96,13 +204,37 @@ class HistoryStore:
             content: Message content.
         """
         self._ensure(room, user)
-        self._messages[room][user].append({"role": role, "content": content})
+        self._messages[room][user].append(self._message(role, content))
         self._trim(room, user)
 
-    def get(self, room: str, user: str) -> List[Dict[str, str]]:
-        """Return a copy of the message list for a thread."""
+    def _message(self, role: str, content: str) -> Dict[str, str]:
+        """Build a stored message with its content length cached."""
+        msg = _Message(role=role, content=content)
+        msg.chars = len(content or "")
+        return msg
+
+    def budget_for(self, model: Optional[str]) -> int:
+        """Return the prompt token budget for a model (0 = unlimited)."""
+        if model is None:
+            return 0
+        return int(self.token_budgets.get(model, self.default_token_budget) or 0)
+
+    def get(self, room: str, user: str, model: Optional[str] = None) -> List[Dict[str, str]]:
+        """Return a copy of the message list for a thread.
+
+        Args:
+            room: Matrix room ID.
+            user: Matrix user ID.
+            model: Optional model the messages are for; when it has a token
+                budget, the oldest messages are dropped from the returned
+                copy to fit it. The stored thread is left intact.
+        """
         self._ensure(room, user)
-        return list(self._messages[room][user])
+        msgs = list(self._messages[room][user])
+        budget = self.budget_for(model)
+        if budget:
+            trim_messages(msgs, max_tokens=budget, estimator=self.estimator)
+        return msgs
 
     def reset(self, room: str, user: str, stock: bool = False) -> None:
         """Reset a user's history for a room.
@@ -129,12 +261,4 @@ class HistoryStore:
 
     def _trim(self, room: str, user: str) -> None:
         """Trim a thread's messages to the configured max length."""
-        msgs = self._messages[room][user]
-        while len(msgs) > self.max_items:
-            if msgs and msgs[0].get("role") == "system":
-                if len(msgs) > 1:
-                    msgs.pop(1)
-                else:
-                    break
-            else:
-                msgs.pop(0)
+        trim_messages(self._messages[room][user], max_items=self.max_items)
@@ -8,6 +8,9 @@ class LLMClientProtocol(Protocol):
     async def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         ...
 
+    async def chat_stream(self, payload: Dict[str, Any], on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        ...
+
 
 class MatrixClientProtocol(Protocol):
     """Protocol describing the Matrix client wrapper contract."""
@@ -15,8 +18,9 @@ class MatrixClientProtocol(Protocol):
     async def ensure_keys(self) -> None: ...
     async def load_store(self) -> None: ...
     async def join(self, room_id: str) -> None: ...
-    async def send_text(self, room_id: str, body: str, html: Optional[str] = None) -> None: ...
-    async def display_name(self, user_id: str) -> str: ...
+    async def send_text(self, room_id: str, body: str, html: Optional[str] = None) -> Optional[str]: ...
+    async def edit_text(self, room_id: str, event_id: str, body: str, html: Optional[str] = None) -> None: ...
+    async def display_name(self, user_id: str, room_id: Optional[str] = None) -> str: ...
     def add_text_handler(self, handler: Callable[[Any, Any], Awaitable[None]]) -> None: ...
     def add_to_device_callback(self, callback, event_types=None) -> None: ...
     async def initial_sync(self, timeout_ms: int = 3000) -> None: ...
@@ -1,11 +1,104 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import importlib.util
 import json
-from typing import Dict, Any, Tuple
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import httpx
 
+from .cache import ResponseCache, request_key
 from .config import AppConfig
+from .history import TokenEstimator, message_chars
+from .breaker import OPEN, CircuitBreaker, is_provider_failure
+from .exceptions import CircuitOpenError
+from .hedging import HedgePolicy, race
+from .models import registry_for
+from .ratelimit import RateLimiter
+from .request_context import current_room, current_user
+from .usage import UsageTracker
+
+logger = logging.getLogger(__name__)
+
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+# Providers known to accept ``stream_options.include_usage`` on streams
+_STREAM_USAGE_PROVIDERS = {"openai", "xai", "deepseek", "qwen"}
+
+
+def _merge_tool_call_delta(calls: Dict[int, Dict[str, Any]], delta: Dict[str, Any]) -> None:
+    """Fold one streamed ``tool_calls`` delta into the assembled calls.
+
+    Args:
+        calls: Mapping of tool-call index to the call assembled so far.
+        delta: A single entry of ``choices[].delta.tool_calls``.
+    """
+    index = delta.get("index")
+    if not isinstance(index, int):
+        index = len(calls)
+    call = calls.setdefault(index, {"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+    if delta.get("id"):
+        call["id"] = delta["id"]
+    if delta.get("type"):
+        call["type"] = delta["type"]
+    func = delta.get("function") or {}
+    if func.get("name"):
+        call["function"]["name"] += func["name"]
+    args = func.get("arguments")
+    if isinstance(args, str):
+        call["function"]["arguments"] += args
+    elif args:
+        call["function"]["arguments"] += json.dumps(args, ensure_ascii=False)
+
+
+def _estimate_tokens(payload: Dict[str, Any]) -> int:
+    """Roughly estimate prompt plus completion tokens for rate budgeting."""
+    return message_chars(payload.get("messages") or []) // 4 + int(payload.get("max_tokens") or payload.get("max_completion_tokens") or 0)
+
+
+def _encode_payload(payload: Dict[str, Any]) -> bytes:
+    """Serialize a request body, splicing in precomputed tool schema JSON.
+
+    A ``tools`` value carrying a ``json`` attribute (see
+    :class:`infinigpt.tool_select.ToolSchema`) is inserted verbatim instead of
+    being re-encoded on every request.
+    """
+    tools = payload.get("tools")
+    encoded = getattr(tools, "json", None)
+    if not tools or encoded is None:
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    rest = json.dumps({k: v for k, v in payload.items() if k != "tools"}, ensure_ascii=False)
+    sep = "," if rest != "{}" else ""
+    return f'{rest[:-1]}{sep}"tools":{encoded}}}'.encode("utf-8")
+
+
+async def _headers_within(task: "asyncio.Future[Any]", headers: asyncio.Event, timeout: Optional[float]) -> Optional[float]:
+    """Wait until response headers arrive or the attempt finishes.
+
+    Args:
+        task: The running attempt.
+        headers: Event the attempt sets once response headers arrive.
+        timeout: Seconds to wait for either, or None to wait indefinitely.
+
+    Returns:
+        Seconds until headers arrived, or None if the attempt finished
+        without signalling them.
+
+    Raises:
+        asyncio.TimeoutError: When neither happened within ``timeout``.
+    """
+    sent = time.monotonic()
+    waiter = asyncio.ensure_future(headers.wait())
+    try:
+        done, _ = await asyncio.wait({task, waiter}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+    if not done:
+        raise asyncio.TimeoutError()
+    return time.monotonic() - sent if headers.is_set() else None
 
 
 def resolve_provider(model: str, cfg: AppConfig) -> Tuple[str, str]:
@@ -16,43 +109,110 @@ def resolve_provider(model: str, cfg: AppConfig) -> Tuple[str, str]:
         cfg: Application configuration.
 
     Returns:
-        Tuple of (base_url, bearer_token).
+        Tuple of (base_url, bearer_token). Unknown models are treated as
+        OpenAI-compatible.
     """
-    llm = cfg.llm
-    if model in llm.models.get("openai", []):
-        return ("https://api.openai.com/v1", llm.api_keys.get("openai", ""))
-    if model in llm.models.get("xai", []):
-        return ("https://api.x.ai/v1", llm.api_keys.get("xai", ""))
-    if model in llm.models.get("google", []):
-        # Google OpenAI-compatible
-        return ("https://generativelanguage.googleapis.com/v1beta/openai", llm.api_keys.get("google", ""))
-    if model in llm.models.get("mistral", []):
-        return ("https://api.mistral.ai/v1", llm.api_keys.get("mistral", ""))
-    if model in llm.models.get("anthropic", []):
-        return ("https://api.anthropic.com/v1", llm.api_keys.get("anthropic", ""))
-    if model in llm.models.get("deepseek", []):
-        return ("https://api.deepseek.com/v1", llm.api_keys.get("deepseek", ""))
-    # if you are using qwen singapore API，you should use "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
-    if model in llm.models.get("qwen", []):
-        return ("https://dashscope.aliyuncs.com/compatible-mode/v1", llm.api_keys.get("qwen", ""))
-    if model in llm.models.get("ollama", []):
-        return (f"http://{llm.ollama_url}/v1", "hello_friend")
-    if model in llm.models.get("lmstudio", []):
-        return (f"http://{llm.lmstudio_url}/v1", "hello_friend")
-    # Fallback: treat as OpenAI-compatible if unknown
-    return ("https://api.openai.com/v1", llm.api_keys.get("openai", ""))
+    info = registry_for(cfg.llm).resolve(model)
+    return (info.base_url, info.api_key)
 
 
 class LLMClient:
-    """HTTP client for provider-agnostic chat API calls."""
+    """HTTP client for provider-agnostic chat API calls.
 
-    def __init__(self, cfg: AppConfig) -> None:
+    Keeps one pooled ``httpx.AsyncClient`` per provider base URL for the
+    lifetime of the process so repeated calls reuse keep-alive (and, when
+    enabled, multiplexed HTTP/2) connections instead of paying a fresh
+    TCP/TLS handshake per request. Identical concurrent non-streaming
+    requests are coalesced onto one upstream call (see ``metrics``). Call
+    :meth:`aclose` on shutdown.
+    """
+
+    def __init__(self, cfg: AppConfig, estimator: Optional[TokenEstimator] = None) -> None:
         """Initialize the client with configuration.
 
         Args:
             cfg: Application configuration instance.
+            estimator: Optional token estimator calibrated from the
+                ``usage`` reported in responses.
         """
         self.cfg = cfg
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        llm = cfg.llm
+        self.cache: Optional[ResponseCache] = None
+        if getattr(llm, "cache_enabled", False):
+            self.cache = ResponseCache(llm.cache_max_entries, llm.cache_ttl, llm.cache_path)
+        # Single-flight: identical concurrent requests share one upstream task
+        self._inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        self.metrics: Dict[str, int] = {"requests": 0, "upstream": 0, "coalesced": 0, "cache_hits": 0, "failovers": 0, "hedged": 0}
+        self.limiter = RateLimiter(getattr(llm, "rate_limits", None))
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.hedging = HedgePolicy(getattr(llm, "hedging", None))
+        self.estimator = estimator
+        self.usage = UsageTracker()
+        self._tools_chars: Tuple[int, int] = (0, 0)
+
+    def _cache_key(self, payload: Dict[str, Any]) -> Optional[str]:
+        """Return a response-cache key when the request may be served from cache.
+
+        Only deterministic requests are cached: ``temperature`` 0 or a room
+        listed in ``llm.cache_rooms``.
+
+        Args:
+            payload: Chat request payload.
+
+        Returns:
+            The cache key, or None when caching does not apply.
+        """
+        if self.cache is None:
+            return None
+        deterministic = payload.get("temperature") == 0
+        if not deterministic:
+            room = current_room.get()
+            deterministic = room is not None and room in (self.cfg.llm.cache_rooms or [])
+        if not deterministic:
+            return None
+        return request_key(payload)
+
+    def _http2_enabled(self) -> bool:
+        """Return True when HTTP/2 is requested and the ``h2`` package exists."""
+        if not getattr(self.cfg.llm, "http2", False):
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("llm.http2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+            self.cfg.llm.http2 = False
+            return False
+        return True
+
+    def _client_for(self, base_url: str) -> httpx.AsyncClient:
+        """Return the pooled HTTP client for a provider base URL.
+
+        Clients are created lazily on first use and replaced if they were
+        closed.
+
+        Args:
+            base_url: Provider base URL as returned by ``resolve_provider``.
+
+        Returns:
+            A long-lived ``httpx.AsyncClient`` bound to ``base_url``.
+        """
+        client = self._clients.get(base_url)
+        if client is not None and not client.is_closed:
+            return client
+        llm = self.cfg.llm
+        limits = httpx.Limits(
+            max_connections=llm.max_connections,
+            max_keepalive_connections=llm.max_keepalive_connections,
+            keepalive_expiry=llm.keepalive_expiry,
+        )
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(llm.timeout),
+            limits=limits,
+            http2=self._http2_enabled(),
+        )
+        self._clients[base_url] = client
+        logger.debug("Opened pooled HTTP client for %s", base_url)
+        return client
 
     async def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Make a chat.completions call with standardized provider routing.
@@ -66,16 +226,350 @@ class LLMClient:
         Returns:
             Parsed JSON response as a dictionary.
         """
+        self.metrics["requests"] += 1
+        key = self._cache_key(payload)
+        if key is not None:
+            cached = await self.cache.get(key)  # type: ignore[union-attr]
+            if cached is not None:
+                self.metrics["cache_hits"] += 1
+                return cached
+        flight_key = key or request_key(payload)
+        task = self._inflight.get(flight_key)
+        if task is not None:
+            self.metrics["coalesced"] += 1
+            logger.debug("Coalesced identical in-flight request for %s", payload.get("model"))
+            # Followers get their own copy so callers never share mutable state
+            return copy.deepcopy(await asyncio.shield(task))
+        self.metrics["upstream"] += 1
+        task = asyncio.create_task(self._fetch(payload, key))
+        self._inflight[flight_key] = task
+        task.add_done_callback(lambda t, k=flight_key: self._flight_done(k, t))
+        # Shield so a cancelled caller never cancels the request for the others
+        return await asyncio.shield(task)
+
+    def _flight_done(self, key: str, task: "asyncio.Task[Dict[str, Any]]") -> None:
+        """Forget a finished in-flight request and mark its error retrieved."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, payload: Dict[str, Any], cache_key: Optional[str]) -> Dict[str, Any]:
+        """Perform the upstream request and populate the response cache."""
+        result = await self._dispatch(payload)
+        if cache_key is not None and result.get("choices"):
+            await self.cache.set(cache_key, result)  # type: ignore[union-attr]
+        return result
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        """Return the circuit breaker for a provider, creating it on demand."""
+        breaker = self._breakers.get(provider)
+        if breaker is None:
+            breaker = self._breakers[provider] = CircuitBreaker(provider, getattr(self.cfg.llm, "circuit_breaker", None))
+        return breaker
+
+    def _retarget(self, payload: Dict[str, Any], model: str) -> Dict[str, Any]:
+        """Return a copy of ``payload`` addressed to a fallback model.
+
+        Generic ``llm.options`` are added or removed to match the fallback
+        model's option policy.
+        """
+        options = self.cfg.llm.options or {}
+        if registry_for(self.cfg.llm).resolve(model).apply_options:
+            data = dict(payload)
+            for k, v in options.items():
+                data.setdefault(k, v)
+        else:
+            data = {k: v for k, v in payload.items() if k not in options}
+        data["model"] = model
+        return data
+
+    async def _dispatch(self, payload: Dict[str, Any], on_delta: Optional[DeltaCallback] = None) -> Dict[str, Any]:
+        """Send a request through the primary model's failover chain.
+
+        Each candidate is skipped while its provider's circuit is open.
+        Provider failures (transport errors, timeouts, 5xx, exhausted 429s)
+        move on to the next model in ``llm.fallbacks``; while a fallback
+        remains, each attempt must receive response headers within
+        ``llm.failover_timeout``. Breakers judge latency by time to headers,
+        so long streamed answers are not counted as slow calls.
+
+        Args:
+            payload: Chat request payload.
+            on_delta: Optional streaming callback; streams when provided.
+
+        Returns:
+            The first successful chat.completions response.
+
+        Raises:
+            CircuitOpenError: When every candidate's circuit is open.
+            Exception: The last provider error when all candidates failed,
+                or any non-provider error immediately.
+        """
+        primary = payload["model"]
+        chain = [primary] + [m for m in (self.cfg.llm.fallbacks or {}).get(primary, []) if m != primary]
+        registry = registry_for(self.cfg.llm)
+        last_exc: Optional[BaseException] = None
+        for index, model in enumerate(chain):
+            info = registry.resolve(model)
+            breaker = self.breaker(info.provider)
+            if not breaker.allow():
+                logger.info("Skipping %s: circuit for %s is open", model, info.provider)
+                last_exc = last_exc or CircuitOpenError(f"Circuit open for provider '{info.provider}'")
+                continue
+            data = payload if model == primary else self._retarget(payload, model)
+            if index:
+                self.metrics["failovers"] += 1
+                logger.warning("Failing over from %s to %s", primary, model)
+            has_next = index < len(chain) - 1
+            timeout = self.cfg.llm.failover_timeout if has_next and self.cfg.llm.failover_timeout else None
+            started = time.monotonic()
+            headers = asyncio.Event()
+            task = asyncio.ensure_future(self._attempt(data, on_delta, headers))
+            try:
+                ttfb = await _headers_within(task, headers, timeout)
+                winner, result = await task
+            except Exception as e:
+                if not is_provider_failure(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                logger.warning("Provider %s failed for %s: %r", info.provider, model, e)
+                last_exc = e
+                continue
+            except BaseException:
+                # Cancelled: free a half-open probe slot without an outcome
+                breaker.release()
+                raise
+            finally:
+                if not task.done():
+                    task.cancel()
+            latency = time.monotonic() - started
+            if winner != model:
+                # A hedge won: the primary gets no outcome, the winner gets the credit
+                breaker.release()
+                info = registry.resolve(winner)
+                breaker = self.breaker(info.provider)
+            breaker.record_success(latency if ttfb is None else ttfb)
+            self.usage.record(info.provider, winner, result.get("usage"), latency, current_room.get(), current_user.get())
+            self._calibrate(data, result)
+            return result
+        assert last_exc is not None
+        raise last_exc
+
+    def _calibrate(self, payload: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Feed the provider's reported prompt tokens to the token estimator."""
+        if self.estimator is None:
+            return
+        try:
+            prompt_tokens = int((result.get("usage") or {}).get("prompt_tokens") or 0)
+        except (TypeError, ValueError):
+            return
+        if prompt_tokens <= 0:
+            return
+        messages = payload.get("messages") or []
+        chars = message_chars(messages)
+        tools = payload.get("tools")
+        if tools:
+            # Tool schemas count toward prompt tokens; size them once per list
+            if self._tools_chars[0] != id(tools):
+                encoded = getattr(tools, "json", None)
+                self._tools_chars = (id(tools), len(encoded) if encoded is not None else len(json.dumps(tools)))
+            chars += self._tools_chars[1]
+        self.estimator.observe(chars, len(messages), prompt_tokens)
+
+    def _send(self, payload: Dict[str, Any], on_delta: Optional[DeltaCallback] = None, started: Optional[asyncio.Event] = None) -> Awaitable[Dict[str, Any]]:
+        """Return the upstream request coroutine, streaming when ``on_delta`` is set."""
+        if on_delta is None:
+            return self._post(payload, started)
+        return self._post_stream(payload, on_delta, started)
+
+    async def _attempt(self, payload: Dict[str, Any], on_delta: Optional[DeltaCallback] = None, started: Optional[asyncio.Event] = None) -> Tuple[str, Dict[str, Any]]:
+        """Send one request, hedging to a secondary model when configured.
+
+        Models listed in ``llm.hedging.models`` get a duplicate request to
+        their secondary if no response headers arrive within the model's
+        latency-percentile delay; the first success wins. ``started`` is set
+        once either request's response headers arrive.
+
+        Returns:
+            The model that produced the response, and the response.
+        """
         model = payload["model"]
-        base_url, bearer = resolve_provider(model, self.cfg)
-        url = f"{base_url}/chat/completions"
+        secondary = self.hedging.secondary_for(model)
+        if secondary is None:
+            return (model, await self._send(payload, on_delta, started))
+        self.hedging.eligible += 1
+        sec_provider = registry_for(self.cfg.llm).resolve(secondary).provider
+        sec_payload = payload if secondary == model else self._retarget(payload, secondary)
 
+        def _admit() -> bool:
+            if not self.hedging.admit() or self.breaker(sec_provider).state == OPEN:
+                return False
+            self.hedging.hedged += 1
+            self.metrics["hedged"] += 1
+            return True
+
+        async def _tagged(data: Dict[str, Any], started: asyncio.Event, cb: Optional[DeltaCallback]) -> Tuple[str, Dict[str, Any]]:
+            return (data["model"], await self._send(data, cb, started))
+
+        return await race(
+            lambda started, cb: _tagged(payload, started, cb),
+            lambda started, cb: _tagged(sec_payload, started, cb),
+            self.hedging.delay_for(model),
+            on_delta,
+            _admit,
+            started,
+        )
+
+    async def _post(self, payload: Dict[str, Any], started: Optional[asyncio.Event] = None) -> Dict[str, Any]:
+        """Send one non-streaming chat.completions request upstream.
+
+        Waits for a scheduler slot first and retries HTTP 429 responses
+        after the server-requested backoff. ``started`` is set once response
+        headers arrive.
+        """
+        model = payload["model"]
+        info = registry_for(self.cfg.llm).resolve(model)
         headers = {
-            "Authorization": f"Bearer {bearer}",
+            "Authorization": f"Bearer {info.api_key}",
             "Content-Type": "application/json",
         }
-
-        async with httpx.AsyncClient(timeout=httpx.Timeout(self.cfg.llm.timeout)) as client:
-            res = await client.post(url, headers=headers, json=payload)
+        client = self._client_for(info.base_url)
+        est_tokens = _estimate_tokens(payload)
+        attempt = 0
+        while True:
+            async with self.limiter.slot(info.provider, model, est_tokens):
+                request = client.build_request("POST", f"{info.base_url}/chat/completions", headers=headers, content=_encode_payload(payload))
+                sent = time.monotonic()
+                res = await client.send(request, stream=True)
+                try:
+                    self._headers_received(model, res, sent, started)
+                    await res.aread()
+                finally:
+                    await res.aclose()
+            backoff = self.limiter.observe(info.provider, model, res.status_code, res.headers)
+            if backoff is not None and attempt < self.cfg.llm.rate_limit_retries:
+                attempt += 1
+                continue
             res.raise_for_status()
             return res.json()
+
+    def _headers_received(self, model: str, res: httpx.Response, sent: float, started: Optional[asyncio.Event]) -> None:
+        """Record time-to-headers for successful responses and signal hedging."""
+        if res.is_success:
+            self.hedging.latency.observe(model, time.monotonic() - sent)
+        if started is not None:
+            started.set()
+
+    async def chat_stream(self, payload: Dict[str, Any], on_delta: Optional[DeltaCallback] = None) -> Dict[str, Any]:
+        """Make a streaming chat.completions call and assemble the result.
+
+        Reads the SSE ``stream: true`` response, invoking ``on_delta`` with
+        the accumulated content after each content chunk, and merges
+        ``tool_calls`` deltas so the returned value has the same shape as a
+        non-streaming :meth:`chat` response.
+
+        Args:
+            payload: OpenAI-compatible request payload.
+            on_delta: Optional async callback receiving the full text so far.
+
+        Returns:
+            A chat.completions-shaped dictionary with a single choice.
+        """
+        key = self._cache_key(payload)
+        if key is not None:
+            cached = await self.cache.get(key)  # type: ignore[union-attr]
+            if cached is not None:
+                content = ((cached.get("choices") or [{}])[0].get("message") or {}).get("content")
+                if content and on_delta is not None:
+                    await on_delta(content)
+                return cached
+        result = await self._dispatch(payload, on_delta)
+        message = result["choices"][0]["message"]
+        if key is not None and (message.get("content") or message.get("tool_calls")):
+            await self.cache.set(key, result)  # type: ignore[union-attr]
+        return result
+
+    async def _post_stream(self, payload: Dict[str, Any], on_delta: Optional[DeltaCallback], started: Optional[asyncio.Event] = None) -> Dict[str, Any]:
+        """Send one streaming chat.completions request and assemble it.
+
+        The scheduler slot is held for the whole stream; HTTP 429 responses
+        are retried like in :meth:`_post`.
+        """
+        model = payload["model"]
+        info = registry_for(self.cfg.llm).resolve(model)
+        headers = {
+            "Authorization": f"Bearer {info.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream",
+        }
+        body = dict(payload)
+        body["stream"] = True
+        if info.provider in _STREAM_USAGE_PROVIDERS:
+            body["stream_options"] = {"include_usage": True}
+        client = self._client_for(info.base_url)
+        est_tokens = _estimate_tokens(payload)
+        attempt = 0
+        while True:
+            async with self.limiter.slot(info.provider, model, est_tokens):
+                sent = time.monotonic()
+                async with client.stream("POST", f"{info.base_url}/chat/completions", headers=headers, content=_encode_payload(body)) as res:
+                    self._headers_received(model, res, sent, started)
+                    backoff = self.limiter.observe(info.provider, model, res.status_code, res.headers)
+                    if backoff is None or attempt >= self.cfg.llm.rate_limit_retries:
+                        if res.is_error:
+                            await res.aread()
+                        res.raise_for_status()
+                        return await self._read_stream(model, res, on_delta)
+            attempt += 1
+
+    async def _read_stream(self, model: str, res: httpx.Response, on_delta: Optional[DeltaCallback]) -> Dict[str, Any]:
+        """Consume an SSE chat.completions stream into a single result."""
+        parts: List[str] = []
+        calls: Dict[int, Dict[str, Any]] = {}
+        finish_reason: Optional[str] = None
+        usage: Optional[Dict[str, Any]] = None
+        async for line in res.aiter_lines():
+            line = line.strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except Exception:
+                logger.debug("Skipping malformed stream chunk: %s", data[:200])
+                continue
+            if chunk.get("usage"):
+                usage = chunk["usage"]
+            for choice in chunk.get("choices") or []:
+                delta = choice.get("delta") or {}
+                for tc in delta.get("tool_calls") or []:
+                    _merge_tool_call_delta(calls, tc)
+                if choice.get("finish_reason"):
+                    finish_reason = choice["finish_reason"]
+                piece = delta.get("content")
+                if piece:
+                    parts.append(piece)
+                    if on_delta is not None:
+                        await on_delta("".join(parts))
+
+        message: Dict[str, Any] = {"role": "assistant", "content": "".join(parts)}
+        if calls:
+            message["tool_calls"] = [calls[i] for i in sorted(calls)]
+        result: Dict[str, Any] = {"model": model, "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}]}
+        if usage is not None:
+            result["usage"] = usage
+        return result
+
+    async def aclose(self) -> None:
+        """Close every pooled provider client, ignoring failures."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                logger.debug("Failed to close pooled HTTP client", exc_info=True)
@@ -3,10 +3,14 @@ from __future__ import annotations
 import asyncio
 import mimetypes
 import os
-from typing import Any, Awaitable, Callable, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 
-import markdown
-from nio import AsyncClient, AsyncClientConfig, MatrixRoom, RoomMessageText, KeyVerificationEvent
+from nio import AsyncClient, AsyncClientConfig, MatrixRoom, RoomMemberEvent, RoomMessageText, SyncResponse, KeyVerificationEvent
+
+from .cache import TTLCache
+from .names import NameIndex
+from .render import MarkdownRenderer
+from .request_context import current_room
 
 
 TextHandler = Callable[[Any, Any], Awaitable[None]]
@@ -22,6 +26,8 @@ class MatrixClientWrapper:
         device_id: str = "",
         store_path: str = "store",
         encryption_enabled: bool = True,
+        display_name_ttl: float = 3600.0,
+        renderer: Optional[MarkdownRenderer] = None,
     ) -> None:
         """Initialize the underlying nio client and store configuration.
 
@@ -32,6 +38,9 @@ class MatrixClientWrapper:
             device_id: Optional persisted device ID for E2EE.
             store_path: Directory for SQLite store files.
             encryption_enabled: Whether to enable E2EE features.
+            display_name_ttl: Seconds a display name fetched from the
+                profile API is reused.
+            renderer: Shared Markdown renderer for :meth:`send_markdown`.
         """
         # Ensure store path exists for nio's SQLite store (peewee) to open DB
         try:
@@ -46,6 +55,15 @@ class MatrixClientWrapper:
         except Exception:
             pass
         self.password = password
+        self.renderer = renderer or MarkdownRenderer()
+        # Profile-API fallback for users not found in synced member state
+        self._display_names: TTLCache = TTLCache(max_entries=4096, ttl=display_name_ttl)
+        # Per-room name tries, built on first use and kept current by member events
+        self._name_indexes: Dict[str, NameIndex] = {}
+        try:
+            self.client.add_event_callback(self._on_member, RoomMemberEvent)  # type: ignore
+        except Exception:
+            pass
 
     async def login(self) -> Any:
         """Log in to Matrix and return the server response object."""
@@ -68,25 +86,44 @@ class MatrixClientWrapper:
         """Join a room by ID or alias."""
         await self.client.join(room_id)
 
-    async def send_text(self, room_id: str, body: str, html: Optional[str] = None) -> None:
+    async def send_text(self, room_id: str, body: str, html: Optional[str] = None) -> Optional[str]:
         """Send a text message, optionally with HTML formatting.
 
         Args:
             room_id: Target room ID.
             body: Plaintext body.
             html: Optional formatted body; when provided, sends custom HTML.
+
+        Returns:
+            The event ID of the sent message when the server returns one.
         """
         content = {"msgtype": "m.text", "body": body}
         if html is not None:
             content.update({"format": "org.matrix.custom.html", "formatted_body": html})
+        res = await self.client.room_send(room_id=room_id, message_type="m.room.message", content=content, ignore_unverified_devices=True)
+        return getattr(res, "event_id", None)
+
+    async def edit_text(self, room_id: str, event_id: str, body: str, html: Optional[str] = None) -> None:
+        """Replace the content of a previously sent message (``m.replace``).
+
+        Args:
+            room_id: Room containing the original message.
+            event_id: Event ID of the message to edit.
+            body: New plaintext body.
+            html: Optional new formatted body.
+        """
+        new_content = {"msgtype": "m.text", "body": body}
+        content = {"msgtype": "m.text", "body": f"* {body}"}
+        if html is not None:
+            new_content.update({"format": "org.matrix.custom.html", "formatted_body": html})
+            content.update({"format": "org.matrix.custom.html", "formatted_body": f"* {html}"})
+        content["m.new_content"] = new_content
+        content["m.relates_to"] = {"rel_type": "m.replace", "event_id": event_id}
         await self.client.room_send(room_id=room_id, message_type="m.room.message", content=content, ignore_unverified_devices=True)
 
     async def send_markdown(self, room_id: str, message: str) -> None:
         """Render Markdown to HTML and send as a message."""
-        try:
-            html = markdown.markdown(message, extensions=["extra", "fenced_code", "nl2br", "sane_lists", "tables", "codehilite", "wikilinks", "footnotes"])  # type: ignore
-        except Exception:
-            html = None
+        html = await self.renderer.render_async(message)
         await self.send_text(room_id, message, html=html)
 
     async def send_image(self, room_id: str, path: str, filename: str | None, log) -> None:
@@ -120,13 +157,87 @@ class MatrixClientWrapper:
             log(f"Error sending image to {room_id}: {e}")
             await self.send_markdown(room_id, f"Sorry, an error occurred while trying to send the image: {e}")
 
-    async def display_name(self, user_id: str) -> str:
-        """Fetch a user's display name, falling back to user ID on error."""
+    async def display_name(self, user_id: str, room_id: Optional[str] = None) -> str:
+        """Return a user's display name, falling back to user ID on error.
+
+        Looks in the synced member state of ``room_id`` (or the room of the
+        command being handled) first, then a TTL cache of profile lookups,
+        and only then asks the homeserver.
+
+        Args:
+            user_id: Matrix user ID.
+            room_id: Optional room whose member list is consulted.
+        """
+        name = self._member_name(user_id, room_id or current_room.get())
+        if name is not None:
+            return name
+        cached = self._display_names.get(user_id)
+        if cached is not None:
+            return cached
         try:
             res = await self.client.get_displayname(user_id)
-            return getattr(res, "displayname", user_id)
         except Exception:
             return user_id
+        if not hasattr(res, "displayname"):
+            return user_id
+        name = res.displayname
+        if name is not None:
+            self._display_names.set(user_id, name)
+        return name
+
+    def _member_name(self, user_id: str, room_id: Optional[str]) -> Optional[str]:
+        """Return a display name from nio's synced room member state."""
+        rooms = getattr(self.client, "rooms", None)
+        if not room_id or not rooms:
+            return None
+        room = rooms.get(room_id)
+        user = room.users.get(user_id) if room is not None else None
+        return getattr(user, "display_name", None)
+
+    def _shares_other_room(self, user_id: str, room_id: Optional[str]) -> bool:
+        """Return whether a user is a member of any synced room besides ``room_id``."""
+        rooms = getattr(self.client, "rooms", None) or {}
+        return any(rid != room_id and user_id in getattr(r, "users", {}) for rid, r in dict(rooms).items())
+
+    def name_index(self, room_id: str) -> Optional[NameIndex]:
+        """Return the display-name index for a room, or None if not synced.
+
+        Built from nio's member state on first use and updated from
+        ``m.room.member`` events afterwards.
+        """
+        index = self._name_indexes.get(room_id)
+        if index is not None:
+            return index
+        rooms = getattr(self.client, "rooms", None)
+        room = rooms.get(room_id) if rooms else None
+        if room is None:
+            return None
+        index = NameIndex()
+        for user_id, user in dict(room.users).items():
+            index.add(user_id, getattr(user, "display_name", None))
+        self._name_indexes[room_id] = index
+        return index
+
+    async def _on_member(self, room: MatrixRoom, event: RoomMemberEvent) -> None:
+        """Keep the profile cache and name indexes in step with ``m.room.member`` changes."""
+        user_id = getattr(event, "state_key", None)
+        if not user_id:
+            return
+        room_id = getattr(room, "room_id", None)
+        name = (getattr(event, "content", None) or {}).get("displayname")
+        joined = getattr(event, "membership", None) == "join"
+        if joined and name:
+            self._display_names.set(user_id, name)
+        elif joined or not self._shares_other_room(user_id, room_id):
+            # The profile cache is global: leaving one room keeps the entry
+            # while the user is still seen in another
+            self._display_names.pop(user_id)
+        index = self._name_indexes.get(room_id)
+        if index is not None:
+            if joined:
+                index.add(user_id, name)
+            else:
+                index.remove(user_id)
 
     def add_text_handler(self, handler: TextHandler) -> None:
         """Register a RoomMessageText callback that wraps your handler."""
@@ -141,6 +252,13 @@ class MatrixClientWrapper:
         except Exception:
             pass
 
+    def add_sync_callback(self, callback: Callable[[Any], Awaitable[None]]) -> None:
+        """Register a callback run with every sync response, ignoring errors when unsupported."""
+        try:
+            self.client.add_response_callback(callback, SyncResponse)  # type: ignore
+        except Exception:
+            pass
+
     async def initial_sync(self, timeout_ms: int = 3000) -> None:
         """Perform a one-time sync after login."""
         await self.client.sync(timeout=timeout_ms, full_state=True)
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Resolution order matters when a model ID appears under several providers:
+# the first provider listed here wins, matching the historical lookup order.
+PROVIDER_ORDER: Tuple[str, ...] = (
+    "openai",
+    "xai",
+    "google",
+    "mistral",
+    "anthropic",
+    "deepseek",
+    "qwen",
+    "ollama",
+    "lmstudio",
+)
+
+LOCAL_PROVIDERS: Tuple[str, ...] = ("ollama", "lmstudio")
+
+_PROVIDER_URLS: Dict[str, str] = {
+    "openai": "https://api.openai.com/v1",
+    "xai": "https://api.x.ai/v1",
+    # Google OpenAI-compatible
+    "google": "https://generativelanguage.googleapis.com/v1beta/openai",
+    "mistral": "https://api.mistral.ai/v1",
+    "anthropic": "https://api.anthropic.com/v1",
+    "deepseek": "https://api.deepseek.com/v1",
+    # if you are using qwen singapore API，you should use "https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
+    "qwen": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+}
+
+_LOCAL_BEARER = "hello_friend"
+
+
+def _applies_options(model: str, provider: str) -> bool:
+    """Return True when generic ``llm.options`` may be sent for a model.
+
+    Google/Gemini and some reasoning models reject the generic option set.
+    """
+    return provider != "google" and model != "grok-4" and not model.startswith("gpt-5-")
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    """Immutable routing and policy record for one model ID.
+
+    Attributes:
+        name: Model identifier.
+        provider: Provider name the model is configured under.
+        base_url: OpenAI-compatible base URL for the provider.
+        api_key: Bearer token to send.
+        apply_options: Whether generic ``llm.options`` should be merged.
+        local: True for self-hosted backends (Ollama, LM Studio).
+    """
+    name: str
+    provider: str
+    base_url: str
+    api_key: str
+    apply_options: bool
+    local: bool
+
+
+class ModelRegistry:
+    """Precomputed, read-only index from model ID to :class:`ModelInfo`.
+
+    Built once from the provider/model mapping so per-request lookups are a
+    single dict access instead of scanning every provider list. Instances
+    are never mutated; configuration changes produce a new registry.
+    """
+
+    def __init__(
+        self,
+        models: Mapping[str, List[str]],
+        api_keys: Optional[Mapping[str, str]] = None,
+        ollama_url: str = "localhost:11434",
+        lmstudio_url: str = "localhost:1234",
+    ) -> None:
+        """Build the index.
+
+        Args:
+            models: Mapping of provider name to list of model IDs.
+            api_keys: Mapping of provider name to API key.
+            ollama_url: Host:port of the Ollama OpenAI-compatible API.
+            lmstudio_url: Host:port of the LM Studio OpenAI-compatible API.
+        """
+        keys = dict(api_keys or {})
+        urls = dict(_PROVIDER_URLS)
+        urls["ollama"] = f"http://{ollama_url}/v1"
+        urls["lmstudio"] = f"http://{lmstudio_url}/v1"
+
+        def _info(model: str, provider: str) -> ModelInfo:
+            local = provider in LOCAL_PROVIDERS
+            known = provider in urls
+            return ModelInfo(
+                name=model,
+                provider=provider,
+                # Unknown providers are treated as OpenAI-compatible
+                base_url=urls[provider] if known else urls["openai"],
+                api_key=_LOCAL_BEARER if local else keys.get(provider if known else "openai", ""),
+                apply_options=_applies_options(model, provider),
+                local=local,
+            )
+
+        ordered = [p for p in PROVIDER_ORDER if p in models] + [p for p in models if p not in PROVIDER_ORDER]
+        entries: Dict[str, ModelInfo] = {}
+        for provider in ordered:
+            for model in models.get(provider) or []:
+                if model not in entries:
+                    entries[model] = _info(model, provider)
+        self._entries = MappingProxyType(entries)
+        self._by_provider = MappingProxyType({p: tuple(models.get(p) or []) for p in models})
+        self._fallback_url = urls["openai"]
+        self._fallback_key = keys.get("openai", "")
+        self.names: Tuple[str, ...] = tuple(m for ms in models.values() for m in (ms or []))
+        self.sorted_names: Tuple[str, ...] = tuple(sorted(self.names))
+
+    @classmethod
+    def from_config(cls, llm: Any) -> "ModelRegistry":
+        """Build a registry from an ``LLMConfig`` (or compatible object)."""
+        return cls(
+            getattr(llm, "models", {}) or {},
+            getattr(llm, "api_keys", {}) or {},
+            getattr(llm, "ollama_url", "localhost:11434"),
+            getattr(llm, "lmstudio_url", "localhost:1234"),
+        )
+
+    def __contains__(self, model: object) -> bool:
+        return model in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, model: str) -> Optional[ModelInfo]:
+        """Return the record for a configured model, or None."""
+        return self._entries.get(model)
+
+    def resolve(self, model: str) -> ModelInfo:
+        """Return the record for a model, falling back to OpenAI routing.
+
+        Args:
+            model: Model identifier.
+
+        Returns:
+            The configured record, or an OpenAI-compatible record for
+            unknown model IDs.
+        """
+        info = self._entries.get(model)
+        if info is not None:
+            return info
+        return ModelInfo(model, "openai", self._fallback_url, self._fallback_key, _applies_options(model, "openai"), False)
+
+    def provider_models(self, provider: str) -> Tuple[str, ...]:
+        """Return the configured model IDs for a provider."""
+        return self._by_provider.get(provider, ())
+
+
+# Attribute on the config object holding ``(stamp, registry)``, so the
+# cached registry lives and dies with the config it was built from
+_CACHE_ATTR = "_model_registry"
+
+
+def _stamp(llm: Any) -> Tuple[Any, ...]:
+    """Return a cheap fingerprint that changes when routing inputs change."""
+    models = getattr(llm, "models", {}) or {}
+    return (
+        id(models),
+        tuple(len(v or ()) for v in models.values()),
+        id(getattr(llm, "api_keys", None)),
+        getattr(llm, "ollama_url", None),
+        getattr(llm, "lmstudio_url", None),
+    )
+
+
+def registry_for(llm: Any) -> ModelRegistry:
+    """Return the registry for an ``LLMConfig``, rebuilding it on change.
+
+    The registry is cached on ``llm`` itself. Code that edits ``llm``
+    routing fields in place must call :func:`invalidate_registry`; as a
+    safety net the registry is also rebuilt when the models mapping or API
+    keys are replaced, a provider list changes length, or a local backend
+    URL is overridden. The new registry replaces the old one in a single
+    step.
+
+    Args:
+        llm: LLM configuration object.
+
+    Returns:
+        The current :class:`ModelRegistry` for ``llm``.
+    """
+    stamp = _stamp(llm)
+    cached = getattr(llm, _CACHE_ATTR, None)
+    if isinstance(cached, tuple) and cached[0] == stamp:
+        return cached[1]
+    registry = ModelRegistry.from_config(llm)
+    try:
+        setattr(llm, _CACHE_ATTR, (stamp, registry))
+    except (AttributeError, TypeError):
+        # Read-only config objects simply rebuild on every lookup
+        pass
+    return registry
+
+
+def invalidate_registry(llm: Any) -> None:
+    """Drop the cached registry for ``llm`` so the next lookup rebuilds it."""
+    try:
+        delattr(llm, _CACHE_ATTR)
+    except (AttributeError, TypeError):
+        pass
+
+
+def registry_from_context(ctx: Any) -> ModelRegistry:
+    """Return the model registry exposed by an app context.
+
+    Falls back to building one from ``ctx.models`` for lightweight contexts.
+    """
+    registry = getattr(ctx, "registry", None)
+    if isinstance(registry, ModelRegistry):
+        return registry
+    return ModelRegistry(getattr(ctx, "models", {}) or {})
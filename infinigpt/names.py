@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+# Trie key holding the user IDs whose name ends at a node; real keys are
+# single characters, so the empty string never collides.
+_END = ""
+
+
+class NameIndex:
+    """Prefix trie over one room's display names and user IDs.
+
+    Resolves the longest name that prefixes a message (``.x Jane Doe hi``)
+    with a single walk over the text, independent of room size.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._root: Dict[str, Any] = {}
+        self._names: Dict[str, Set[str]] = {}
+
+    def __contains__(self, user_id: object) -> bool:
+        return user_id in self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, user_id: str, display_name: Optional[str] = None) -> None:
+        """Index a user under their user ID and display name, replacing old names."""
+        self.remove(user_id)
+        names = {user_id}
+        if display_name:
+            names.add(display_name)
+        self._names[user_id] = names
+        for name in names:
+            node = self._root
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node.setdefault(_END, set()).add(user_id)
+
+    def remove(self, user_id: str) -> None:
+        """Drop a user and prune trie branches left empty."""
+        for name in self._names.pop(user_id, ()):
+            path = [self._root]
+            for ch in name:
+                nxt = path[-1].get(ch)
+                if nxt is None:
+                    break
+                path.append(nxt)
+            else:
+                users = path[-1].get(_END)
+                if users is not None:
+                    users.discard(user_id)
+                    if not users:
+                        del path[-1][_END]
+                for ch, node in zip(reversed(name), reversed(path[:-1])):
+                    if node[ch]:
+                        break
+                    del node[ch]
+
+    def longest_prefix(self, text: str, accept: Optional[Callable[[str], bool]] = None) -> Optional[Tuple[str, str, str]]:
+        """Find the longest indexed name that starts ``text`` as a whole word.
+
+        Args:
+            text: Text beginning with a name, e.g. ``"Jane Doe hello"``.
+            accept: Optional predicate a user ID must satisfy.
+
+        Returns:
+            Tuple of (user_id, matched name, remaining text), or None.
+        """
+        best: Optional[Tuple[str, str, str]] = None
+        node = self._root
+        for i, ch in enumerate(text):
+            node = node.get(ch)
+            if node is None:
+                break
+            users = node.get(_END)
+            end = i + 1
+            if users and (end == len(text) or text[end] == " "):
+                for user_id in sorted(users):
+                    if accept is None or accept(user_id):
+                        best = (user_id, text[:end], text[end + 1 :])
+                        break
+        return best
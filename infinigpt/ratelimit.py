@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# Self-hosted backends serve a fixed number of parallel slots; exceeding it
+# only queues work inside the server and thrashes its KV cache.
+DEFAULT_LIMITS: Dict[str, Dict[str, Any]] = {
+    "ollama": {"concurrency": 1},
+    "lmstudio": {"concurrency": 1},
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate-limit duration header into seconds.
+
+    Accepts plain seconds (``"2"``, ``"0.5"``), Go-style durations used by
+    ``x-ratelimit-reset-*`` headers (``"1m30s"``, ``"20ms"``) and HTTP dates
+    used by ``Retry-After``.
+
+    Args:
+        value: Raw header value.
+
+    Returns:
+        Seconds to wait, or None when the value is missing or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Return the server-requested backoff from a 429/503 response's headers."""
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return max(0.0, float(ms) / 1000.0)
+        except ValueError:
+            pass
+    delay = parse_duration(headers.get("retry-after"))
+    if delay is not None:
+        return delay
+    resets = [parse_duration(headers.get(h)) for h in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")]
+    known = [r for r in resets if r is not None]
+    return max(known) if known else None
+
+
+class TokenBucket:
+    """Continuous-refill token bucket expressed in units per minute."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        """Create a full bucket.
+
+        Args:
+            per_minute: Refill rate in units per minute.
+            capacity: Burst size; defaults to one minute of refill.
+        """
+        self.rate = float(per_minute) / 60.0
+        self.capacity = float(capacity if capacity is not None else per_minute)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add tokens accrued since the last update."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Return seconds until ``amount`` units are available (0 if now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def consume(self, amount: float) -> None:
+        """Take ``amount`` units (may go negative for oversized requests)."""
+        self._refill()
+        self.tokens -= amount
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after the server reports exhaustion."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+
+
+class _Limit:
+    """Concurrency, request-rate and token-rate limits for one scope."""
+
+    def __init__(self, name: str, spec: Mapping[str, Any]) -> None:
+        self.name = name
+        concurrency = spec.get("concurrency")
+        self.semaphore = asyncio.Semaphore(int(concurrency)) if concurrency else None
+        self.requests = TokenBucket(float(spec["rpm"])) if spec.get("rpm") else None
+        self.tokens = TokenBucket(float(spec["tpm"])) if spec.get("tpm") else None
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait_for_budget(self, est_tokens: int) -> None:
+        """Sleep until the request and token buckets admit one request."""
+        async with self.lock:
+            while True:
+                delay = max(0.0, self.blocked_until - time.monotonic())
+                if self.requests is not None:
+                    delay = max(delay, self.requests.delay_for(1))
+                if self.tokens is not None:
+                    delay = max(delay, self.tokens.delay_for(est_tokens))
+                if delay <= 0:
+                    break
+                logger.debug("Rate limit '%s': waiting %.2fs", self.name, delay)
+                await asyncio.sleep(delay)
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(est_tokens)
+
+    def block_for(self, seconds: float) -> None:
+        """Hold back new requests for ``seconds``."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Per-provider (and optional per-model) request scheduler.
+
+    Limits are configured in ``llm.rate_limits`` keyed by provider name or
+    model ID, each with optional ``concurrency``, ``rpm`` and ``tpm``. A
+    request must pass every matching scope. Requests over budget wait in
+    line rather than failing, and ``Retry-After``/``x-ratelimit-*``
+    response headers pause the affected scopes.
+    """
+
+    def __init__(self, limits: Optional[Mapping[str, Mapping[str, Any]]] = None) -> None:
+        """Create the scheduler.
+
+        Args:
+            limits: Mapping of provider or model name to limit spec; merged
+                over :data:`DEFAULT_LIMITS`.
+        """
+        specs: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in DEFAULT_LIMITS.items()}
+        for key, spec in (limits or {}).items():
+            if isinstance(spec, Mapping):
+                specs.setdefault(key, {}).update(spec)
+        self._specs = specs
+        self._limits: Dict[str, _Limit] = {}
+
+    def _scopes(self, provider: str, model: str) -> List[_Limit]:
+        """Return the limit scopes that apply to a request (provider first)."""
+        scopes: List[_Limit] = []
+        for key in (provider, model):
+            if key in self._specs:
+                limit = self._limits.get(key)
+                if limit is None:
+                    limit = self._limits[key] = _Limit(key, self._specs[key])
+                if limit not in scopes:
+                    scopes.append(limit)
+        return scopes
+
+    @asynccontextmanager
+    async def slot(self, provider: str, model: str, est_tokens: int = 0) -> AsyncIterator[None]:
+        """Wait for budget and a concurrency slot, holding it for the block.
+
+        Args:
+            provider: Provider name of the request.
+            model: Model ID of the request.
+            est_tokens: Estimated prompt plus completion tokens.
+        """
+        scopes = self._scopes(provider, model)
+        acquired: List[asyncio.Semaphore] = []
+        try:
+            for scope in scopes:
+                if scope.semaphore is not None:
+                    await scope.semaphore.acquire()
+                    acquired.append(scope.semaphore)
+            for scope in scopes:
+                await scope.wait_for_budget(est_tokens)
+            yield
+        finally:
+            for sem in reversed(acquired):
+                sem.release()
+
+    def observe(self, provider: str, model: str, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Update limits from a provider response.
+
+        Args:
+            provider: Provider name of the request.
+            model: Model ID of the request.
+            status: HTTP status code.
+            headers: Response headers.
+
+        Returns:
+            Seconds to back off before retrying when the response was a 429
+            (a default is used when the server gives no hint); otherwise None.
+        """
+        scopes = self._scopes(provider, model)
+        if status == 429:
+            delay = retry_after(headers)
+            if delay is None:
+                delay = 1.0
+            if not scopes:
+                # Unconfigured provider: create an implicit scope to honor the pause
+                self._specs.setdefault(provider, {})
+                scopes = self._scopes(provider, model)
+            for scope in scopes:
+                scope.block_for(delay)
+            logger.warning("Provider %s rate limited %s; backing off %.2fs", provider, model, delay)
+            return delay
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                exhausted = float(remaining) <= 0
+            except ValueError:
+                continue
+            if exhausted:
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                for scope in scopes:
+                    if reset:
+                        scope.block_for(reset)
+                    bucket = scope.requests if kind == "requests" else scope.tokens
+                    if bucket is not None:
+                        bucket.drain()
+        return None
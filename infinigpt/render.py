@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Executor
+from typing import Any, List, Optional, Sequence
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Matches what send_markdown always rendered; "extra" already covers footnotes
+DEFAULT_EXTENSIONS = ("extra", "fenced_code", "nl2br", "sane_lists", "tables", "codehilite", "wikilinks")
+
+
+class MarkdownRenderer:
+    """Shared Markdown-to-HTML service.
+
+    Keeps a small pool of pre-built ``markdown.Markdown`` converters
+    (building one loads every extension, including Pygments for
+    ``codehilite``), an LRU cache of rendered HTML for repeated bodies, and
+    renders large bodies on a worker thread so the event loop keeps
+    syncing. Converters are not thread-safe, hence the pool.
+    """
+
+    def __init__(
+        self,
+        extensions: Sequence[str] = DEFAULT_EXTENSIONS,
+        cache_size: int = 256,
+        offload_chars: int = 4096,
+        pool_size: int = 4,
+    ) -> None:
+        """Create the renderer.
+
+        Args:
+            extensions: Markdown extensions enabled on every converter.
+            cache_size: Rendered bodies kept in the LRU cache.
+            offload_chars: Bodies at least this long render off the loop in
+                :meth:`render_async`.
+            pool_size: Idle converters kept for reuse.
+        """
+        self.extensions = list(extensions)
+        self.offload_chars = int(offload_chars)
+        self.pool_size = max(1, int(pool_size))
+        # Only touched from the event loop thread
+        self._cache: TTLCache = TTLCache(max_entries=cache_size)
+        self._pool: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> Any:
+        """Take an idle converter from the pool or build a new one."""
+        with self._lock:
+            if self._pool:
+                return self._pool.pop()
+        import markdown
+
+        return markdown.Markdown(extensions=self.extensions)
+
+    def _release(self, converter: Any) -> None:
+        """Reset a converter and return it to the pool if there is room."""
+        converter.reset()
+        with self._lock:
+            if len(self._pool) < self.pool_size:
+                self._pool.append(converter)
+
+    def _convert(self, body: str) -> Optional[str]:
+        """Render without touching the cache; safe to call from any thread."""
+        try:
+            converter = self._acquire()
+        except Exception:
+            logger.debug("Markdown unavailable", exc_info=True)
+            return None
+        try:
+            return converter.convert(body)
+        except Exception:
+            logger.debug("Markdown rendering failed", exc_info=True)
+            return None
+        finally:
+            self._release(converter)
+
+    def render(self, body: str) -> Optional[str]:
+        """Render Markdown to HTML on the calling thread.
+
+        Args:
+            body: Markdown text.
+
+        Returns:
+            HTML, or None if rendering failed.
+        """
+        html = self._cache.get(body)
+        if html is None:
+            html = self._convert(body)
+            if html is not None:
+                self._cache.set(body, html)
+        return html
+
+    async def render_async(self, body: str, executor: Optional[Executor] = None) -> Optional[str]:
+        """Render Markdown to HTML, offloading large bodies to a worker thread.
+
+        Args:
+            body: Markdown text.
+            executor: Optional executor for large bodies; defaults to the
+                loop's default executor.
+
+        Returns:
+            HTML, or None if rendering failed.
+        """
+        html = self._cache.get(body)
+        if html is not None:
+            return html
+        if len(body) < self.offload_chars:
+            return self.render(body)
+        html = await asyncio.get_running_loop().run_in_executor(executor, self._convert, body)
+        if html is not None:
+            self._cache.set(body, html)
+        return html
+
+
+async def render_reply(ctx: Any, body: str) -> Optional[str]:
+    """Render a reply body via the context, off the loop when supported.
+
+    Args:
+        ctx: App context exposing ``render`` and optionally ``render_async``.
+        body: Markdown text.
+
+    Returns:
+        HTML, or None when rendering is disabled or failed.
+    """
+    render_async = getattr(ctx, "render_async", None)
+    if render_async is not None:
+        return await render_async(body)
+    return ctx.render(body)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Per-request attribution used by lower layers (LLM client, caches) without
+# threading room/user through every call signature.
+current_room: ContextVar[Optional[str]] = ContextVar("infinigpt_room", default=None)
+current_user: ContextVar[Optional[str]] = ContextVar("infinigpt_user", default=None)
+
+
+@contextmanager
+def request_scope(room_id: Optional[str], user_id: Optional[str]) -> Iterator[None]:
+    """Bind the room and user of the command being handled.
+
+    Args:
+        room_id: Matrix room ID.
+        user_id: Matrix user ID of the sender.
+    """
+    room_token = current_room.set(room_id)
+    user_token = current_user.set(user_id)
+    try:
+        yield
+    finally:
+        current_room.reset(room_token)
+        current_user.reset(user_token)
@@ -1,5 +1,6 @@
+import inspect
 import logging
-from typing import Any, Optional
+from typing import Any, Dict, FrozenSet, Iterable, Optional
 
 try:
     from nio import (
@@ -31,6 +32,25 @@ class Security:
         """
         self.matrix = matrix_client
         self.logger = logger or logging.getLogger(__name__)
+        # user ID -> device IDs already verified; dropped when nio reports
+        # a device-list change for the user
+        self._trusted: Dict[str, FrozenSet[str]] = {}
+
+    async def on_sync(self, response: Any) -> None:
+        """Invalidate cached trust for users whose device lists changed.
+
+        Registered as a sync response callback; reads
+        ``device_lists.changed``/``left`` from each sync.
+
+        Args:
+            response: A nio ``SyncResponse``.
+        """
+        device_list = getattr(response, "device_list", None)
+        if device_list is None:
+            return
+        for user_id in list(getattr(device_list, "changed", []) or []) + list(getattr(device_list, "left", []) or []):
+            if self._trusted.pop(user_id, None) is not None:
+                self.logger.debug("device list changed for %s; trust cache invalidated", user_id)
 
     async def log_to_device_event(self, event: Any) -> None:
         """Log to-device events and auto-respond to verification requests.
@@ -110,30 +130,49 @@ class Security:
     async def allow_devices(self, user_id: str) -> None:
         """Mark and verify devices for a given user when possible.
 
+        Users whose devices were already verified are skipped without any
+        network I/O until a sync reports a device-list change for them.
+        Keys are only queried when nio has the user pending a key query.
+
         Args:
             user_id: Matrix user ID whose devices should be trusted.
         """
+        if user_id in self._trusted:
+            return
         c = getattr(self.matrix, "client", None)
         if c is None:
             return
         try:
-            if hasattr(c, "query_keys"):
-                await c.query_keys([user_id])  # type: ignore
+            if user_id in (getattr(c, "users_for_key_query", None) or ()) and hasattr(c, "keys_query"):
+                await c.keys_query()  # type: ignore
         except Exception:
             pass
         try:
-            store = getattr(c, "device_store", None)
-            devices = {}
-            if store is not None:
-                devices = getattr(store, "devices", {}).get(user_id, {})
-            for device_id, dev in dict(devices).items():
+            verified = set()
+            for dev in self._user_devices(c, user_id):
+                device_id = getattr(dev, "id", None) or getattr(dev, "device_id", None)
                 try:
-                    if getattr(dev, "verified", False):
-                        continue
-                    if hasattr(c, "verify_device"):
-                        await c.verify_device(user_id, device_id)  # type: ignore
+                    if not getattr(dev, "verified", False) and hasattr(c, "verify_device"):
+                        res = c.verify_device(dev)  # type: ignore
+                        if inspect.isawaitable(res):
+                            await res
                         self.logger.info("verified device %s for %s", device_id, user_id)
+                    verified.add(device_id)
                 except Exception:
                     pass
+            if verified:
+                self._trusted[user_id] = frozenset(verified)
         except Exception:
             pass
+
+    @staticmethod
+    def _user_devices(client: Any, user_id: str) -> Iterable[Any]:
+        """Return a user's known (non-deleted) devices from the client store."""
+        store = getattr(client, "device_store", None)
+        if store is None:
+            return []
+        if hasattr(store, "active_user_devices"):
+            return list(store.active_user_devices(user_id))
+        if hasattr(store, "get"):
+            return list((store.get(user_id) or {}).values())
+        return []
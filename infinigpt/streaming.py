@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def visible_text(text: str) -> str:
+    """Return the user-visible part of a partially streamed reply.
+
+    Hides reasoning sections (``<think>`` and ``<|begin_of_thought|>``)
+    while they are still open so they never flash up in the room.
+
+    Args:
+        text: Accumulated completion text so far.
+
+    Returns:
+        Text suitable for an interim message edit (may be empty).
+    """
+    if "<think>" in text:
+        if "</think>" not in text:
+            return ""
+        text = text.split("</think>", 1)[1]
+    if "<|begin_of_thought|>" in text:
+        if "<|end_of_thought|>" not in text:
+            return ""
+        text = text.split("<|end_of_thought|>", 1)[1]
+    if "<|begin_of_solution|>" in text:
+        text = text.split("<|begin_of_solution|>", 1)[1].split("<|end_of_solution|>", 1)[0]
+    return text.strip()
+
+
+class StreamingReply:
+    """Progressively edit a single Matrix message as tokens arrive.
+
+    The first visible text is sent immediately; later updates are throttled
+    to at most one ``m.replace`` edit per ``interval`` seconds, and edits are
+    never overlapped. :meth:`finish` always writes the final text.
+    """
+
+    def __init__(self, ctx: Any, room_id: str, header: str, interval: float = 1.0) -> None:
+        """Create a streaming reply bound to a room.
+
+        Args:
+            ctx: App context providing ``matrix`` and ``render``.
+            room_id: Target Matrix room ID.
+            header: Prefix prepended to every interim body (e.g. ``**Name**:\\n``).
+            interval: Minimum seconds between interim edits.
+        """
+        self.ctx = ctx
+        self.room_id = room_id
+        self.header = header
+        self.interval = max(0.0, float(interval))
+        self.event_id: Optional[str] = None
+        self._last = 0.0
+        self._shown = ""
+        self._pending: Optional[asyncio.Task] = None
+
+    async def update(self, text: str) -> None:
+        """Handle a new accumulated completion text from the LLM stream.
+
+        Args:
+            text: Full completion text received so far.
+        """
+        shown = visible_text(text)
+        if not shown or shown == self._shown:
+            return
+        if self._pending is not None and not self._pending.done():
+            return
+        now = time.monotonic()
+        if self.event_id is not None and now - self._last < self.interval:
+            return
+        self._last = now
+        self._shown = shown
+        body = f"{self.header}{shown} …"
+        if self.event_id is None:
+            # First token: send synchronously so later edits have a target.
+            await self._write(body)
+        else:
+            self._pending = asyncio.create_task(self._write(body))
+
+    async def _write(self, body: str, html: Optional[str] = None) -> None:
+        """Send the first message or edit the existing one."""
+        matrix = self.ctx.matrix
+        try:
+            if self.event_id is None:
+                self.event_id = await matrix.send_text(self.room_id, body, html=html)
+            else:
+                await matrix.edit_text(self.room_id, self.event_id, body, html=html)
+        except Exception:
+            logger.debug("Streaming message update failed in %s", self.room_id, exc_info=True)
+
+    async def finish(self, body: str, html: Optional[str] = None) -> None:
+        """Write the final reply, replacing any interim message.
+
+        Args:
+            body: Final plaintext body.
+            html: Optional final formatted body.
+        """
+        if self._pending is not None:
+            try:
+                await self._pending
+            except Exception:
+                pass
+        if self.event_id is None:
+            await self.ctx.matrix.send_text(self.room_id, body, html=html)
+            return
+        await self.ctx.matrix.edit_text(self.room_id, self.event_id, body, html=html)
+
+
+def start_stream(ctx: Any, room_id: str, header: str) -> Optional[StreamingReply]:
+    """Create a :class:`StreamingReply` when streaming is enabled and supported.
+
+    Args:
+        ctx: App context.
+        room_id: Target Matrix room ID.
+        header: Prefix for interim message bodies.
+
+    Returns:
+        A streaming reply, or None when ``llm.stream`` is off or the LLM or
+        Matrix clients lack streaming/edit support.
+    """
+    llm_cfg = getattr(getattr(ctx, "cfg", None), "llm", None)
+    if not getattr(llm_cfg, "stream", False):
+        return None
+    if not hasattr(getattr(ctx, "llm", None), "chat_stream"):
+        return None
+    if not hasattr(getattr(ctx, "matrix", None), "edit_text"):
+        return None
+    return StreamingReply(ctx, room_id, header, interval=getattr(llm_cfg, "stream_interval", 1.0))
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from .cache import TTLCache, stable_hash
+
+logger = logging.getLogger(__name__)
+
+# Policy kinds: cache for a fixed TTL, keep until evicted, follow the
+# tool-reported HTTP max_age, or only dedupe repeats inside one tool loop.
+TTL, FOREVER, HTTP, TURN = "ttl", "forever", "http", "turn"
+
+
+def _parse_policy(name: str, value: Any) -> Optional[Tuple[str, Optional[float]]]:
+    """Normalize one policy value to ``(kind, ttl)``; None disables caching."""
+    if value is None or value is False:
+        return None
+    if isinstance(value, str):
+        kind = value.strip().lower()
+        if kind in (FOREVER, HTTP, TURN):
+            return (kind, None)
+        if kind == "never":
+            return None
+        try:
+            value = float(kind)
+        except ValueError:
+            logger.warning("Ignoring unknown cache policy %r for tool %s", value, name)
+            return None
+    try:
+        ttl = float(value)
+    except (TypeError, ValueError):
+        logger.warning("Ignoring unknown cache policy %r for tool %s", value, name)
+        return None
+    return (TTL, ttl) if ttl > 0 else None
+
+
+def _inspect(result: str) -> Tuple[str, bool, Optional[float]]:
+    """Split cache metadata off a tool result.
+
+    Returns:
+        The result without its ``max_age`` field (which is for the cache, not
+        the model), whether it is an error, and the ``max_age`` it reported.
+    """
+    try:
+        parsed = json.loads(result)
+    except Exception:
+        return (result, False, None)
+    if not isinstance(parsed, dict):
+        return (result, False, None)
+    if "error" in parsed:
+        return (result, True, None)
+    if "max_age" not in parsed:
+        return (result, False, None)
+    max_age = parsed.pop("max_age")
+    result = json.dumps(parsed, ensure_ascii=False)
+    try:
+        return (result, False, float(max_age) if max_age is not None else None)
+    except (TypeError, ValueError):
+        return (result, False, None)
+
+
+class ToolResultCache:
+    """Per-tool result cache driven by declarative policies.
+
+    Results are keyed by tool name plus canonicalized arguments. Tools with
+    any policy also have identical calls within one tool loop collapsed onto
+    a single execution via a per-loop ``memo`` mapping. Error results are
+    never stored.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, Any]] = None, max_entries: int = 512) -> None:
+        """Create the cache.
+
+        Args:
+            policies: Mapping of tool name to a TTL in seconds, ``"forever"``,
+                ``"http"``, ``"turn"`` or ``"never"``.
+            max_entries: Maximum cached results before LRU eviction.
+        """
+        self.policies: Dict[str, Tuple[str, Optional[float]]] = {}
+        for name, value in (policies or {}).items():
+            parsed = _parse_policy(name, value)
+            if parsed is not None:
+                self.policies[name] = parsed
+        self._results: TTLCache = TTLCache(max_entries=max_entries)
+        # Callers currently awaiting each shared in-flight execution
+        self._waiters: Dict["asyncio.Future[str]", int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(name: str, arguments: Optional[Dict[str, Any]]) -> Hashable:
+        """Return the cache key for a tool call."""
+        return (name, stable_hash(arguments or {}))
+
+    def _store(self, key: Hashable, kind: str, ttl: Optional[float], result: str, max_age: Optional[float]) -> None:
+        """Store a successful result according to its policy."""
+        if kind == HTTP:
+            if not max_age or max_age <= 0:
+                return
+            ttl = max_age
+        self._results.set(key, result, ttl=ttl)
+
+    async def run(
+        self,
+        name: str,
+        arguments: Optional[Dict[str, Any]],
+        call: Callable[[], Awaitable[str]],
+        memo: Optional[Dict[Hashable, "asyncio.Future[str]"]] = None,
+    ) -> str:
+        """Return a cached result or execute the tool and cache the outcome.
+
+        Args:
+            name: Tool function name.
+            arguments: Parsed tool arguments.
+            call: Zero-argument coroutine factory that executes the tool.
+            memo: Optional per-tool-loop mapping used to share in-flight and
+                finished executions between identical calls.
+
+        Returns:
+            The tool's stringified result payload.
+        """
+        policy = self.policies.get(name)
+        if policy is None:
+            return await call()
+        kind, ttl = policy
+        key = self.key(name, arguments)
+        cached = self._results.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        if memo is not None and key in memo:
+            self.hits += 1
+            return await self._join(memo[key])
+        self.misses += 1
+
+        async def _execute() -> str:
+            result = await call()
+            if kind == TURN:
+                return result
+            result, is_error, max_age = _inspect(result)
+            if not is_error:
+                self._store(key, kind, ttl, result, max_age)
+            return result
+
+        task = asyncio.ensure_future(_execute())
+        if memo is not None:
+            memo[key] = task
+
+        def _done(fut: "asyncio.Future[str]") -> None:
+            if (fut.cancelled() or fut.exception() is not None) and memo is not None and memo.get(key) is fut:
+                del memo[key]
+
+        task.add_done_callback(_done)
+        if memo is None:
+            return await task
+        return await self._join(task)
+
+    async def _join(self, task: "asyncio.Future[str]") -> str:
+        """Await a shared execution, cancelling it when its last waiter gives up.
+
+        A caller timing out does not cancel a run other calls still wait
+        on, but a run nobody waits for any more is not left going.
+        """
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            left = self._waiters.pop(task) - 1
+            if left:
+                self._waiters[task] = left
+            elif not task.done():
+                task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the number of stored results."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._results)}
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        self._results.clear()
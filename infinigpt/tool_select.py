@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from .cache import TTLCache, stable_hash
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from get give how i in is it me my of on or please show tell "
+    "that the this to use using what when where which who with you your".split()
+)
+# Tool names say the most about a tool, so their terms count extra
+_NAME_WEIGHT = 3
+
+
+class ToolSchema(list):
+    """Tool definition list carrying its precomputed JSON encoding.
+
+    Never mutated after construction, so ``json`` (the compact encoding
+    spliced into request bodies) and ``etag`` (a content hash) stay valid.
+    """
+
+    __slots__ = ("json", "etag")
+
+    def __init__(self, tools: Iterable[Dict[str, Any]] = ()) -> None:
+        super().__init__(tools)
+        self.json = json.dumps(self, ensure_ascii=False, separators=(",", ":"))
+        self.etag = stable_hash(list(self))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms.
+
+    Splits on non-alphanumerics and camelCase, drops stopwords, and strips a
+    plural ``s`` so ``prices`` matches ``price``.
+    """
+    terms: List[str] = []
+    for word in _WORD.findall(_CAMEL.sub(" ", text or "")):
+        word = word.lower()
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def _tool_name(tool: Dict[str, Any]) -> str:
+    """Return a tool definition's function name."""
+    return f"{(tool.get('function') or {}).get('name') or ''}".strip()
+
+
+def _tool_terms(tool: Dict[str, Any]) -> List[str]:
+    """Return the indexed terms of a tool: name, description and parameters."""
+    func = tool.get("function") or {}
+    terms = tokenize(str(func.get("name") or "").replace("_", " ")) * _NAME_WEIGHT
+    terms += tokenize(str(func.get("description") or ""))
+    props = ((func.get("parameters") or {}).get("properties") or {})
+    if isinstance(props, dict):
+        for pname, pspec in props.items():
+            terms += tokenize(str(pname).replace("_", " "))
+            if isinstance(pspec, dict):
+                terms += tokenize(str(pspec.get("description") or ""))
+    return terms
+
+
+class ToolSelector:
+    """BM25 index over tool names, descriptions and parameters.
+
+    Ranks tools against a user message so a request can carry only the
+    most relevant definitions. Built once per tool set; selections are
+    memoized by the chosen names so repeated subsets reuse one encoded
+    schema.
+    """
+
+    def __init__(self, tools: Sequence[Dict[str, Any]], k1: float = 1.5, b: float = 0.75) -> None:
+        """Index a tool schema.
+
+        Args:
+            tools: Tool definitions in OpenAI function format.
+            k1: BM25 term-frequency saturation.
+            b: BM25 length normalization.
+        """
+        self.tools = tools if isinstance(tools, list) else list(tools)
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(_tool_terms(t)) for t in self.tools]
+        self._lengths = [sum(d.values()) for d in self._docs]
+        self._avg = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        df: Counter = Counter()
+        for doc in self._docs:
+            df.update(doc.keys())
+        n = len(self._docs)
+        self._idf = {term: math.log(1 + (n - f + 0.5) / (f + 0.5)) for term, f in df.items()}
+        self._subsets: TTLCache = TTLCache(max_entries=128)
+
+    def scores(self, query: str) -> List[float]:
+        """Return the BM25 score of every tool for a query, in schema order."""
+        terms = [t for t in tokenize(query) if t in self._idf]
+        out: List[float] = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * (length / self._avg if self._avg else 0.0))
+            for term in terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            out.append(score)
+        return out
+
+    def matches(self, query: str) -> bool:
+        """Return whether any term of a query occurs in some tool."""
+        return any(term in self._idf for term in tokenize(query))
+
+    def select(
+        self,
+        query: str,
+        top_k: int,
+        always: Iterable[str] = (),
+        prior: Optional[Mapping[str, float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return the always-included tools plus the top-k matches for a query.
+
+        Tools with no matching terms are never picked by rank. When nothing
+        matches at all, the top-k tools by ``prior`` are picked instead. The
+        result keeps schema order. When ``top_k`` covers the whole schema,
+        the full schema object is returned unchanged.
+
+        Args:
+            query: Text to rank against, usually the latest user message.
+            top_k: Maximum number of ranked tools to include.
+            always: Tool names included regardless of rank.
+            prior: Optional tool name to weight (e.g. past call counts)
+                ranking tools when the query matches none.
+
+        Returns:
+            The selected tool definitions.
+        """
+        if top_k <= 0 or top_k >= len(self.tools):
+            return self.tools
+        keep = set(always)
+        scores = self.scores(query)
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: -scores[i])
+        if not ranked and prior:
+            weights = [float(prior.get(_tool_name(t), 0) or 0) for t in self.tools]
+            ranked = sorted((i for i, w in enumerate(weights) if w > 0), key=lambda i: -weights[i])
+        for i in ranked[:top_k]:
+            keep.add(_tool_name(self.tools[i]))
+        names = tuple(_tool_name(t) for t in self.tools if _tool_name(t) in keep)
+        subset: Optional[List[Dict[str, Any]]] = self._subsets.get(names)
+        if subset is None:
+            subset = ToolSchema(t for t in self.tools if _tool_name(t) in keep)
+            self._subsets.set(names, subset)
+        return subset
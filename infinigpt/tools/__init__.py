@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Iterable, List
+from typing import Any, Callable, Dict, Iterable, List, Optional
 
+import asyncio
+import functools
 import importlib
+import inspect
 import json
 import pkgutil
 from pathlib import Path
 import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
 
 
 _TOOL_REGISTRY: Dict[str, Callable[..., str]] | None = None
@@ -41,6 +45,34 @@ def load_schema(path: str | None = None) -> List[Dict[str, Any]]:
     return data
 
 
+def load_cache_policies(path: str | None = None) -> Dict[str, Any]:
+    """Load per-tool result cache policies from the sidecar JSON file.
+
+    Values are a TTL in seconds, ``"forever"``, ``"http"`` (use the
+    ``max_age`` the tool reports from HTTP cache headers) or ``"turn"``
+    (only memoize repeats within one tool loop). Tools not listed are
+    never cached.
+
+    Args:
+        path: Optional path to a policy JSON file. Defaults to the packaged
+            ``cache.json``.
+
+    Returns:
+        Mapping of tool name to policy; empty if the file is unreadable.
+    """
+    p = Path(path) if path else Path(__file__).resolve().parent / "cache.json"
+    try:
+        with p.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception:
+        logger.exception("Failed to load tool cache policies from %s", p)
+        return {}
+    if not isinstance(data, dict):
+        logger.error("%s must be a JSON object of tool name -> policy", p)
+        return {}
+    return data
+
+
 def _discover_functions(names: Iterable[str]) -> Dict[str, Callable[..., str]]:
     """Locate tool functions by name across modules in this package.
 
@@ -96,9 +128,55 @@ def _get_registry() -> Dict[str, Callable[..., str]]:
     return _TOOL_REGISTRY
 
 
+def _log_call(name: str, arguments: Dict[str, Any]) -> None:
+    """Log a builtin tool invocation with truncated arguments."""
+    try:
+        _args_str = json.dumps(arguments or {}, ensure_ascii=False, default=str)
+    except Exception:
+        _args_str = str(arguments)
+    if len(_args_str) > 800:
+        _args_str = _args_str[:800] + "…"
+    logger.info("Tool (builtin): %s args=%s", name, _args_str)
+
+
+def _normalize_result(result: Any) -> str:
+    """Encode a tool return value as a JSON string."""
+    if isinstance(result, (dict, list, int, float, bool)) or result is None:
+        return json.dumps(result, ensure_ascii=False)
+    if isinstance(result, str):
+        try:
+            json.loads(result)
+            return result
+        except Exception:
+            return json.dumps({"result": result}, ensure_ascii=False)
+    return json.dumps({"result": str(result)}, ensure_ascii=False)
+
+
+def _run_coroutine(coro: Any) -> Any:
+    """Run a coroutine to completion from sync code, even inside a running loop."""
+    from . import _http
+
+    async def _main() -> Any:
+        try:
+            return await coro
+        finally:
+            # The private loop is discarded, so close its pooled client
+            await _http.aclose()
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_main())
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, _main()).result()
+
+
 def execute_tool(name: str, arguments: Dict[str, Any]) -> str:
     """Execute a builtin tool and normalize its return value to JSON.
 
+    Async tools are run to completion on a private event loop. Prefer
+    :func:`execute_tool_async` from async code.
+
     Args:
         name: Tool function name.
         arguments: Keyword arguments to call the tool with.
@@ -112,23 +190,46 @@ def execute_tool(name: str, arguments: Dict[str, Any]) -> str:
         logger.warning("Unknown builtin tool '%s'", name)
         return f"Unknown tool: {name}"
     try:
-        try:
-            _args_str = json.dumps(arguments or {}, ensure_ascii=False, default=str)
-        except Exception:
-            _args_str = str(arguments)
-        if len(_args_str) > 800:
-            _args_str = _args_str[:800] + "…"
-        logger.info("Tool (builtin): %s args=%s", name, _args_str)
+        _log_call(name, arguments)
         result = func(**(arguments or {}))
-        if isinstance(result, (dict, list, int, float, bool)) or result is None:
-            return json.dumps(result, ensure_ascii=False)
-        if isinstance(result, str):
-            try:
-                json.loads(result)
-                return result
-            except Exception:
-                return json.dumps({"result": result}, ensure_ascii=False)
-        return json.dumps({"result": str(result)}, ensure_ascii=False)
+        if inspect.iscoroutine(result):
+            result = _run_coroutine(result)
+        return _normalize_result(result)
+    except TypeError as e:
+        logger.exception("Invalid arguments for builtin tool '%s'", name)
+        return json.dumps({"error": f"Invalid arguments for {name}: {e}"}, ensure_ascii=False)
+    except Exception as e:
+        logger.exception("Tool execution error for builtin tool '%s'", name)
+        return json.dumps({"error": f"Tool execution error for {name}: {e}"}, ensure_ascii=False)
+
+
+async def execute_tool_async(name: str, arguments: Dict[str, Any], executor: Optional[Executor] = None) -> str:
+    """Execute a builtin tool without blocking the event loop.
+
+    Async tools are awaited directly (sharing the pooled HTTP client); sync
+    tools run on ``executor`` (or the loop's default executor).
+
+    Args:
+        name: Tool function name.
+        arguments: Keyword arguments to call the tool with.
+        executor: Optional executor for sync tools.
+
+    Returns:
+        JSON string encoding of the tool result or error.
+    """
+    registry = _get_registry()
+    func = registry.get(name)
+    if func is None:
+        logger.warning("Unknown builtin tool '%s'", name)
+        return f"Unknown tool: {name}"
+    try:
+        _log_call(name, arguments)
+        if inspect.iscoroutinefunction(func):
+            result = await func(**(arguments or {}))
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, functools.partial(func, **(arguments or {})))
+        return _normalize_result(result)
     except TypeError as e:
         logger.exception("Invalid arguments for builtin tool '%s'", name)
         return json.dumps({"error": f"Invalid arguments for {name}: {e}"}, ensure_ascii=False)
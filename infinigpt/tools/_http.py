@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import MutableMapping
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# One pooled client per event loop; httpx clients must not cross loops.
+_CLIENTS: "MutableMapping[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+DEFAULT_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=10, keepalive_expiry=30.0)
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared pooled HTTP client for the running event loop.
+
+    Builtin tools use this instead of opening a client per call so repeated
+    tool requests reuse keep-alive connections. Per-request timeouts can
+    still be passed to individual calls.
+    """
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT, limits=DEFAULT_LIMITS)
+        _CLIENTS[loop] = client
+        logger.debug("Opened shared tool HTTP client")
+    return client
+
+
+async def aclose() -> None:
+    """Close the running loop's shared client, ignoring failures."""
+    try:
+        client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    except RuntimeError:
+        return
+    if client is not None:
+        try:
+            await client.aclose()
+        except Exception:
+            logger.debug("Failed to close shared tool HTTP client", exc_info=True)
@@ -1,8 +1,9 @@
-import httpx
 import json
 
+from ._http import get_client
 
-def crypto_prices(product_id: str) -> str:
+
+async def crypto_prices(product_id: str) -> str:
     """Fetch Coinbase brokerage product ticker/metadata.
 
     Args:
@@ -12,7 +13,7 @@ def crypto_prices(product_id: str) -> str:
         JSON string of the API response or a JSON error string.
     """
     url = f"https://api.coinbase.com/api/v3/brokerage/market/products/{product_id}"
-    response = httpx.get(url, headers={"Content-Type": "application/json"}, timeout=60)
+    response = await get_client().get(url, headers={"Content-Type": "application/json"}, timeout=60)
     try:
         response.raise_for_status()
     except Exception:
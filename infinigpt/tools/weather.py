@@ -3,6 +3,8 @@ from __future__ import annotations
 from typing import Dict, Any
 import httpx
 
+from ._http import get_client
+
 
 def _units_map(units: str) -> Dict[str, str]:
     """Map a unit preference to Open-Meteo parameter names.
@@ -47,7 +49,7 @@ def _code_desc(code: int) -> str:
     return mapping.get(code, f"code {code}")
 
 
-def get_weather(city: str, units: str = "imperial") -> Dict[str, Any]:
+async def get_weather(city: str, units: str = "imperial") -> Dict[str, Any]:
     """Lookup current weather for a city using Open-Meteo.
 
     Args:
@@ -62,14 +64,14 @@ def get_weather(city: str, units: str = "imperial") -> Dict[str, Any]:
         return {"error": "Invalid 'city' argument; expected a non-empty string."}
 
     try:
-        with httpx.Client() as client:
-            geo = client.get(
-                "https://geocoding-api.open-meteo.com/v1/search",
-                params={"name": city, "count": 1},
-                timeout=20,
-            )
-            geo.raise_for_status()
-            data = geo.json() or {}
+        client = get_client()
+        geo = await client.get(
+            "https://geocoding-api.open-meteo.com/v1/search",
+            params={"name": city, "count": 1},
+            timeout=20,
+        )
+        geo.raise_for_status()
+        data = geo.json() or {}
         results = data.get("results") or []
         if not results:
             return {"error": f"City not found: {city}"}
@@ -82,19 +84,18 @@ def get_weather(city: str, units: str = "imperial") -> Dict[str, Any]:
             return {"error": f"Failed to geocode: {city}"}
 
         unit_params = _units_map(units)
-        with httpx.Client() as client:
-            wx = client.get(
-                "https://api.open-meteo.com/v1/forecast",
-                params={
-                    "latitude": lat,
-                    "longitude": lon,
-                    "current_weather": True,
-                    **unit_params,
-                },
-                timeout=20,
-            )
-            wx.raise_for_status()
-            wdata = wx.json() or {}
+        wx = await client.get(
+            "https://api.open-meteo.com/v1/forecast",
+            params={
+                "latitude": lat,
+                "longitude": lon,
+                "current_weather": True,
+                **unit_params,
+            },
+            timeout=20,
+        )
+        wx.raise_for_status()
+        wdata = wx.json() or {}
         cw = (wdata.get("current_weather") or {})
         temp = cw.get("temperature")
         wind = cw.get("windspeed")
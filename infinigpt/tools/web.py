@@ -1,9 +1,14 @@
 import httpx
 import json
 import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
 
+from ._http import get_client
 
-def openai_search(query: str) -> str:
+
+async def openai_search(query: str) -> str:
     """Perform an OpenAI web search and return the raw JSON response.
 
     Args:
@@ -66,18 +71,48 @@ def openai_search(query: str) -> str:
         },
         "store": False,
     }
-    with httpx.Client() as client:
-        response = client.post(url, headers=headers, json=data, timeout=60)
+    response = await get_client().post(url, headers=headers, json=data, timeout=60)
+    try:
+        response.raise_for_status()
+        return response.text
+    except httpx.HTTPStatusError as e:
+        return json.dumps({"error": f"HTTP error: {e.response.status_code} - {e.response.text}"})
+    except Exception as e:
+        return json.dumps({"error": f"Unexpected: {str(e)}"})
+
+
+def _max_age(headers: httpx.Headers) -> Optional[float]:
+    """Derive a cache lifetime in seconds from HTTP response headers.
+
+    ``no-store``/``no-cache``/``private`` yield 0, ``s-maxage`` wins over
+    ``max-age``, and ``Expires`` is used when neither is present.
+
+    Returns:
+        Lifetime in seconds, or None when the headers say nothing.
+    """
+    directives = {}
+    for part in (headers.get("cache-control") or "").split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            directives[key.lower()] = value.strip().strip('"')
+    if any(d in directives for d in ("no-store", "no-cache", "private")):
+        return 0.0
+    for d in ("s-maxage", "max-age"):
+        if d in directives:
+            try:
+                return max(0.0, float(directives[d]))
+            except ValueError:
+                return 0.0
+    expires = headers.get("expires")
+    if expires:
         try:
-            response.raise_for_status()
-            return response.text
-        except httpx.HTTPStatusError as e:
-            return json.dumps({"error": f"HTTP error: {e.response.status_code} - {e.response.text}"})
-        except Exception as e:
-            return json.dumps({"error": f"Unexpected: {str(e)}"})
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - time.time())
+        except Exception:
+            return 0.0
+    return None
 
 
-def fetch_url(url: str, max_bytes: int = 65536) -> dict:
+async def fetch_url(url: str, max_bytes: int = 65536) -> dict:
     """Fetch a URL and return text content with truncation.
 
     Args:
@@ -85,23 +120,28 @@ def fetch_url(url: str, max_bytes: int = 65536) -> dict:
         max_bytes: Maximum number of UTF-8 bytes to return.
 
     Returns:
-        Dict with url, status, content, truncated flag; or error.
+        Dict with url, status, content, truncated flag and, when the
+        response carries cache headers, ``max_age`` in seconds (read and
+        removed by the ``"http"`` cache policy); or error.
     """
     try:
-        with httpx.Client() as client:
-            resp = client.get(url, timeout=20)
-            resp.raise_for_status()
-            text = resp.text
-            encoded = text.encode("utf-8")
-            truncated = False
-            if len(encoded) > max_bytes:
-                text = encoded[:max_bytes].decode("utf-8", errors="ignore")
-                truncated = True
-            return {
-                "url": url,
-                "status": resp.status_code,
-                "content": text,
-                "truncated": truncated,
-            }
+        resp = await get_client().get(url, timeout=20)
+        resp.raise_for_status()
+        text = resp.text
+        encoded = text.encode("utf-8")
+        truncated = False
+        if len(encoded) > max_bytes:
+            text = encoded[:max_bytes].decode("utf-8", errors="ignore")
+            truncated = True
+        result = {
+            "url": url,
+            "status": resp.status_code,
+            "content": text,
+            "truncated": truncated,
+        }
+        max_age = _max_age(resp.headers)
+        if max_age is not None:
+            result["max_age"] = max_age
+        return result
     except httpx.HTTPError as e:
         return {"error": f"Request failed: {e}"}
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List
+
+from .tool_select import ToolSchema, ToolSelector
+
+
+def _tool_name(tool: Dict[str, Any]) -> str:
+    """Return a tool definition's function name."""
+    return f"{(tool.get('function') or {}).get('name') or ''}".strip()
+
+
+@dataclass(frozen=True)
+class ToolSet:
+    """Immutable snapshot of the tools offered to the model.
+
+    The app swaps the whole snapshot in one assignment when MCP tools
+    change, so a request never sees a schema and name index from different
+    generations.
+
+    Attributes:
+        schema: Combined tool definitions, MCP tools first.
+        mcp_names: Names routed to MCP servers.
+        mcp_count: Number of MCP tool definitions in ``schema``.
+        selector: Relevance index over ``schema``.
+    """
+    schema: ToolSchema
+    mcp_names: FrozenSet[str]
+    mcp_count: int
+    selector: ToolSelector = field(compare=False, repr=False)
+
+    @classmethod
+    def build(cls, mcp_schema: List[Dict[str, Any]], builtin_schema: List[Dict[str, Any]]) -> "ToolSet":
+        """Combine MCP and builtin tools; MCP tools override same-named builtins.
+
+        Args:
+            mcp_schema: Tool definitions discovered from MCP servers.
+            builtin_schema: Builtin tool definitions.
+
+        Returns:
+            A new snapshot.
+        """
+        mcp_names = frozenset(n for n in (_tool_name(t) for t in mcp_schema) if n)
+        combined = list(mcp_schema)
+        for tool in builtin_schema:
+            name = _tool_name(tool)
+            if name and name not in mcp_names:
+                combined.append(tool)
+        schema = ToolSchema(combined)
+        return cls(schema=schema, mcp_names=mcp_names, mcp_count=len(mcp_schema), selector=ToolSelector(schema))
+
+    @property
+    def etag(self) -> str:
+        """Content hash of the combined schema."""
+        return self.schema.etag
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+# Dimensions usage is aggregated by, in report order
+DIMENSIONS = ("provider", "model", "room", "user")
+
+
+def _int(value: Any) -> int:
+    """Coerce a usage counter to int, treating junk as zero."""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_usage(usage: Optional[Mapping[str, Any]]) -> Dict[str, int]:
+    """Normalize a chat.completions ``usage`` block.
+
+    Args:
+        usage: Raw ``usage`` mapping from a provider response, or None.
+
+    Returns:
+        Dict with ``prompt_tokens``, ``completion_tokens``,
+        ``cached_tokens`` and ``reasoning_tokens`` (missing values are 0).
+    """
+    usage = usage or {}
+    prompt_details = usage.get("prompt_tokens_details") or {}
+    completion_details = usage.get("completion_tokens_details") or {}
+    return {
+        "prompt_tokens": _int(usage.get("prompt_tokens")),
+        "completion_tokens": _int(usage.get("completion_tokens")),
+        "cached_tokens": _int(prompt_details.get("cached_tokens")),
+        "reasoning_tokens": _int(completion_details.get("reasoning_tokens")),
+    }
+
+
+class UsageStats:
+    """Running token and latency totals for one aggregation key."""
+
+    __slots__ = (
+        "requests",
+        "prompt_tokens",
+        "completion_tokens",
+        "cached_tokens",
+        "reasoning_tokens",
+        "latency_total",
+        "latency_max",
+    )
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.reasoning_tokens = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def add(self, tokens: Mapping[str, int], latency: float) -> None:
+        """Fold one response into the totals."""
+        self.requests += 1
+        self.prompt_tokens += tokens["prompt_tokens"]
+        self.completion_tokens += tokens["completion_tokens"]
+        self.cached_tokens += tokens["cached_tokens"]
+        self.reasoning_tokens += tokens["reasoning_tokens"]
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt plus completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the totals as a JSON-serializable dict."""
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "cached_tokens": self.cached_tokens,
+            "reasoning_tokens": self.reasoning_tokens,
+            "latency_avg": round(self.latency_total / self.requests, 3) if self.requests else 0.0,
+            "latency_max": round(self.latency_max, 3),
+        }
+
+
+class UsageTracker:
+    """In-memory token usage accounting by provider, model, room and user."""
+
+    def __init__(self) -> None:
+        """Create an empty tracker."""
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all recorded usage."""
+        self.since = time.time()
+        self.totals = UsageStats()
+        self._by: Dict[str, Dict[str, UsageStats]] = {d: {} for d in DIMENSIONS}
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        usage: Optional[Mapping[str, Any]],
+        latency: float,
+        room: Optional[str] = None,
+        user: Optional[str] = None,
+    ) -> None:
+        """Record one completed upstream request.
+
+        Args:
+            provider: Provider that served the request.
+            model: Model that served the request.
+            usage: Raw ``usage`` block from the response (may be None).
+            latency: Request duration in seconds.
+            room: Matrix room ID the request was made for, if known.
+            user: Matrix user ID the request was made for, if known.
+        """
+        tokens = parse_usage(usage)
+        self.totals.add(tokens, latency)
+        keys = {"provider": provider, "model": model, "room": room or "-", "user": user or "-"}
+        for dim, key in keys.items():
+            stats = self._by[dim].get(key)
+            if stats is None:
+                stats = self._by[dim][key] = UsageStats()
+            stats.add(tokens, latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all aggregates as a JSON-serializable dict."""
+        return {
+            "since": self.since,
+            "totals": self.totals.as_dict(),
+            **{f"by_{dim}": {k: v.as_dict() for k, v in self._by[dim].items()} for dim in DIMENSIONS},
+        }
+
+    def top(self, dimension: str, limit: int = 5) -> List[tuple]:
+        """Return the ``limit`` heaviest keys of a dimension by total tokens."""
+        items = sorted(self._by[dimension].items(), key=lambda kv: kv[1].total_tokens, reverse=True)
+        return items[:limit]
+
+    def summary(self, limit: int = 5) -> str:
+        """Return a Markdown report of totals and the heaviest keys."""
+        t = self.totals
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(self.since))
+        lines = [
+            f"**Token usage since {started}**",
+            f"{t.requests} requests, {t.prompt_tokens} prompt + {t.completion_tokens} completion tokens "
+            f"({t.cached_tokens} cached, {t.reasoning_tokens} reasoning)",
+        ]
+        for dim in DIMENSIONS:
+            rows = self.top(dim, limit)
+            if not rows:
+                continue
+            lines.append("")
+            lines.append(f"**By {dim}**")
+            for key, stats in rows:
+                avg = stats.latency_total / stats.requests if stats.requests else 0.0
+                lines.append(f"- {key}: {stats.total_tokens} tokens, {stats.requests} req, {avg:.2f}s avg")
+        return "\n".join(lines)
@@ -0,0 +1,32 @@
+import time
+
+import httpx
+
+from infinigpt.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_provider_failure
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    b = CircuitBreaker("openai", {"consecutive_failures": 2, "open_seconds": 10})
+    assert b.allow()
+    b.record_failure()
+    b.record_failure()
+    assert b.state == OPEN and not b.allow()
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert b.allow() and b.state == HALF_OPEN
+    assert not b.allow()  # only one probe at a time
+    b.record_success(0.1)
+    assert b.state == CLOSED and b.allow()
+
+
+def test_slow_calls_count_as_failures():
+    b = CircuitBreaker("xai", {"consecutive_failures": 1, "slow_call_seconds": 5})
+    b.record_success(6.0)
+    assert b.state == OPEN
+
+
+def test_provider_failure_classification():
+    req = httpx.Request("POST", "https://x")
+    assert is_provider_failure(httpx.ConnectError("boom", request=req))
+    assert is_provider_failure(httpx.HTTPStatusError("e", request=req, response=httpx.Response(503, request=req)))
+    assert not is_provider_failure(httpx.HTTPStatusError("e", request=req, response=httpx.Response(400, request=req)))
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from infinigpt.cache import ResponseCache, TTLCache, request_key
+from infinigpt.toolset import ToolSchema
+
+
+def test_ttl_cache_lru_and_expiry(monkeypatch):
+    c = TTLCache(max_entries=2, ttl=10)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    c.set("c", 3)
+    assert "b" not in c and c.get("a") == 1
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert c.get("a") is None
+
+
+def test_request_key_ignores_order_and_stream_flag():
+    a = request_key({"model": "m", "messages": [], "temperature": 0})
+    b = request_key({"temperature": 0, "messages": [], "model": "m", "stream": True})
+    assert a == b
+    assert a != request_key({"model": "m", "messages": [], "temperature": 0.1})
+
+
+def test_request_key_uses_tool_schema_etag():
+    weather = [{"type": "function", "function": {"name": "get_weather"}}]
+    schema = ToolSchema(weather)
+    key = request_key({"model": "m", "messages": [], "tools": schema})
+    assert key == request_key({"model": "m", "messages": [], "tools": ToolSchema(weather)})
+    assert key != request_key({"model": "m", "messages": [], "tools": ToolSchema(weather * 2)})
+
+
+@pytest.mark.asyncio
+async def test_response_cache_disk_tier_survives_new_instance(tmp_path):
+    first = ResponseCache(max_entries=4, ttl=60, path=str(tmp_path))
+    await first.set("k", {"choices": [{"message": {"content": "hi"}}]})
+    second = ResponseCache(max_entries=4, ttl=60, path=str(tmp_path))
+    hit = await second.get("k")
+    assert hit["choices"][0]["message"]["content"] == "hi"
+    assert await second.get("missing") is None
+    assert second.hits == 1 and second.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_response_cache_disk_tier_is_pruned_by_age_and_count(tmp_path):
+    cache = ResponseCache(max_entries=2, ttl=1000, path=str(tmp_path))
+    stale = tmp_path / "stale.json"
+    stale.write_text("{}")
+    os.utime(stale, (time.time() - 2000,) * 2)
+    for i in range(4):
+        await cache.set(f"k{i}", {"i": i})
+        os.utime(tmp_path / f"k{i}.json", (time.time() - 100 + i,) * 2)
+    await cache.set("k4", {"i": 4})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["k3.json", "k4.json"]
+
+
+@pytest.mark.asyncio
+async def test_response_cache_concurrent_writes_leave_a_whole_file(tmp_path):
+    cache = ResponseCache(max_entries=1, ttl=1000, path=str(tmp_path))
+    await asyncio.gather(*(cache.set("k", {"i": i, "pad": "x" * 50000}) for i in range(8)))
+    assert [p.name for p in tmp_path.iterdir()] == ["k.json"]
+    assert json.loads((tmp_path / "k.json").read_text())["response"]["pad"] == "x" * 50000
+    # Pruning a directory removed underneath it is not an error
+    for p in tmp_path.iterdir():
+        p.unlink()
+    tmp_path.rmdir()
+    cache._prune_disk()
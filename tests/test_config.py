@@ -42,3 +42,9 @@ def test_validate_config_default_model_missing():
     ok, errs = validate_config(cfg)
     assert not ok and errs
 
+
+def test_validate_config_rejects_unknown_fallback():
+    llm = LLMConfig(models={"openai": ["gpt-4o"]}, api_keys={"openai": "X"}, default_model="gpt-4o", personality="p", prompt=["you are ", "."], fallbacks={"gpt-4o": ["nope"]})
+    matrix = MatrixConfig(server="s", username="u", password="p", channels=["!r"], admin="a")
+    ok, errs = validate_config(AppConfig(llm=llm, matrix=matrix))
+    assert not ok and "nope" in errs[0]
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from infinigpt.dispatcher import Dispatcher
+
+
+@pytest.mark.asyncio
+async def test_same_key_runs_in_order_other_keys_overlap():
+    d = Dispatcher(max_workers=4)
+    order = []
+    gate = asyncio.Event()
+
+    def job(name, wait=False):
+        async def run():
+            if wait:
+                await gate.wait()
+            order.append(name)
+        return run
+
+    d.submit(("!r", "@a"), job("a1", wait=True))
+    d.submit(("!r", "@a"), job("a2"))
+    d.submit(("!r", "@b"), job("b1"))
+    await asyncio.sleep(0.01)
+    # b1 is not stuck behind the slow a1; a2 waits for a1
+    assert order == ["b1"]
+    gate.set()
+    await d.aclose()
+    assert order == ["b1", "a1", "a2"]
+    assert d.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_cap_and_queue_bound():
+    d = Dispatcher(max_workers=2, max_pending=3)
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    accepted = [d.submit(i, job) for i in range(5)]
+    assert accepted == [True, True, True, False, False]
+    await d.aclose()
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_job_does_not_block_lane():
+    d = Dispatcher()
+    done = []
+
+    async def boom():
+        raise RuntimeError("x")
+
+    async def ok():
+        done.append(True)
+
+    d.submit("k", boom)
+    d.submit("k", ok)
+    await d.aclose()
+    assert done == [True]
@@ -0,0 +1,280 @@
+import asyncio
+import json
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+fastmcp = pytest.importorskip("fastmcp")
+
+from fastmcp.exceptions import McpError
+
+from infinigpt.app import AppContext
+from infinigpt.config import AppConfig, LLMConfig, MatrixConfig
+from infinigpt.fastmcp_client import FastMCPClient, _Session
+from infinigpt.llm_client import _encode_payload
+
+
+class FakeClient:
+    instances = []
+
+    def __init__(self, spec, message_handler=None):
+        self.spec = spec
+        self.message_handler = message_handler
+        self.connected = False
+        self.calls = 0
+        self.fail_next = False
+        FakeClient.instances.append(self)
+
+    async def __aenter__(self):
+        self.connected = True
+        return self
+
+    async def __aexit__(self, *exc):
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def list_tools(self):
+        return [SimpleNamespace(name="echo", description="Echo", inputSchema=None)]
+
+    async def call_tool(self, name, arguments):
+        self.calls += 1
+        if self.fail_next:
+            self.fail_next = False
+            raise ConnectionError("pipe closed")
+        return SimpleNamespace(data=arguments, structured_content=None, content=[])
+
+    async def ping(self):
+        return True
+
+
+def test_sessions_are_reused_and_reconnected(monkeypatch):
+    FakeClient.instances = []
+    monkeypatch.setattr(fastmcp, "Client", FakeClient)
+    client = FastMCPClient({"srv": {"url": "http://127.0.0.1:1/mcp", "restart_backoff": 0}}, ping_interval=0)
+    try:
+        assert [t["function"]["name"] for t in client.list_tools()] == ["echo"]
+        assert client.tool_names == {"echo"}
+        for i in range(3):
+            assert json.loads(client.call_tool("echo", {"i": i})) == {"i": i}
+        # Discovery and all calls share one connection
+        assert len(FakeClient.instances) == 1 and FakeClient.instances[0].calls == 3
+
+        FakeClient.instances[0].fail_next = True
+        assert "pipe closed" in json.loads(client.call_tool("echo", {}))["error"]
+        assert json.loads(client.call_tool("echo", {"again": 1})) == {"again": 1}
+        assert len(FakeClient.instances) == 2
+        assert client.health_check() == {"srv": True}
+    finally:
+        client.close()
+    assert not FakeClient.instances[-1].connected
+
+
+@pytest.mark.asyncio
+async def test_supervisor_retries_until_connected_and_error_replies_keep_session(monkeypatch):
+    connects = []
+
+    class Flaky(FakeClient):
+        async def __aenter__(self):
+            connects.append(self)
+            if len(connects) in (2, 3):
+                raise ConnectionError("refused")
+            return await super().__aenter__()
+
+        async def ping(self):
+            raise McpError(-32601, "Method not found")
+
+    FakeClient.instances = []
+    monkeypatch.setattr(fastmcp, "Client", Flaky)
+    client = FastMCPClient({"srv": {"url": "http://127.0.0.1:1/mcp", "restart_backoff": 0.01}}, ping_interval=0)
+    try:
+        await client.alist_tools()
+        session = client._sessions[asyncio.get_running_loop()]["srv"]
+        # An error reply to ping proves the server is up
+        assert await session.ping() is True
+        assert session.failures == 0 and session._alive()
+
+        FakeClient.instances[-1].fail_next = True
+        assert "pipe closed" in json.loads(await client.acall_tool("echo", {}))["error"]
+        # Two failed reconnects in a row; the supervisor keeps going
+        for _ in range(200):
+            if session._alive():
+                break
+            await asyncio.sleep(0.01)
+        assert session._alive() and len(connects) == 4
+        assert json.loads(await client.acall_tool("echo", {"x": 1})) == {"x": 1}
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_api_runs_on_the_calling_loop(monkeypatch, tmp_path):
+    FakeClient.instances = []
+    monkeypatch.setattr(fastmcp, "Client", FakeClient)
+    cfg = AppConfig(
+        llm=LLMConfig(
+            models={"openai": ["gpt-4o"]}, api_keys={}, default_model="gpt-4o", personality="p",
+            prompt=["you are ", "."], mcp_servers={"srv": "http://127.0.0.1:1/mcp"},
+        ),
+        matrix=MatrixConfig(server="s", username="u", password="p", channels=["!r"], admins=[], store_path=str(tmp_path)),
+    )
+    ctx = AppContext(cfg)
+    await ctx.start_tools()
+    threads = threading.active_count()
+    assert "echo" in ctx._mcp_tool_names
+    assert any(t["function"]["name"] == "echo" for t in ctx.tools_schema)
+    results = await asyncio.gather(*(ctx._execute_tool_async("echo", {"i": i}) for i in range(3)))
+    assert [json.loads(r) for r in results] == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert threading.active_count() == threads
+    assert len(FakeClient.instances) == 1
+    with pytest.raises(RuntimeError):
+        ctx.mcp_client.list_tools()
+    await ctx.mcp_client.aclose()
+    assert not FakeClient.instances[0].connected
+
+
+@pytest.mark.asyncio
+async def test_discovery_is_concurrent_with_deadline_and_cached_on_disk(monkeypatch, tmp_path):
+    class SlowClient(FakeClient):
+        async def list_tools(self):
+            if "hung" in self.spec:
+                await asyncio.sleep(10)
+            await asyncio.sleep(0.05)
+            name = next(iter(self.spec))
+            return [SimpleNamespace(name=f"{name}_tool", description="", inputSchema=None)]
+
+    monkeypatch.setattr(fastmcp, "Client", SlowClient)
+    servers = {"a": "http://a/mcp", "b": "http://b/mcp", "hung": "http://h/mcp"}
+    cfg = AppConfig(
+        llm=LLMConfig(
+            models={"openai": ["gpt-4o"]}, api_keys={}, default_model="gpt-4o", personality="p",
+            prompt=["you are ", "."], mcp_servers=servers, mcp_discovery_timeout=0.3, mcp_ping_interval=0, mcp_refresh_interval=0,
+        ),
+        matrix=MatrixConfig(server="s", username="u", password="p", channels=["!r"], admins=[], store_path=str(tmp_path)),
+    )
+    ctx = AppContext(cfg)
+    started = asyncio.get_running_loop().time()
+    await ctx.start_tools()
+    assert asyncio.get_running_loop().time() - started < 1
+    assert ctx._mcp_tool_names == {"a_tool", "b_tool"}
+    await ctx.stop_tools()
+
+    # A restart serves cached schemas at once and refreshes in the background
+    ctx = AppContext(cfg)
+    await ctx.start_tools()
+    assert ctx._mcp_tool_names == {"a_tool", "b_tool"}
+    assert len(ctx._tool_tasks) == 1
+    await asyncio.gather(*ctx._tool_tasks)
+    await ctx.stop_tools()
+
+
+@pytest.mark.asyncio
+async def test_list_changed_notification_swaps_tool_set(monkeypatch, tmp_path):
+    tools = ["echo"]
+
+    class ChangingClient(FakeClient):
+        async def list_tools(self):
+            return [SimpleNamespace(name=n, description="", inputSchema=None) for n in tools]
+
+    FakeClient.instances = []
+    monkeypatch.setattr(fastmcp, "Client", ChangingClient)
+    cfg = AppConfig(
+        llm=LLMConfig(
+            models={"openai": ["gpt-4o"]}, api_keys={}, default_model="gpt-4o", personality="p",
+            prompt=["you are ", "."], mcp_servers={"srv": "http://127.0.0.1:1/mcp"}, mcp_ping_interval=0,
+            mcp_refresh_interval=0,
+        ),
+        matrix=MatrixConfig(server="s", username="u", password="p", channels=["!r"], admins=[], store_path=str(tmp_path)),
+    )
+    ctx = AppContext(cfg)
+    await ctx.start_tools()
+    before = ctx.toolset
+    assert await ctx.refresh_tools() is False and ctx.toolset is before
+
+    tools[:] = ["echo", "search"]
+    await FakeClient.instances[0].message_handler(SimpleNamespace(method="notifications/tools/list_changed"))
+    await asyncio.gather(*ctx._tool_tasks)
+    assert ctx.toolset is not before
+    assert ctx._mcp_tool_names == {"echo", "search"}
+    body = json.loads(_encode_payload({"model": "m", "tools": ctx.tools_schema}))
+    assert body["tools"] == list(ctx.tools_schema)
+    await ctx.stop_tools()
+
+
+SERVER = """
+import os, sys, time
+from fastmcp import FastMCP
+
+print("server starting", file=sys.stderr, flush=True)
+mcp = FastMCP("t")
+
+@mcp.tool
+def echo(text: str) -> str:
+    return text
+
+@mcp.tool
+def hang() -> str:
+    time.sleep(30)
+    return "late"
+
+@mcp.tool
+def crash() -> str:
+    print("about to crash", file=sys.stderr, flush=True)
+    os._exit(1)
+
+mcp.run(show_banner=False)
+"""
+
+
+@pytest.mark.asyncio
+async def test_stdio_server_supervision_timeout_and_stderr(tmp_path):
+    script = tmp_path / "server.py"
+    script.write_text(SERVER)
+    spec = {"command": sys.executable, "args": [str(script)], "timeout": 1, "restart_backoff": 0.2, "max_in_flight": 1}
+    client = FastMCPClient({"t": spec}, ping_interval=0)
+    try:
+        await client.alist_tools(timeout=30)
+        assert json.loads(await client.acall_tool("echo", {"text": "hi"})) == "hi"
+        assert "server starting" in client.stderr_tail("t")
+
+        # A hung call is cut off at the server timeout instead of holding the slot
+        assert "did not answer" in json.loads(await client.acall_tool("hang", {}))["error"]
+        session = client._sessions[asyncio.get_running_loop()]["t"]
+        if session._probe is not None:
+            # The server is busy, not dead: the probe's ping is answered
+            assert await session._probe is True
+        assert session.failures == 0
+
+        # The supervisor restarts a crashed server without waiting for a call
+        assert "error" in json.loads(await client.acall_tool("crash", {}))
+        deadline = asyncio.get_running_loop().time() + 30
+        while not session._alive():
+            assert asyncio.get_running_loop().time() < deadline
+            await asyncio.sleep(0.05)
+        assert json.loads(await client.acall_tool("echo", {"text": "back"})) == "back"
+        assert "about to crash" in client.stderr_tail("t")
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stderr_is_read_on_a_thread_without_add_reader(monkeypatch):
+    loop = asyncio.get_running_loop()
+
+    def no_add_reader(*args):
+        raise NotImplementedError
+
+    monkeypatch.setattr(loop, "add_reader", no_add_reader)
+    session = _Session(FakeClient, "s", {"command": "x"})
+    sink = session._stderr_sink()
+    sink.write("first line\nsecond")
+    sink.flush()
+    for _ in range(100):
+        if session.stderr:
+            break
+        await asyncio.sleep(0.01)
+    assert list(session.stderr) == ["first line"]
+    session._close_stderr()
@@ -4,6 +4,7 @@ import pytest
 
 from infinigpt.handlers.cmd_x import handle_x
 from infinigpt.history import HistoryStore
+from infinigpt.names import NameIndex
 
 
 class FakeMatrix:
@@ -77,3 +78,38 @@ async def test_x_keeps_matrix_id_targeting():
 
     assert matrix.sent
     assert history.get("!r", "@target:hs")[-2] == {"role": "user", "content": "hello"}
+
+
+@pytest.mark.asyncio
+async def test_x_resolves_through_name_index_without_lookups():
+    index = NameIndex()
+    index.add("@john:hs", "John")
+    index.add("@johnd:hs", "John Doe")
+    index.add("@lurker:hs", "John Doe Jr")
+    matrix = FakeMatrix()
+    matrix.name_index = lambda room_id: index
+
+    async def no_lookup(user_id):
+        raise AssertionError("display_name should not be called")
+
+    matrix.display_name = no_lookup
+    history = HistoryStore("you are ", ".", "helper")
+    for user in ("@john:hs", "@johnd:hs"):
+        history.init_prompt("!r", user)
+    ctx = SimpleNamespace(
+        history=history,
+        matrix=matrix,
+        llm=FakeLLM(),
+        render=lambda s: None,
+        model="gpt-4o",
+        cfg=SimpleNamespace(llm=SimpleNamespace(models={"google": []})),
+        options={},
+        log=lambda *a, **k: None,
+        user_models={},
+        tools_enabled=False,
+    )
+
+    # "@lurker:hs" has the longest name but no history thread in the room
+    await handle_x(ctx, "!r", "@sender:hs", "Sender", "John Doe Jr hi")
+
+    assert history.get("!r", "@johnd:hs")[-2] == {"role": "user", "content": "Jr hi"}
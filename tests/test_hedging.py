@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from infinigpt.hedging import HedgePolicy, LatencyTracker, race
+
+
+def test_delay_uses_percentile_once_warm():
+    tracker = LatencyTracker()
+    policy = HedgePolicy({"models": {"a": "b"}, "min_samples": 5, "default_delay": 9, "min_delay": 0.1}, tracker)
+    assert policy.delay_for("a") == 9
+    for v in (1.0, 1.0, 1.0, 1.0, 2.0):
+        tracker.observe("a", v)
+    assert policy.delay_for("a") == 2.0
+    assert policy.secondary_for("a") == "b" and policy.secondary_for("z") is None
+
+
+@pytest.mark.asyncio
+async def test_race_hedges_stalled_primary_and_cancels_loser():
+    cancelled = []
+
+    async def primary(started, cb):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return {"who": "primary"}
+
+    async def secondary(started, cb):
+        started.set()
+        return {"who": "secondary"}
+
+    result = await race(primary, secondary, delay=0.01)
+    await asyncio.sleep(0)
+    assert result == {"who": "secondary"}
+    assert cancelled
+
+
+@pytest.mark.asyncio
+async def test_race_skips_hedge_when_primary_starts():
+    calls = []
+
+    async def primary(started, cb):
+        started.set()
+        await asyncio.sleep(0.02)
+        return {"who": "primary"}
+
+    async def secondary(started, cb):
+        calls.append(1)
+        return {"who": "secondary"}
+
+    assert (await race(primary, secondary, delay=0.01))["who"] == "primary"
+    assert not calls
+
+
+@pytest.mark.asyncio
+async def test_cancelling_race_before_hedge_cancels_primary():
+    cancelled = []
+
+    async def primary(started, cb):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def secondary(started, cb):
+        return {"who": "secondary"}
+
+    task = asyncio.create_task(race(primary, secondary, delay=5))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+    assert cancelled
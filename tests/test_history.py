@@ -1,4 +1,4 @@
-from infinigpt.history import HistoryStore
+from infinigpt.history import HistoryStore, TokenEstimator, trim_messages
 
 
 def test_history_prompt_and_trim():
@@ -13,3 +13,38 @@ def test_history_prompt_and_trim():
     assert len(msgs) <= 5
     assert msgs[0]["role"] in ("system", "user")
 
+
+def test_history_token_budget_keeps_system_and_newest():
+    hs = HistoryStore("you are ", ".", "helper", token_budgets={"small": 60})
+    room, user = "!r:server", "@u:server"
+    for i in range(10):
+        hs.add(room, user, "user", f"{i}" * 40)
+    msgs = hs.get(room, user, model="small")
+    assert msgs[0]["role"] == "system"
+    assert msgs[-1]["content"] == "9" * 40
+    assert sum(hs.estimator.estimate(m["content"]) for m in msgs) <= 60
+    # Budgeted reads trim a copy; the stored thread stays whole for other models
+    assert len(hs.get(room, user, model="other")) == 11
+    assert len(hs.get(room, user)) == 11
+
+
+def test_trim_messages_never_empties_and_estimator_calibrates():
+    msgs = [{"role": "system", "content": "s"}, {"role": "user", "content": "x" * 4000}]
+    trim_messages(msgs, max_tokens=10)
+    assert [m["role"] for m in msgs] == ["system", "user"]
+
+    est = TokenEstimator(chars_per_token=4.0, alpha=1.0)
+    est.observe(chars=300, messages=0, prompt_tokens=100)
+    assert est.chars_per_token == 3.0
+
+
+def test_stored_messages_follow_estimator_calibration():
+    hs = HistoryStore("you are ", ".", "helper", max_items=50, token_budgets={"m": 200})
+    room, user = "!r:server", "@u:server"
+    for i in range(5):
+        hs.add(room, user, "user", f"{i}" * 100)
+    assert len(hs.get(room, user, model="m")) == 6
+    # Calibration to 2 chars/token doubles every stored message's cost
+    hs.estimator.chars_per_token = 2.0
+    msgs = hs.get(room, user, model="m")
+    assert sum(hs.estimator.estimate(m["content"]) for m in msgs) <= 200 and len(msgs) < 6
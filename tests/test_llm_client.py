@@ -1,7 +1,14 @@
-from types import SimpleNamespace
+import asyncio
+import json
+import time
 
-from infinigpt.llm_client import resolve_provider
+import httpx
+import pytest
+
+from infinigpt.breaker import HALF_OPEN, OPEN
+from infinigpt.llm_client import LLMClient, resolve_provider
 from infinigpt.config import AppConfig, LLMConfig, MatrixConfig
+from infinigpt.request_context import request_scope
 
 
 def _cfg():
@@ -25,3 +32,225 @@ def test_resolve_provider_urls():
     url, _ = resolve_provider("llama3.2", cfg)
     assert "http://" in url and ":11434" in url
 
+
+@pytest.mark.asyncio
+async def test_llm_client_pools_clients_per_base_url():
+    client = LLMClient(_cfg())
+    a = client._client_for("https://api.openai.com/v1")
+    assert client._client_for("https://api.openai.com/v1") is a
+    b = client._client_for("http://localhost:11434/v1")
+    assert b is not a
+    await client.aclose()
+    assert a.is_closed and b.is_closed
+    assert client._client_for("https://api.openai.com/v1") is not a
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_assembles_content_and_tool_calls():
+    chunks = [
+        {"choices": [{"delta": {"content": "Hel"}}]},
+        {"choices": [{"delta": {"content": "lo"}}]},
+        {"choices": [{"delta": {"tool_calls": [{"index": 0, "id": "c1", "function": {"name": "get_time", "arguments": "{\"timezone"}}]}}]},
+        {"choices": [{"delta": {"tool_calls": [{"index": 0, "function": {"arguments": "_name\": \"UTC\"}"}}]}, "finish_reason": "tool_calls"}]},
+    ]
+    sse = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=sse, headers={"content-type": "text/event-stream"})
+
+    client = LLMClient(_cfg())
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    seen = []
+
+    async def on_delta(text):
+        seen.append(text)
+
+    result = await client.chat_stream({"model": "gpt-4o", "messages": []}, on_delta=on_delta)
+    msg = result["choices"][0]["message"]
+    assert seen == ["Hel", "Hello"]
+    assert msg["content"] == "Hello"
+    assert msg["tool_calls"][0]["id"] == "c1"
+    assert json.loads(msg["tool_calls"][0]["function"]["arguments"]) == {"timezone_name": "UTC"}
+    assert result["choices"][0]["finish_reason"] == "tool_calls"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_chat_serves_deterministic_requests_from_cache():
+    cfg = _cfg()
+    cfg.llm.cache_enabled = True
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    client = LLMClient(cfg)
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+    assert (await client.chat(payload))["choices"][0]["message"]["content"] == "ok"
+    assert (await client.chat(dict(payload)))["choices"][0]["message"]["content"] == "ok"
+    assert len(calls) == 1
+    await client.chat(dict(payload, temperature=0.7))
+    await client.chat(dict(payload, temperature=0.7))
+    assert len(calls) == 3
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_requests_are_coalesced():
+    calls = []
+    release = asyncio.Event()
+
+    async def handler(request):
+        calls.append(1)
+        await release.wait()
+        return httpx.Response(200, json={"choices": [{"message": {"content": "shared"}}]})
+
+    client = LLMClient(_cfg())
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+    leader = asyncio.create_task(client.chat(payload))
+    follower = asyncio.create_task(client.chat(dict(payload)))
+    quitter = asyncio.create_task(client.chat(dict(payload)))
+    await asyncio.sleep(0.01)
+    quitter.cancel()
+    release.set()
+    results = await asyncio.gather(leader, follower)
+    assert [r["choices"][0]["message"]["content"] for r in results] == ["shared", "shared"]
+    assert len(calls) == 1
+    assert client.metrics["coalesced"] == 2 and client.metrics["upstream"] == 1
+    assert not client._inflight
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_chat_retries_after_429():
+    responses = [
+        httpx.Response(429, headers={"retry-after": "0"}),
+        httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]}),
+    ]
+
+    def handler(request):
+        return responses.pop(0)
+
+    client = LLMClient(_cfg())
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = await client.chat({"model": "gpt-4o", "messages": []})
+    assert result["choices"][0]["message"]["content"] == "ok"
+    assert not responses
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_chat_fails_over_to_fallback_model():
+    cfg = _cfg()
+    cfg.llm.fallbacks = {"gpt-4o": ["llama3.2"]}
+    cfg.llm.options = {"temperature": 0.5}
+    seen = []
+
+    def openai(request):
+        return httpx.Response(503)
+
+    def ollama(request):
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json={"choices": [{"message": {"content": "local"}}]})
+
+    client = LLMClient(cfg)
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(openai))
+    client._clients["http://localhost:11434/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(ollama))
+    result = await client.chat({"model": "gpt-4o", "messages": [], "temperature": 0.5})
+    assert result["choices"][0]["message"]["content"] == "local"
+    assert seen[0]["model"] == "llama3.2"
+    assert client.metrics["failovers"] == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_chat_records_usage_for_request_scope():
+    def handler(request):
+        body = {"choices": [{"message": {"content": "ok"}}], "usage": {"prompt_tokens": 12, "completion_tokens": 3}}
+        return httpx.Response(200, json=body)
+
+    client = LLMClient(_cfg())
+    base, _ = resolve_provider("gpt-4o", client.cfg)
+    client._clients[base] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with request_scope("!room", "@user"):
+        await client.chat({"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]})
+    snap = client.usage.snapshot()
+    assert snap["by_room"]["!room"]["prompt_tokens"] == 12
+    assert snap["by_user"]["@user"]["completion_tokens"] == 3
+    assert snap["by_provider"]["openai"]["requests"] == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_failover_timeout_bounds_headers_not_the_stream():
+    cfg = _cfg()
+    cfg.llm.fallbacks = {"gpt-4o": ["llama3.2"]}
+    cfg.llm.failover_timeout = 0.05
+
+    async def body():
+        for piece in ("slow", " answer"):
+            await asyncio.sleep(0.04)
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n".encode()
+        yield b"data: [DONE]\n\n"
+
+    def handler(request):
+        return httpx.Response(200, content=body(), headers={"content-type": "text/event-stream"})
+
+    async def on_delta(text):
+        pass
+
+    client = LLMClient(cfg)
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    result = await client.chat_stream({"model": "gpt-4o", "messages": []}, on_delta)
+    assert result["choices"][0]["message"]["content"] == "slow answer"
+    assert client.metrics["failovers"] == 0
+    assert client.breaker("openai")._outcomes[-1] is True
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_half_open_probe_releases_breaker():
+    async def handler(request):
+        await asyncio.sleep(10)
+
+    client = LLMClient(_cfg())
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    breaker = client.breaker("openai")
+    breaker.state, breaker._opened_at = OPEN, time.monotonic() - 3600
+    task = asyncio.create_task(client._dispatch({"model": "gpt-4o", "messages": []}))
+    await asyncio.sleep(0.01)
+    assert breaker.state == HALF_OPEN and not breaker.allow()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0)
+    assert breaker.allow()
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_hedge_winner_gets_usage_and_breaker_credit():
+    cfg = _cfg()
+    cfg.llm.hedging = {"models": {"gpt-4o": "llama3.2"}, "default_delay": 0.01, "min_delay": 0}
+
+    async def openai(request):
+        await asyncio.sleep(10)
+
+    def ollama(request):
+        return httpx.Response(200, json={"choices": [{"message": {"content": "local"}}], "usage": {"prompt_tokens": 5, "completion_tokens": 1}})
+
+    client = LLMClient(cfg)
+    client._clients["https://api.openai.com/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(openai))
+    client._clients["http://localhost:11434/v1"] = httpx.AsyncClient(transport=httpx.MockTransport(ollama))
+    result = await client.chat({"model": "gpt-4o", "messages": []})
+    assert result["choices"][0]["message"]["content"] == "local"
+    by_provider = client.usage.snapshot()["by_provider"]
+    assert "openai" not in by_provider and by_provider["ollama"]["requests"] == 1
+    assert not client.breaker("openai")._outcomes
+    assert list(client.breaker("ollama")._outcomes) == [True]
+    await client.aclose()
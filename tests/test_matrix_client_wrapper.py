@@ -93,3 +93,35 @@ async def test_matrix_client_wrapper_basic(monkeypatch):
     w.add_to_device_callback(lambda *a, **k: None, None)
     assert w.client._to_device_callbacks
 
+
+@pytest.mark.asyncio
+async def test_display_name_prefers_member_state_and_caches_profile(monkeypatch):
+    monkeypatch.setattr(mc, "AsyncClient", FakeAsyncClient)
+    monkeypatch.setattr(mc, "AsyncClientConfig", FakeAsyncClientConfig)
+    w = mc.MatrixClientWrapper("https://example.org", "@bot:example.org", "pw")
+    calls = []
+
+    async def get_displayname(user_id):
+        calls.append(user_id)
+        return SimpleNamespace(displayname=f"Profile:{user_id}")
+
+    w.client.get_displayname = get_displayname
+    member = SimpleNamespace(display_name="Alice")
+    w.client.rooms = {"!r": SimpleNamespace(users={"@alice:hs": member})}
+
+    assert await w.display_name("@alice:hs", "!r") == "Alice"
+    assert await w.display_name("@bob:hs", "!r") == "Profile:@bob:hs"
+    assert await w.display_name("@bob:hs", "!r") == "Profile:@bob:hs"
+    assert calls == ["@bob:hs"]
+
+    # A member event updates the cached profile name without a lookup
+    await w._on_member(None, SimpleNamespace(state_key="@bob:hs", membership="join", content={"displayname": "Bobby"}))
+    assert await w.display_name("@bob:hs") == "Bobby"
+    # Leaving one room keeps the name while Bob is still in another
+    w.client.rooms["!other"] = SimpleNamespace(users={"@bob:hs": SimpleNamespace(display_name=None)})
+    await w._on_member(SimpleNamespace(room_id="!r"), SimpleNamespace(state_key="@bob:hs", membership="leave", content={}))
+    assert await w.display_name("@bob:hs", "!other") == "Bobby"
+    del w.client.rooms["!other"]
+    await w._on_member(SimpleNamespace(room_id="!r"), SimpleNamespace(state_key="@bob:hs", membership="leave", content={}))
+    await w.display_name("@bob:hs")
+    assert calls == ["@bob:hs", "@bob:hs"]
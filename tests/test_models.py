@@ -0,0 +1,53 @@
+import gc
+import weakref
+from types import SimpleNamespace
+
+from infinigpt.models import ModelRegistry, invalidate_registry, registry_for
+
+
+def _llm():
+    return SimpleNamespace(
+        models={"openai": ["gpt-4o", "gpt-5-mini"], "google": ["gemini-2.0-flash"], "ollama": ["qwen3"]},
+        api_keys={"openai": "K", "google": "G"},
+        ollama_url="localhost:11434",
+        lmstudio_url="localhost:1234",
+    )
+
+
+def test_registry_resolves_provider_policy_and_fallback():
+    reg = ModelRegistry.from_config(_llm())
+    assert reg.resolve("gpt-4o").api_key == "K" and reg.resolve("gpt-4o").apply_options
+    assert not reg.resolve("gpt-5-mini").apply_options
+    gem = reg.resolve("gemini-2.0-flash")
+    assert gem.provider == "google" and not gem.apply_options
+    local = reg.resolve("qwen3")
+    assert local.local and local.base_url == "http://localhost:11434/v1"
+    unknown = reg.resolve("mystery")
+    assert unknown.provider == "openai" and unknown.api_key == "K"
+    assert "qwen3" in reg and "mystery" not in reg
+    assert reg.sorted_names[0] == "gemini-2.0-flash"
+
+
+def test_registry_for_caches_and_rebuilds_on_change():
+    llm = _llm()
+    first = registry_for(llm)
+    assert registry_for(llm) is first
+    llm.ollama_url = "gpu:11434"
+    second = registry_for(llm)
+    assert second is not first
+    assert second.resolve("qwen3").base_url == "http://gpu:11434/v1"
+    llm.models["openai"].append("gpt-4.1")
+    assert "gpt-4.1" in registry_for(llm)
+
+
+def test_invalidate_registry_picks_up_in_place_edits_and_cache_dies_with_config():
+    llm = _llm()
+    first = registry_for(llm)
+    llm.api_keys["openai"] = "rotated"
+    invalidate_registry(llm)
+    assert registry_for(llm).resolve("gpt-4o").api_key == "rotated"
+
+    ref = weakref.ref(registry_for(llm))
+    del llm, first
+    gc.collect()
+    assert ref() is None
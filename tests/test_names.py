@@ -0,0 +1,16 @@
+from infinigpt.names import NameIndex
+
+
+def test_longest_whole_word_prefix_and_updates():
+    idx = NameIndex()
+    idx.add("@a:hs", "Ann")
+    idx.add("@b:hs", "Ann Lee")
+    assert idx.longest_prefix("Ann Lee hello") == ("@b:hs", "Ann Lee", "hello")
+    assert idx.longest_prefix("Annie hi") is None
+    assert idx.longest_prefix("@a:hs yo") == ("@a:hs", "@a:hs", "yo")
+
+    idx.add("@b:hs", "Bea")  # rename
+    assert idx.longest_prefix("Ann Lee hello") == ("@a:hs", "Ann", "Lee hello")
+    idx.remove("@a:hs")
+    assert idx.longest_prefix("Ann Lee hello") is None
+    assert "@a:hs" not in idx and len(idx) == 1
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from infinigpt.ratelimit import RateLimiter, TokenBucket, parse_duration, retry_after
+
+
+def test_parse_duration_formats():
+    assert parse_duration("2") == 2.0
+    assert parse_duration("1m30s") == 90.0
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("soon") is None
+    assert retry_after({"retry-after-ms": "250"}) == 0.25
+    assert retry_after({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6s"}) == 6.0
+
+
+def test_token_bucket_delay():
+    bucket = TokenBucket(per_minute=60)
+    bucket.consume(60)
+    assert bucket.delay_for(1) == pytest.approx(1.0, rel=0.1)
+
+
+@pytest.mark.asyncio
+async def test_local_provider_concurrency_is_serialized():
+    limiter = RateLimiter()
+    active = 0
+    peak = 0
+
+    async def job():
+        nonlocal active, peak
+        async with limiter.slot("ollama", "qwen3"):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    await asyncio.gather(*(job() for _ in range(3)))
+    assert peak == 1
+
+
+def test_observe_429_blocks_scope():
+    limiter = RateLimiter({"openai": {"concurrency": 4}})
+    assert limiter.observe("openai", "gpt-4o", 429, {"retry-after": "3"}) == 3.0
+    assert limiter.observe("openai", "gpt-4o", 200, {}) is None
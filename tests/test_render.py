@@ -0,0 +1,44 @@
+import threading
+
+import markdown
+import pytest
+
+from infinigpt.render import MarkdownRenderer
+
+
+def test_render_reuses_converters_and_caches_output():
+    r = MarkdownRenderer(pool_size=1)
+    html = r.render("**hi**")
+    assert "<strong>hi</strong>" in html
+    converter = r._pool[0]
+    assert r.render("*other*").startswith("<p><em>")
+    assert r._pool == [converter]
+    # Cached bodies do not touch the converter at all
+    r._pool.clear()
+    assert r.render("**hi**") == html
+    assert r._pool == []
+
+
+def test_render_matches_baseline_send_markdown_output():
+    body = "See [[Main Page]] and a note[^1].\n\n[^1]: Footnote."
+    baseline = ["extra", "fenced_code", "nl2br", "sane_lists", "tables", "codehilite", "wikilinks", "footnotes"]
+    assert MarkdownRenderer().render(body) == markdown.markdown(body, extensions=baseline)
+    assert 'class="wikilink"' in MarkdownRenderer().render(body)
+
+@pytest.mark.asyncio
+async def test_render_async_offloads_large_bodies():
+    r = MarkdownRenderer(offload_chars=10)
+    calls = []
+    original = r._convert
+
+    def tracking(body):
+        calls.append(threading.current_thread().name)
+        return original(body)
+
+    r._convert = tracking
+    await r.render_async("short")
+    await r.render_async("```\n" + "x = 1\n" * 50 + "```")
+    assert calls[0] == threading.current_thread().name
+    assert calls[1] != threading.current_thread().name
+    assert await r.render_async("```\n" + "x = 1\n" * 50 + "```") is not None
+    assert len(calls) == 2
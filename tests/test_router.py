@@ -22,3 +22,20 @@ def test_router_dispatch_botname():
     fn, args = r.dispatch(object(), "!r", "@u", "User", "Bot: hi", False, bot_name="Bot")
     assert fn is h
     assert args[-1] == "hi"
+
+
+def test_router_match_prefilters_without_dispatch():
+    r = Router()
+
+    async def h(ctx, room, sender, display, args):
+        pass
+
+    r.register(".ai", h)
+    r.register(".model", h, admin=True)
+    assert r.match("just chatting about .ai", bot_name="Bot") is None
+    assert r.match(".aim high", bot_name="Bot") is None
+    assert r.match("Botany is fun", bot_name="Bot") is None
+    assert r.match("  .ai hi", bot_name="Bot") == ".ai"
+    assert r.match("Bot: hi", bot_name="Bot") == "Bot:"
+    assert r.match(".model x") == ".model"
+    assert r.requires_admin(".model") and not r.requires_admin(".ai")
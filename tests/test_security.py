@@ -1,4 +1,3 @@
-import asyncio
 from types import SimpleNamespace
 
 import pytest
@@ -16,3 +15,37 @@ async def test_security_allows_devices_noop():
     sec = Security(FakeMatrix())
     await sec.allow_devices("@u:example.org")
 
+
+class FakeClient:
+    def __init__(self):
+        self.users_for_key_query = {"@u:example.org"}
+        self.queries = 0
+        self.verified = []
+        self.device_store = {"@u:example.org": {"D1": SimpleNamespace(id="D1", verified=False)}}
+
+    async def keys_query(self):
+        self.queries += 1
+        self.users_for_key_query = set()
+
+    def verify_device(self, dev):
+        self.verified.append(dev.id)
+        dev.verified = True
+
+
+@pytest.mark.asyncio
+async def test_allow_devices_caches_trust_until_device_list_changes():
+    matrix = FakeMatrix()
+    matrix.client = FakeClient()
+    sec = Security(matrix)
+    await sec.allow_devices("@u:example.org")
+    await sec.allow_devices("@u:example.org")
+    assert matrix.client.queries == 1
+    assert matrix.client.verified == ["D1"]
+
+    # A new device shows up via sync: trust is re-evaluated once
+    matrix.client.users_for_key_query = {"@u:example.org"}
+    matrix.client.device_store["@u:example.org"]["D2"] = SimpleNamespace(id="D2", verified=False)
+    await sec.on_sync(SimpleNamespace(device_list=SimpleNamespace(changed=["@u:example.org"], left=[])))
+    await sec.allow_devices("@u:example.org")
+    assert matrix.client.queries == 2
+    assert matrix.client.verified == ["D1", "D2"]
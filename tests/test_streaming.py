@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+import pytest
+
+from infinigpt.handlers.cmd_ai import handle_ai
+from infinigpt.history import HistoryStore
+from infinigpt.streaming import StreamingReply, visible_text
+
+
+class FakeMatrix:
+    def __init__(self):
+        self.sent = []
+        self.edits = []
+
+    async def send_text(self, room_id, body, html=None):
+        self.sent.append(body)
+        return "$e1"
+
+    async def edit_text(self, room_id, event_id, body, html=None):
+        self.edits.append((event_id, body))
+
+
+class StreamingLLM:
+    async def chat_stream(self, payload, on_delta=None):
+        text = ""
+        for piece in ["<think>hmm</think>", "Hi", " there"]:
+            text += piece
+            await on_delta(text)
+        return {"choices": [{"message": {"content": text}}]}
+
+
+def test_visible_text_hides_open_reasoning():
+    assert visible_text("<think>still going") == ""
+    assert visible_text("<think>done</think> Answer") == "Answer"
+    assert visible_text("plain") == "plain"
+
+
+@pytest.mark.asyncio
+async def test_streaming_reply_sends_once_then_edits():
+    ctx = SimpleNamespace(matrix=FakeMatrix())
+    reply = StreamingReply(ctx, "!r", "**U**:\n", interval=0)
+    await reply.update("Hel")
+    await reply.update("Hello")
+    await reply.finish("**U**:\nHello!")
+    assert ctx.matrix.sent == ["**U**:\nHel …"]
+    assert ctx.matrix.edits[-1] == ("$e1", "**U**:\nHello!")
+
+
+@pytest.mark.asyncio
+async def test_handle_ai_streams_when_enabled():
+    ctx = SimpleNamespace(
+        history=HistoryStore("you are ", ".", "helper", max_items=8),
+        matrix=FakeMatrix(),
+        llm=StreamingLLM(),
+        render=lambda s: None,
+        model="gpt-4o",
+        cfg=SimpleNamespace(llm=SimpleNamespace(models={"google": []}, stream=True, stream_interval=0)),
+        options={},
+        log=lambda *a, **k: None,
+        user_models={},
+        tools_enabled=False,
+    )
+    await handle_ai(ctx, "!r", "@u", "User", "hello")
+    assert len(ctx.matrix.sent) == 1
+    assert ctx.matrix.edits[-1] == ("$e1", "**User**:\nHi there")
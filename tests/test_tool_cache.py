@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from infinigpt.tool_cache import ToolResultCache
+from infinigpt.tools import load_cache_policies
+from infinigpt.tools.web import _max_age
+
+
+class Counter:
+    def __init__(self, result='{"ok": true}', delay=0.0):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_policies_cache_by_canonical_arguments_and_skip_errors():
+    cache = ToolResultCache({"calc": "forever", "weather": 600, "turn_only": "turn", "never": "never"})
+    calc = Counter()
+    await cache.run("calc", {"a": 1, "b": 2}, calc)
+    await cache.run("calc", {"b": 2, "a": 1}, calc)
+    assert calc.calls == 1
+
+    failing = Counter('{"error": "boom"}')
+    await cache.run("weather", {"city": "x"}, failing)
+    await cache.run("weather", {"city": "x"}, failing)
+    assert failing.calls == 2
+
+    for name in ("turn_only", "never", "unlisted"):
+        tool = Counter()
+        await cache.run(name, {}, tool)
+        await cache.run(name, {}, tool)
+        assert tool.calls == 2, name
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_in_one_loop_share_one_execution():
+    cache = ToolResultCache({"get_time": "turn", "fetch_url": "http"})
+    tool = Counter(delay=0.05)
+    memo = {}
+    results = await asyncio.gather(*(cache.run("get_time", {"tz": "UTC"}, tool, memo) for _ in range(3)))
+    assert tool.calls == 1 and len(set(results)) == 1
+    # A new tool loop runs it again
+    await cache.run("get_time", {"tz": "UTC"}, tool, {})
+    assert tool.calls == 2
+
+    # HTTP policy follows the max_age the tool reports
+    fresh = Counter(json.dumps({"content": "x", "max_age": 60}))
+    stale = Counter(json.dumps({"content": "x", "max_age": 0}))
+    for _ in range(2):
+        # The model never sees the cache metadata, fresh or cached
+        assert json.loads(await cache.run("fetch_url", {"url": "a"}, fresh)) == {"content": "x"}
+        assert json.loads(await cache.run("fetch_url", {"url": "b"}, stale)) == {"content": "x"}
+    assert (fresh.calls, stale.calls) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_timed_out_run_is_cancelled_only_when_nobody_else_waits():
+    cache = ToolResultCache({"slow": "turn"})
+    memo = {}
+    tool = Counter(delay=0.2)
+    shared = asyncio.ensure_future(cache.run("slow", {}, tool, memo))
+    await asyncio.sleep(0)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(cache.run("slow", {}, tool, memo), 0.01)
+    # The other waiter still gets the result of the one execution
+    assert json.loads(await shared) == {"ok": True} and tool.calls == 1
+
+    lone = ToolResultCache({"slow": "turn"})
+    memo = {}
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(lone.run("slow", {}, tool, memo), 0.01)
+    await asyncio.sleep(0)
+    # Nobody waits for it any more, so it was cancelled and forgotten
+    assert not memo
+
+
+def test_http_max_age_from_headers_and_packaged_policies():
+    assert _max_age(httpx.Headers({"cache-control": "public, max-age=120, s-maxage=300"})) == 300
+    assert _max_age(httpx.Headers({"cache-control": "no-store, max-age=120"})) == 0
+    assert _max_age(httpx.Headers({"expires": "Thu, 01 Jan 1970 00:00:00 GMT"})) == 0
+    assert _max_age(httpx.Headers({})) is None
+    policies = load_cache_policies()
+    assert policies["calculate_expression"] == "forever"
+    assert "openai_image" not in policies
@@ -1,10 +1,16 @@
 import asyncio
+import json
+import threading
+import time
 from types import SimpleNamespace
 
+import httpx
 import pytest
 
+import infinigpt.tools as tools
 from infinigpt.app import AppContext
 from infinigpt.config import AppConfig, LLMConfig, MatrixConfig
+from infinigpt.tools import _http, execute_tool_async
 
 
 class FakeLLM:
@@ -46,3 +52,56 @@ async def test_tool_loop_executes_and_completes(monkeypatch):
     out = await ctx.respond_with_tools(messages, room_id="!r")
     assert "Result is 4" in out
 
+
+@pytest.mark.asyncio
+async def test_builtin_tools_run_async_on_shared_client():
+    def handler(request):
+        return httpx.Response(200, json={"product_id": request.url.path.rsplit("/", 1)[-1], "price": "1"})
+
+    loop = asyncio.get_running_loop()
+    _http._CLIENTS[loop] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    try:
+        out = json.loads(await execute_tool_async("crypto_prices", {"product_id": "BTC-USD"}))
+        assert out["product_id"] == "BTC-USD"
+        assert _http.get_client() is _http._CLIENTS[loop]
+    finally:
+        await _http.aclose()
+
+    # Sync tools are pushed to an executor thread
+    seen = []
+
+    def probe():
+        seen.append(threading.current_thread() is threading.main_thread())
+        return {"ok": True}
+
+    tools._get_registry()["probe"] = probe
+    try:
+        assert json.loads(await execute_tool_async("probe", {})) == {"ok": True}
+    finally:
+        del tools._get_registry()["probe"]
+    assert seen == [False]
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_in_one_turn_run_concurrently_in_order():
+    cfg = AppConfig(
+        llm=LLMConfig(
+            models={"openai": ["gpt-4o"]}, api_keys={}, default_model="gpt-4o", personality="p",
+            prompt=["you are ", "."], tool_timeout=0.3,
+        ),
+        matrix=MatrixConfig(server="s", username="u", password="p", channels=["!r"], admins=[]),
+    )
+    ctx = AppContext(cfg)
+    delays = {"a": 0.1, "b": 0.05, "slow": 5}
+
+    async def fake_exec(name, args):
+        await asyncio.sleep(delays[name])
+        return json.dumps({"tool": name})
+
+    ctx._execute_tool_async = fake_exec
+    calls = [{"id": f"c{i}", "function": {"name": n, "arguments": "{}"}} for i, n in enumerate(["a", "b", "slow"])]
+    started = time.monotonic()
+    results = await ctx._run_tool_calls(calls)
+    assert time.monotonic() - started < 0.5
+    assert [json.loads(r).get("tool") for r in results[:2]] == ["a", "b"]
+    assert "timed out" in json.loads(results[2])["error"]
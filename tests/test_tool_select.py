@@ -0,0 +1,62 @@
+import pytest
+
+from infinigpt.app import AppContext
+from infinigpt.config import AppConfig, LLMConfig, MatrixConfig
+from infinigpt.tool_select import ToolSelector, tokenize
+from infinigpt.tools import load_schema
+
+
+def names(tools):
+    return [t["function"]["name"] for t in tools]
+
+
+def test_ranks_builtin_tools_against_the_message():
+    schema = load_schema()
+    selector = ToolSelector(schema)
+    assert tokenize("getCryptoPrices now") == ["crypto", "price", "now"]
+    assert names(selector.select("what's the weather like in Paris?", 1)) == ["get_weather"]
+    assert "crypto_prices" in names(selector.select("current BTC-USD price on coinbase", 2))
+    # Always-included tools survive; unmatched text ranks nothing
+    assert names(selector.select("hello there", 2, always=["get_time"])) == ["get_time"]
+    # Identical selections reuse one encoded schema; top_k 0 sends everything
+    first = selector.select("weather in Oslo", 1)
+    assert selector.select("weather in Rome", 1) is first and first.json
+    assert selector.select("anything", 0) is schema
+
+
+@pytest.mark.asyncio
+async def test_respond_with_tools_offers_selected_subset():
+    cfg = AppConfig(
+        llm=LLMConfig(
+            models={"openai": ["gpt-4o"]}, api_keys={}, default_model="gpt-4o", personality="p",
+            prompt=["you are ", "."], tool_top_k=2, tool_always=["get_time"],
+        ),
+        matrix=MatrixConfig(server="s", username="u", password="p", channels=["!r"], admins=[]),
+    )
+    ctx = AppContext(cfg)
+    payloads = []
+
+    class FakeLLM:
+        async def chat(self, payload):
+            payloads.append(payload)
+            return {"choices": [{"message": {"content": "ok"}}]}
+
+    ctx.llm = FakeLLM()
+    await ctx.respond_with_tools([{"role": "system", "content": "p"}, {"role": "user", "content": "weather in Paris?"}])
+    offered = names(payloads[-1]["tools"])
+    assert "get_weather" in offered and "get_time" in offered and len(offered) <= 3
+
+    # A follow-up without keywords is ranked with the recent turns
+    history = [
+        {"role": "system", "content": "p"},
+        {"role": "user", "content": "weather in Paris?"},
+        {"role": "assistant", "content": "Sunny, 21C."},
+        {"role": "user", "content": "and tomorrow?"},
+    ]
+    offered = names(ctx._select_tools(history))
+    assert "get_weather" in offered and len(offered) <= 3
+    # Nothing matches at all: tool_always plus the most used tools, not everything
+    assert names(ctx._select_tools([{"role": "user", "content": "hello there"}])) == ["get_time"]
+    ctx._tool_uses.update({"get_weather": 3, "crypto_prices": 1})
+    offered = names(ctx._select_tools([{"role": "user", "content": "hello there"}]))
+    assert set(offered) == {"get_time", "get_weather", "crypto_prices"}
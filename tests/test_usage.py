@@ -0,0 +1,52 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from infinigpt.handlers.cmd_usage import handle_usage
+from infinigpt.usage import UsageTracker, parse_usage
+
+
+def test_parse_usage_reads_detail_fields():
+    tokens = parse_usage(
+        {
+            "prompt_tokens": 100,
+            "completion_tokens": 20,
+            "prompt_tokens_details": {"cached_tokens": 64},
+            "completion_tokens_details": {"reasoning_tokens": 8},
+        }
+    )
+    assert tokens == {"prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 64, "reasoning_tokens": 8}
+    assert parse_usage(None)["prompt_tokens"] == 0
+
+
+def test_tracker_aggregates_by_dimension():
+    t = UsageTracker()
+    t.record("openai", "gpt-4o", {"prompt_tokens": 10, "completion_tokens": 5}, 1.0, "!a", "@u")
+    t.record("openai", "gpt-4o-mini", {"prompt_tokens": 3, "completion_tokens": 1}, 3.0, "!b", "@u")
+    snap = t.snapshot()
+    assert snap["totals"]["total_tokens"] == 19
+    assert snap["by_provider"]["openai"]["requests"] == 2
+    assert snap["by_user"]["@u"]["latency_avg"] == 2.0
+    assert snap["by_room"]["!a"]["total_tokens"] == 15
+    assert t.top("model", 1)[0][0] == "gpt-4o"
+
+
+@pytest.mark.asyncio
+async def test_usage_command_json_export():
+    sent = []
+
+    async def send_text(room_id, body, html=None):
+        sent.append(body)
+
+    tracker = UsageTracker()
+    tracker.record("xai", "grok", {"prompt_tokens": 7}, 0.5, "!r", "@u")
+    ctx = SimpleNamespace(
+        llm=SimpleNamespace(usage=tracker, metrics={"requests": 1}),
+        matrix=SimpleNamespace(send_text=send_text),
+        render=lambda body: body,
+    )
+    await handle_usage(ctx, "!r", "@admin", "admin", "json")
+    data = json.loads(sent[0].strip("`").split("\n", 1)[1])
+    assert data["by_model"]["grok"]["prompt_tokens"] == 7
+    assert data["client"]["requests"] == 1